@@ -60,7 +60,8 @@ class Composite(Component):
     def __init__(self, error=None, error_message=None,
                  identifier=None,
                  component_category=None,
-                 time_remains=None):
+                 time_remains=None,
+                 before_call=None):
         """
         Composite Constructor
 
@@ -71,6 +72,7 @@ class Composite(Component):
          - `component_category`: label for error messages when reporting component actions
          - `identifier`: something to identify this when it starts the call
          - ``time_remains`` - a TimeTracker or CountdownTimer
+         - `before_call`: callable given (repetition, index, component) before each component is called
         """
         super(Composite, self).__init__()
         self.error = error
@@ -80,6 +82,7 @@ class Composite(Component):
         self._logger = None
         self._components = None
         self._time_remains = time_remains
+        self.before_call = before_call
         return
 
     @property
@@ -196,11 +199,15 @@ class Composite(Component):
                                                              c=self.component_category))
 
         # the use of time-remains is meant to facilitate repeated re-use of the same component calls
+        repetition = 0
         while self.time_remains():
+            repetition += 1
             for count, component in enumerate(self.components):
                 self.logger.info(count_string.format(c=count+1,
                                                      t=total_count,
                                                      o=str(component)))                                                 
+                if self.before_call is not None:
+                    self.before_call(repetition, count, component)
                 self.one_call(component)
             
         self.logger.info("{b}*** {c} Ended ***{r}".format(b=BOLD, r=RESET,
@@ -212,6 +212,24 @@ class TestComposite(unittest.TestCase):
         self.assertEqual(tracker.mock_calls, expected_calls)
         return
 
+    def test_before_call(self):
+        """
+        Is the before-call given the repetition and index before each component?
+        """
+        component_1 = MagicMock()
+        component_2 = MagicMock()
+        tracker = MagicMock()
+        tracker.side_effect = [True, True, False]
+        before_call = MagicMock()
+        self.composite.before_call = before_call
+        self.composite._components = [component_1, component_2]
+        self.composite._time_remains = tracker
+        self.composite()
+        self.assertEqual(before_call.mock_calls, [call(1, 0, component_1), call(1, 1, component_2),
+                                                  call(2, 0, component_1), call(2, 1, component_2)])
+        self.assertEqual(2, component_1.call_count)
+        return
+
     def test_close(self):
         """
         Does it close all the components and set the collection to None?
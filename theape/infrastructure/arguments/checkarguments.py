@@ -2,7 +2,7 @@
 """`check` sub-command
 
 usage: ape check -h
-       ape check  [<config-file-name> ...] [--module <module> ...]
+       ape check  [<config-file-name> ...] [--module <module> ...] [--jobs <count>]
 
 Positional Arguments:
 
@@ -12,16 +12,32 @@ optional arguments:
 
     -h, --help                  Show this help message and exit
     -m, --module <module>       Non-ape module with plugins
+    -j, --jobs <count>          Validate the files in <count> processes
+                                (checks configurations only, no plugins are built)
 
 """
 
+# python standard library
+from collections import namedtuple
+import multiprocessing
+import time
+
 # third-party
 import docopt
+from configobj import flatten_errors
 
 # this package
 from theape.infrastructure.arguments.arguments import BaseArguments, ArgumentsConstants
 from theape.infrastructure.arguments.basestrategy import BaseStrategy
 from theape.infrastructure.crash_handler import try_except
+from theape.infrastructure.errors import ConfigurationError
+from theape.infrastructure.strings import RED, BOLD, RESET
+
+RED_ERROR = "{red}{bold}{{error}}{reset}".format(red=RED,
+                                                 bold=BOLD,
+                                                 reset=RESET)
+SUMMARY = "{b}**** Checked {{checked}} file(s): {{failed}} failed ({{seconds:.3f}} seconds) ****{r}".format(b=BOLD,
+                                                                                                         r=RESET)
 
 class CheckArgumentsConstants(object):
     """
@@ -31,6 +47,7 @@ class CheckArgumentsConstants(object):
     # options and arguments
     configfilenames = "<config-file-name>"
     modules = "--module"
+    jobs = "--jobs"
 
     #defaults
     default_configfilenames = ['ape.ini']
@@ -43,6 +60,7 @@ class Check(BaseArguments):
         super(Check, self).__init__(*args, **kwargs)
         self._configfiles = None
         self._modules = None
+        self._jobs = None
         self.sub_usage = __doc__
         self._function = None
         return
@@ -76,6 +94,21 @@ class Check(BaseArguments):
             self._modules = self.sub_arguments[CheckArgumentsConstants.modules]
         return self._modules
     
+    @property
+    def jobs(self):
+        """
+        Number of processes to check the configuration files with (None if not given)
+
+        :raise: ConfigurationError if the count isn't a positive integer
+        """
+        if self._jobs is None:
+            jobs = self.sub_arguments[CheckArgumentsConstants.jobs]
+            if jobs is not None:
+                if not jobs.isdigit() or int(jobs) < 1:
+                    raise ConfigurationError("--jobs has to be a positive integer, not '{0}'".format(jobs))
+                self._jobs = int(jobs)
+        return self._jobs
+
     def reset(self):
         """
         Resets the properties to None
@@ -84,9 +117,69 @@ class Check(BaseArguments):
         self._sub_arguments = None
         self._configfiles = None
         self._modules = None
+        self._jobs = None
         return
 #end Check
 
+CheckResult = namedtuple('CheckResult', 'filename ok errors seconds')
+
+def check_configuration(filename):
+    """
+    Validates a configuration file without building the plugin products
+
+    :param:
+
+     - `filename`: name of an APE configuration file
+
+    :return: CheckResult for the file
+    """
+    # these are imported here because the apeplugin imports the arguments
+    from theape.plugins.apeplugin import OperatorConfiguration
+    from theape.plugins.apeplugin import constants
+    from theape.plugins.quartermaster import QuarterMaster
+
+    start = time.time()
+    errors = []
+    try:
+        operator_configuration = OperatorConfiguration(filename)
+        outcome = operator_configuration.validation_outcome
+        if outcome is not True:
+            for sections, option, error in flatten_errors(operator_configuration.configuration,
+                                                         outcome):
+                section = '/'.join(sections)
+                if option is None:
+                    errors.append("[{0}] section missing".format(section))
+                else:
+                    errors.append("[{0}] {1}: {2}".format(section, option,
+                                                          error or 'invalid or missing value'))
+
+        # set the quartermaster directly so the file storage isn't initialized
+        operator_configuration._quartermaster = QuarterMaster(external_modules=operator_configuration.settings[constants.modules_option])
+        for operation_configuration in operator_configuration.iter_operation_configurations():
+            plugins_section = operation_configuration.plugins_section
+            for section in operation_configuration.plugin_subsections:
+                try:
+                    name = plugins_section[section][constants.plugin_option]
+                    definition = operation_configuration.quartermaster.get_plugin(name)
+                    if definition is None:
+                        raise ConfigurationError("Could not find '{0}' plugin".format(name))
+                    plugin = definition(configuration=plugins_section,
+                                        section_header=section)
+                    config_builder = getattr(plugin, 'config_builder', None)
+                    if config_builder is not None:
+                        config_builder.check_rep()
+                except Exception as error:
+                    errors.append("{0} ({1}): {2}: {3}".format(operation_configuration.operation_name,
+                                                               section,
+                                                               error.__class__.__name__,
+                                                               error))
+    except Exception as error:
+        errors.append("{0}: {1}".format(error.__class__.__name__, error))
+    return CheckResult(filename=filename,
+                       ok=not errors,
+                       errors=errors,
+                       seconds=time.time() - start)
+
 class CheckStrategy(BaseStrategy):
     """
     The `check` sub-command strategy
@@ -98,11 +191,52 @@ class CheckStrategy(BaseStrategy):
 
         :param:
 
-         - `args`: object with configfiles for to build the ape
+         - `args`: object with configfiles for to build the ape (and jobs)
         """
+        if args.jobs is not None:
+            self.check_configurations(args.configfiles, args.jobs)
+            return
         ape = self.build_ape(args.configfiles)
         if ape is None:
             return
         ape.check_rep()
         return
+
+    def check_configurations(self, configfiles, jobs):
+        """
+        Checks the configuration files in a pool of processes
+
+        :param:
+
+         - `configfiles`: list of configuration file names
+         - `jobs`: number of processes to use
+
+        :return: list of CheckResults (in the order of configfiles)
+        """
+        pool = multiprocessing.Pool(min(jobs, len(configfiles)) or 1)
+        results = []
+        start = time.time()
+        try:
+            for result in pool.imap(check_configuration, configfiles):
+                results.append(result)
+                if result.ok:
+                    self.logger.info("{0}: OK ({1:.3f} seconds)".format(result.filename,
+                                                                       result.seconds))
+                else:
+                    self.logger.error(RED_ERROR.format(error="{0}: {1} error(s) ({2:.3f} seconds)".format(result.filename,
+                                                                                                      len(result.errors),
+                                                                                                      result.seconds)))
+                    for error in result.errors:
+                        self.logger.error(RED_ERROR.format(error="    " + error))
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        failed = len([result for result in results if not result.ok])
+        self.logger.info(SUMMARY.format(checked=len(results),
+                                        failed=failed,
+                                        seconds=time.time() - start))
+        return results
 # end CheckStrategy
\ No newline at end of file
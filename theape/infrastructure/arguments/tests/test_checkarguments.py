@@ -1,14 +1,19 @@
 
 # python standard library
 import unittest
+import os
+import shutil
+import tempfile
 
 # third-party
-from mock import MagicMock
+from mock import MagicMock, patch
 
 # the APE
 from theape.infrastructure.arguments.arguments import BaseArguments
 from theape.infrastructure.arguments.checkarguments import Check, CheckStrategy
+from theape.infrastructure.arguments.checkarguments import CheckResult, check_configuration
 from theape.infrastructure.arguments.basestrategy import BaseStrategy
+from theape.infrastructure.errors import ConfigurationError
 
 class TestCheck(unittest.TestCase):
     def setUp(self):
@@ -60,6 +65,33 @@ class TestCheck(unittest.TestCase):
         self.assertEqual('dog war'.split(), self.arguments.configfiles)
         self.assertEqual(["big.pig"], self.arguments.modules)
         return
+
+    def test_jobs(self):
+        """
+        Does it get the number of processes to check with?
+        """
+        self.assertIsNone(self.arguments.jobs)
+
+        self.arguments.reset()
+        self.arguments.args = "check dog war --jobs 4".split()
+        self.assertEqual(4, self.arguments.jobs)
+
+        self.arguments.reset()
+        self.arguments.args = "check -j 2 dog".split()
+        self.assertEqual(2, self.arguments.jobs)
+        self.assertEqual(['dog'], self.arguments.configfiles)
+        return
+
+    def test_bad_jobs(self):
+        """
+        Does it refuse counts that a process pool can't use?
+        """
+        for count in '0 -1 four'.split():
+            self.arguments.reset()
+            self.arguments.args = ['check', '--jobs={0}'.format(count)]
+            with self.assertRaises(ConfigurationError):
+                self.arguments.jobs
+        return
 # end TestCheck
 
 class TestCheckStrategy(unittest.TestCase):
@@ -88,6 +120,7 @@ class TestCheckStrategy(unittest.TestCase):
         self.build_ape.return_value = None
         args = MagicMock()
         args.configfiles = configfiles
+        args.jobs = None
 
         # ape not buildable (build_ape returned None)
         self.strategy.function(args)
@@ -106,5 +139,157 @@ class TestCheckStrategy(unittest.TestCase):
         """
         self.build_ape.side_effect = Exception("arrrrrgh")
         args = MagicMock()
+        args.jobs = None
         self.strategy.function(args)
-        return
\ No newline at end of file
+        return
+
+    def test_check_configurations(self):
+        """
+        Does it check the files in a process pool instead of building the ape?
+        """
+        configfiles = 'alpha beta'.split()
+        results = [CheckResult(filename='alpha', ok=True, errors=[], seconds=0.1),
+                   CheckResult(filename='beta', ok=False, errors=['bad'], seconds=0.2)]
+        args = MagicMock()
+        args.configfiles = configfiles
+        args.jobs = 4
+        pool = MagicMock()
+        pool.imap.return_value = iter(results)
+        with patch('multiprocessing.Pool') as pool_class:
+            pool_class.return_value = pool
+            self.strategy.function(args)
+
+            # there are only two files so only two processes are needed
+            pool_class.assert_called_with(2)
+        pool.imap.assert_called_with(check_configuration, configfiles)
+        pool.close.assert_called_with()
+        pool.join.assert_called_with()
+        self.assertEqual(self.build_ape.mock_calls, [])
+
+        pool.imap.return_value = iter(results)
+        with patch('multiprocessing.Pool') as pool_class:
+            pool_class.return_value = pool
+            self.assertEqual(results,
+                             self.strategy.check_configurations(configfiles, 1))
+            pool_class.assert_called_with(1)
+        return
+# end TestCheckStrategy
+
+class TestCheckConfiguration(unittest.TestCase):
+    def test_check_configuration(self):
+        """
+        Does it collect the errors without building the products?
+        """
+        plugins_section = {'sleep': {'plugin': 'Sleep'},
+                           'dummy': {'plugin': 'Dummy'},
+                           'missing': {'plugin': 'Missing'}}
+        operation_configuration = MagicMock()
+        operation_configuration.operation_name = 'op'
+        operation_configuration.plugins_section = plugins_section
+        operation_configuration.plugin_subsections = ['sleep', 'dummy', 'missing']
+        operator_configuration = MagicMock()
+        operator_configuration.validation_outcome = True
+        operator_configuration.iter_operation_configurations.return_value = [operation_configuration]
+
+        sleep = MagicMock()
+        dummy = MagicMock()
+        dummy.return_value.config_builder.check_rep.side_effect = Exception('bad dummy')
+        definitions = {'Sleep': sleep, 'Dummy': dummy}
+        quartermaster = MagicMock()
+        quartermaster.get_plugin.side_effect = lambda name: definitions.get(name)
+        operation_configuration.quartermaster = quartermaster
+
+        with patch('theape.plugins.apeplugin.OperatorConfiguration') as operator_class:
+            with patch('theape.plugins.quartermaster.QuarterMaster') as quartermaster_class:
+                operator_class.return_value = operator_configuration
+                quartermaster_class.return_value = quartermaster
+                result = check_configuration('ape.ini')
+
+        operator_class.assert_called_with('ape.ini')
+        sleep.assert_called_with(configuration=plugins_section,
+                                 section_header='sleep')
+        sleep.return_value.config_builder.check_rep.assert_called_with()
+        self.assertEqual(sleep.return_value.product.mock_calls, [])
+        self.assertEqual('ape.ini', result.filename)
+        self.assertFalse(result.ok)
+        self.assertEqual(2, len(result.errors))
+        self.assertIn('bad dummy', result.errors[0])
+        self.assertIn('Missing', result.errors[1])
+
+        # nothing went wrong
+        operation_configuration.plugin_subsections = ['sleep']
+        with patch('theape.plugins.apeplugin.OperatorConfiguration') as operator_class:
+            with patch('theape.plugins.quartermaster.QuarterMaster') as quartermaster_class:
+                operator_class.return_value = operator_configuration
+                quartermaster_class.return_value = quartermaster
+                result = check_configuration('ape.ini')
+        self.assertTrue(result.ok)
+        self.assertEqual([], result.errors)
+        return
+
+    def write(self, name, text):
+        """
+        Writes a configuration file to the temporary folder
+
+        :return: path to the file
+        """
+        filename = os.path.join(self.folder, name)
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        # keep the compiled copies out of the user's cache
+        self.environment = patch.dict(os.environ, {'XDG_CACHE_HOME': self.folder})
+        self.environment.start()
+        self.filename = self.write('ape.ini', CONFIGURATION)
+        return
+
+    def tearDown(self):
+        self.environment.stop()
+        shutil.rmtree(self.folder)
+        return
+
+    def test_real_file(self):
+        """
+        Does it pass a valid configuration file?
+        """
+        result = check_configuration(self.filename)
+        self.assertEqual([], result.errors)
+        self.assertTrue(result.ok)
+        return
+
+    def test_fragment(self):
+        """
+        Does it check the plugins in the config_glob fragments too?
+        """
+        self.filename = self.write('ape.ini', CONFIGURATION + "config_glob = *.frag\n")
+        self.write('bad.frag', FRAGMENT)
+        result = check_configuration(self.filename)
+        self.assertFalse(result.ok)
+        self.assertEqual(1, len(result.errors))
+        self.assertIn('NoSuchPlugin', result.errors[0])
+        return
+# end TestCheckConfiguration
+
+CONFIGURATION = """
+[OPERATIONS]
+napping = nap
+
+[PLUGINS]
+[[nap]]
+plugin = Sleep
+total = 1 second
+
+[SETTINGS]
+"""
+
+FRAGMENT = """
+[OPERATIONS]
+dreaming = dream
+
+[PLUGINS]
+[[dream]]
+plugin = NoSuchPlugin
+"""
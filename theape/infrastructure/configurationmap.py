@@ -19,17 +19,21 @@ class ConfigurationMap(BaseClass):
     """
     A map from configuration files to data
     """
-    def __init__(self, filename):
+    def __init__(self, filename, cached=False):
         """
         ConfigurationMap constructor
 
         :param:
 
          - `filename`: filename(s) to create configuration
+         - `cached`: if True, look values up in the index and keep what's been cast
         """
         super(ConfigurationMap, self).__init__()
         self.filename = filename        
+        self.cached = cached
         self._parser = None
+        self._index = None
+        self.typed = {}
         return
 
     @property
@@ -45,6 +49,48 @@ class ConfigurationMap(BaseClass):
                     self._parser.read(name)
         return self._parser
 
+    @property
+    def index(self):
+        """
+        A flat dict of (section, option) : string for every option (including DEFAULT)
+        """
+        if self._index is None:
+            self._index = {}
+            sections = [(DEFAULT, self.parser.defaults())]
+            sections += [(section, self.parser.options(section))
+                         for section in self.parser.sections()]
+            for section, options in sections:
+                for option in options:
+                    try:
+                        self._index[(section, option)] = self.parser.get(section, option)
+                    except ConfigParser.Error as error:
+                        # leave it to the parser to raise if it gets asked for
+                        self.logger.debug(error)
+        return self._index
+
+    def reset(self):
+        """
+        Clears the index and cast values (call after changing the parser)
+        """
+        self._index = None
+        self.typed.clear()
+        return
+
+    def remember(self, key, value):
+        """
+        Stores the cast value if cached and the option exists
+
+        :param:
+
+         - `key`: tuple of (section, option, <how it was cast>)
+         - `value`: the cast value to store
+
+        :return: value
+        """
+        if self.cached and (key[0], self.parser.optionxform(key[1])) in self.index:
+            self.typed[key] = value
+        return value
+
     def get(self, section, option, optional=True, default=None):
         """
         Gets the option from the section as a string
@@ -56,6 +102,12 @@ class ConfigurationMap(BaseClass):
          - `optional`: If true return default instead of raising error for missing option
          - `default`: what to return if optional and not found
         """
+        if self.cached:
+            try:
+                return self.index[(section, self.parser.optionxform(option))]
+            except KeyError:
+                # let the parser decide how to handle it
+                pass
         try:
             return self.parser.get(section, option)
         except ConfigParser.NoOptionError as error:
@@ -78,8 +130,11 @@ class ConfigurationMap(BaseClass):
         :return: value from section:option
         :raise: ConfigurationError if it can't be cast
         """
+        key = (section, option, cast)
+        if key in self.typed:
+            return self.typed[key]
         try:
-            return cast(self.get(section, option, optional, default))
+            return self.remember(key, cast(self.get(section, option, optional, default)))
         except ValueError as error:
             value = self.get(section,
                              option,
@@ -123,8 +178,11 @@ class ConfigurationMap(BaseClass):
         :return: value from section:option
         :raise: ConfigurationError if it can't be cast
         """
+        key = (section, option, bool)
+        if key in self.typed:
+            return self.typed[key]
         try:
-            return self.parser.getboolean(section, option)
+            return self.remember(key, self.parser.getboolean(section, option))
         except ConfigParser.NoOptionError as error:
             self.logger.debug(error)
             if optional:
@@ -156,8 +214,11 @@ class ConfigurationMap(BaseClass):
 
         :return: value list with whitespace trimmed
         """
-        values =  self.get(section, option, optional=False, default=None).split(delimiter)
-        return [value.strip() for value in values]
+        key = (section, option, tuple, delimiter)
+        if key not in self.typed:
+            values =  self.get(section, option, optional=False, default=None).split(delimiter)
+            return list(self.remember(key, tuple(value.strip() for value in values)))
+        return list(self.typed[key])
 
     def get_tuple(self, section, option, optional=False, default=None, delimiter=','):
         """
@@ -173,18 +234,25 @@ class ConfigurationMap(BaseClass):
         """
         converts a delimiter-separated line to a key:value based dictionary (values are strings)
         """
-        line = self.get_list(section, option, optional=False, default=None,
-                              delimiter=',')
-        return dict(item.split(separator) for item in line)
+        key = (section, option, dict, delimiter, separator)
+        if key not in self.typed:
+            line = self.get_list(section, option, optional=False, default=None,
+                                  delimiter=',')
+            return dict(self.remember(key, dict(item.split(separator) for item in line)))
+        return dict(self.typed[key])
 
     def get_ordered_dictionary(self, section, option, optional=False, default=None,
                                delimiter=',', separator=':'):
         """
         converts a delimiter-separated line to a key:value based dictionary (values are strings)
         """
-        line = self.get_list(section, option, optional=False, default=None,
-                              delimiter=',')
-        return OrderedDict(item.split(separator) for item in line)
+        key = (section, option, OrderedDict, delimiter, separator)
+        if key not in self.typed:
+            line = self.get_list(section, option, optional=False, default=None,
+                                  delimiter=',')
+            return OrderedDict(self.remember(key, OrderedDict(item.split(separator)
+                                                              for item in line)))
+        return OrderedDict(self.typed[key])
 
     def get_named_tuple(self, section, option, optional=False, default=None,
                                delimiter=',', separator=':', cast=str):
@@ -203,6 +271,9 @@ class ConfigurationMap(BaseClass):
          - `separator: token to separate each <field><value> pair
          - `cast`:  function to cast all values
         """
+        key = (section, option, namedtuple, delimiter, separator, cast)
+        if key in self.typed:
+            return self.typed[key]
         line = self.get_list(section, option, optional=False, default=None,
                               delimiter=',')
         tokens = [token.split(separator) for token in line]
@@ -210,7 +281,7 @@ class ConfigurationMap(BaseClass):
         values = (cast(token[1]) for token in tokens)
         
         definition = namedtuple(section, fields)
-        return definition(*values)
+        return self.remember(key, definition(*values))
 
     def get_relativetime(self, section, option, optional=False, default=None):
         """
@@ -218,21 +289,30 @@ class ConfigurationMap(BaseClass):
 
         :return: RelativeTime object
         """
+        # the source is cached, not the RelativeTime -- it can be changed by the caller
+        key = (section, option, RelativeTime)
+        if key in self.typed:
+            return RelativeTime(source=self.typed[key])
         source = self.get(section, option, optional, default)
         if source is not default:
-            return RelativeTime(source=source)
+            return RelativeTime(source=self.remember(key, source))
         return default
 
     def get_datetime(self, section, option, optional=False, default=None):
         """
         Gets a datetime object based on the option (value is timestamp) (see timemap.AbsoluteTime)
 
+        .. note:: if cached, a time without a date stays on the date of the first call
+
         :return: datetime object or default
         """
+        key = (section, option, AbsoluteTime)
+        if key in self.typed:
+            return self.typed[key]
         source = self.get(section, option, optional, default)
         if source is not default:
             abtime = AbsoluteTime()
-            return abtime(source)
+            return self.remember(key, abtime(source))
         return default
     
 
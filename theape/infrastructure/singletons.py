@@ -23,8 +23,10 @@
 
 # this package
 from theape import DontCatchError
+from theape import ApeError
 from theape.components.component import Composite
 from theape.parts.storage.filestorage import FileStorage
+from theape.parts.storage.catalog import OutputCatalog
 from theape import FILE_TIMESTAMP
 
 # the singletons will be kept in this dictionary
@@ -37,6 +39,7 @@ class SingletonEnum(object):
     __slots__ = ()
     composite = 'composite'
     filestorage = 'filestorage'
+    catalog = 'catalog'
 
 def get_composite(name, error=DontCatchError, error_message=None,
                   identifier=None, component_category='unknown'):
@@ -88,9 +91,31 @@ def get_filestorage(name, path=None,
                                                                   timestamp=timestamp)
     return singletons[SingletonEnum.filestorage][name]
 
+def get_catalog(name, filename=None):
+    """
+    Gets an OutputCatalog Singleton
+
+    :param:
+
+     - `name`: name to register singleton (clients that want same singleton, use same name)
+     - `filename`: path to the sqlite database (needed the first time)
+
+    :return: OutputCatalog singleton
+    :raise: ApeError if the catalog doesn't exist and no filename is given
+    """
+    if SingletonEnum.catalog not in singletons:
+        singletons[SingletonEnum.catalog] = {}
+    if name not in singletons[SingletonEnum.catalog]:
+        if filename is None:
+            raise ApeError("catalog '{0}' needs a filename".format(name))
+        singletons[SingletonEnum.catalog][name] = OutputCatalog(filename)
+    return singletons[SingletonEnum.catalog][name]
+
 def refresh():
     """
-    Clears the `singletons` dictionary
+    Clears the `singletons` dictionary (closing any catalogs)
     """
+    for catalog in singletons.get(SingletonEnum.catalog, {}).values():
+        catalog.close()
     singletons.clear()
     return
\ No newline at end of file
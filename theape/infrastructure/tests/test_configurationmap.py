@@ -0,0 +1,131 @@
+
+# python standard library
+import unittest
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# third party
+from mock import patch
+
+# this package
+from theape.infrastructure.configurationmap import ConfigurationMap
+from theape.infrastructure.errors import ConfigurationError
+
+SOURCE = """
+[DEFAULT]
+base = 5
+
+[SLEEP]
+timeout = 2.5
+count = %(base)s
+verbose = yes
+names = a, b ,c
+pairs = a:1,b:2
+when = 2013-11-23 08:00
+wait = 2 minutes
+"""
+
+class TestConfigurationMap(unittest.TestCase):
+    def setUp(self):
+        descriptor, self.filename = tempfile.mkstemp(suffix='.ini')
+        with os.fdopen(descriptor, 'w') as f:
+            f.write(SOURCE)
+        self.configuration = ConfigurationMap(self.filename, cached=True)
+        return
+
+    def tearDown(self):
+        os.remove(self.filename)
+        return
+
+    def test_index(self):
+        """
+        Does it build a flat (interpolated) index of the options?
+        """
+        index = self.configuration.index
+        self.assertEqual('5', index[('DEFAULT', 'base')])
+        self.assertEqual('5', index[('SLEEP', 'count')])
+        self.assertEqual('2.5', index[('SLEEP', 'timeout')])
+        with patch.object(self.configuration.parser, 'get') as get:
+            self.assertEqual('2.5', self.configuration.get('SLEEP', 'Timeout'))
+            self.assertEqual(get.mock_calls, [])
+        return
+
+    def test_typed(self):
+        """
+        Does it only cast the values once?
+        """
+        configuration = self.configuration
+        self.assertEqual(5, configuration.get_int('SLEEP', 'count'))
+        self.assertTrue(configuration.get_boolean('SLEEP', 'verbose'))
+        self.assertEqual(datetime(2013, 11, 23, 8), configuration.get_datetime('SLEEP', 'when'))
+        with patch.object(configuration, 'get') as get:
+            with patch.object(configuration.parser, 'getboolean') as getboolean:
+                self.assertEqual(5, configuration.get_int('SLEEP', 'count'))
+                self.assertTrue(configuration.get_boolean('SLEEP', 'verbose'))
+                self.assertEqual(datetime(2013, 11, 23, 8),
+                                 configuration.get_datetime('SLEEP', 'when'))
+                self.assertEqual(get.mock_calls, [])
+                self.assertEqual(getboolean.mock_calls, [])
+
+        # the uncached map re-reads every time
+        configuration = ConfigurationMap(self.filename)
+        self.assertEqual(2.5, configuration.get_float('SLEEP', 'timeout'))
+        self.assertEqual({}, configuration.typed)
+        return
+
+    def test_copies(self):
+        """
+        Does changing a returned collection leave the cache alone?
+        """
+        names = self.configuration.get_list('SLEEP', 'names')
+        self.assertEqual(['a', 'b', 'c'], names)
+        names.append('d')
+        self.assertEqual(['a', 'b', 'c'], self.configuration.get_list('SLEEP', 'names'))
+
+        pairs = self.configuration.get_dictionary('SLEEP', 'pairs')
+        pairs['c'] = '3'
+        self.assertEqual({'a':'1', 'b':'2'}, self.configuration.get_dictionary('SLEEP', 'pairs'))
+        return
+
+    def test_missing(self):
+        """
+        Are missing options still handled (and their defaults not cached)?
+        """
+        configuration = self.configuration
+        self.assertEqual(7, configuration.get_int('SLEEP', 'repetitions', optional=True,
+                                                  default=7))
+        self.assertEqual(8, configuration.get_int('SLEEP', 'repetitions', optional=True,
+                                                  default=8))
+        self.assertRaises(ConfigurationError, configuration.get_int, 'SLEEP', 'repetitions')
+        self.assertNotIn(('SLEEP', 'repetitions', int), configuration.typed)
+        return
+
+    def test_reset(self):
+        """
+        Does reset pick up changes to the parser?
+        """
+        configuration = self.configuration
+        self.assertEqual(2.5, configuration.get_float('SLEEP', 'timeout'))
+        configuration.parser.set('SLEEP', 'timeout', '3.5')
+        self.assertEqual(2.5, configuration.get_float('SLEEP', 'timeout'))
+        configuration.reset()
+        self.assertEqual(3.5, configuration.get_float('SLEEP', 'timeout'))
+        return
+
+    def test_relativetime(self):
+        """
+        Is the relative time looked up once but a new one returned every time?
+        """
+        configuration = self.configuration
+        first = configuration.get_relativetime('SLEEP', 'wait')
+        self.assertEqual(timedelta(minutes=2), first.timedelta)
+        first.source = '5 minutes'
+        with patch.object(configuration, 'get') as get:
+            second = configuration.get_relativetime('SLEEP', 'wait')
+            self.assertEqual(get.mock_calls, [])
+        self.assertIsNot(first, second)
+        self.assertEqual(timedelta(minutes=2), second.timedelta)
+        self.assertIsNone(configuration.get_relativetime('SLEEP', 'pause', optional=True))
+        return
+# end TestConfigurationMap
\ No newline at end of file
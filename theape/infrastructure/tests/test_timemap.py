@@ -0,0 +1,210 @@
+
+# python standard library
+import unittest
+from datetime import timedelta, datetime
+
+# third party
+from mock import patch, MagicMock
+import numpy
+
+# this package
+from theape.infrastructure.timemap import LRUCache, RelativeTime, relative_times
+from theape.infrastructure.timemap import AbsoluteTime, absolute_times
+from theape.infrastructure.timemap import parse_timestamps
+from theape import FILE_TIMESTAMP
+from theape import ApeError
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(maxsize=2)
+        return
+
+    def test_get_set(self):
+        """
+        Does it store and retrieve values?
+        """
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual('default', self.cache.get('a', 'default'))
+        self.cache.set('a', 1)
+        self.assertEqual(1, self.cache.get('a'))
+        self.assertEqual(1, len(self.cache))
+        self.cache.clear()
+        self.assertEqual(0, len(self.cache))
+        return
+
+    def test_least_recently_used(self):
+        """
+        Does it drop the least recently used item when it's full?
+        """
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+
+        # using 'a' makes 'b' the oldest
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(1, self.cache.get('a'))
+        self.assertEqual(3, self.cache.get('c'))
+        return
+# end TestLRUCache
+
+class TestRelativeTime(unittest.TestCase):
+    def setUp(self):
+        relative_times.clear()
+        return
+
+    def test_units(self):
+        """
+        Does it get all the units in one pass?
+        """
+        relative = RelativeTime('1 week 2 Days 3hours 4 MINUTES 5.5 s')
+        expected = timedelta(weeks=1, days=2, hours=3, minutes=4, seconds=5.5)
+        self.assertEqual(expected, relative.timedelta)
+
+        # missing units are 0
+        self.assertEqual(timedelta(minutes=1.5), RelativeTime('1.5 mi').timedelta)
+        self.assertEqual(timedelta(0), RelativeTime('nothing here').timedelta)
+        return
+
+    def test_first_number_wins(self):
+        """
+        Is only the first number for a unit used?
+        """
+        self.assertEqual(timedelta(seconds=3),
+                         RelativeTime('3 seconds, 4 seconds').timedelta)
+        return
+
+    def test_cache(self):
+        """
+        Does it re-use the parsed values for the same source?
+        """
+        first = RelativeTime('2 hours')
+        self.assertEqual(1, len(relative_times))
+        with patch.object(RelativeTime, 'parse') as parse:
+            second = RelativeTime('2 hours')
+            self.assertEqual(parse.mock_calls, [])
+        self.assertEqual(first.timedelta, second.timedelta)
+        self.assertEqual(timedelta(hours=2), second.timedelta)
+
+        # the source isn't a string
+        self.assertRaises(ApeError, RelativeTime, 5)
+        return
+
+    def test_months(self):
+        """
+        Are years and months still calculated from the current date?
+        """
+        delta, fixed = RelativeTime('1 month').parse()
+        self.assertFalse(fixed)
+        self.assertEqual(1, delta.months)
+
+        delta, fixed = RelativeTime('1 day').parse()
+        self.assertTrue(fixed)
+        self.assertEqual(timedelta(days=1), delta)
+        self.assertTrue(timedelta(days=28) <= RelativeTime('1 mo').timedelta <= timedelta(days=31))
+        return
+# end TestRelativeTime
+
+class TestAbsoluteTime(unittest.TestCase):
+    def setUp(self):
+        absolute_times.clear()
+        self.absolute = AbsoluteTime()
+        return
+
+    def test_iso(self):
+        """
+        Does it parse ISO-8601 without calling dateutil?
+        """
+        with patch('dateutil.parser.parse') as parse:
+            self.assertEqual(datetime(2013, 11, 23),
+                             self.absolute('2013-11-23'))
+            self.assertEqual(datetime(2013, 11, 23, 20, 5),
+                             self.absolute('2013-11-23 20:05'))
+            self.assertEqual(datetime(2013, 11, 23, 20, 5, 3, 250000),
+                             self.absolute('2013-11-23T20:05:03.25'))
+            self.assertEqual(parse.mock_calls, [])
+        return
+
+    def test_file_timestamp(self):
+        """
+        Does it parse the APE's FILE_TIMESTAMP format?
+        """
+        with patch('dateutil.parser.parse') as parse:
+            self.assertEqual(datetime(2013, 11, 23, 20, 0, 5),
+                             self.absolute('2013_11_23_08:00:05_PM'))
+            self.assertEqual(datetime(2013, 11, 23, 0, 0, 5),
+                             self.absolute('2013_11_23_12:00:05_AM'))
+            self.assertEqual(parse.mock_calls, [])
+        return
+
+    def test_fuzzy(self):
+        """
+        Does it use (and cache) dateutil for everything else?
+        """
+        expected = datetime(2013, 11, 23, 8)
+        self.assertEqual(expected, self.absolute('November 23, 2013 8:00 am'))
+        with patch('dateutil.parser.parse') as parse:
+            self.assertEqual(expected, self.absolute('November 23, 2013 8:00 am'))
+            self.assertEqual(parse.mock_calls, [])
+
+        # invalid ISO dates go to dateutil too
+        self.assertRaises(ApeError, self.absolute, '2013-13-23')
+        return
+
+    def test_default(self):
+        """
+        Does a default turn off the fast path?
+        """
+        absolute = AbsoluteTime(default=datetime(2000, 1, 1, 6, 30))
+        with patch('dateutil.parser.parse') as parse:
+            parse.return_value = datetime(2013, 11, 23, 6, 30)
+            self.assertEqual(datetime(2013, 11, 23, 6, 30), absolute('2013-11-23'))
+            self.assertEqual(1, len(parse.mock_calls))
+        return
+# end TestAbsoluteTime
+
+class TestParseTimestamps(unittest.TestCase):
+    def test_file_timestamps(self):
+        """
+        Does it convert a column of FILE_TIMESTAMPs to datetime64?
+        """
+        times = [datetime(2013, 11, 23, 20, 0, 5) + timedelta(days=day, seconds=day * 4003)
+                 for day in range(400)]
+        timestamps = numpy.array([time.strftime(FILE_TIMESTAMP) for time in times])
+        expected = numpy.array(times, dtype='datetime64[s]')
+        self.assertTrue((expected == parse_timestamps(timestamps)).all())
+        self.assertTrue((expected == parse_timestamps(list(timestamps))).all())
+        return
+
+    def test_noon_midnight(self):
+        """
+        Does it get 12 AM and 12 PM right?
+        """
+        expected = numpy.array(['2013-11-23T00:00:05', '2013-11-23T12:00:05'],
+                               dtype='datetime64[s]')
+        actual = parse_timestamps(['2013_11_23_12:00:05_AM', '2013_11_23_12:00:05_pm'])
+        self.assertTrue((expected == actual).all())
+        return
+
+    def test_malformed(self):
+        """
+        Does it raise an ApeError for timestamps it can't parse?
+        """
+        good = '2013_11_23_08:00:05_PM'
+        for bad in ('2013_02_29_08:00:05_PM', '2013_11_23_13:00:05_PM',
+                    '2013-11-23_08:00:05_PM', '2013_11_23_08:00:05_XM',
+                    '2013_11_23_8:00:05_PM'):
+            with self.assertRaises(ApeError):
+                parse_timestamps([good, bad])
+        self.assertEqual(0, parse_timestamps([]).size)
+        return
+
+    def test_other_format(self):
+        """
+        Does it fall back to strptime for other formats?
+        """
+        actual = parse_timestamps(['2013-11-23 20:00:05'], '%Y-%m-%d %H:%M:%S')
+        self.assertEqual(numpy.datetime64('2013-11-23T20:00:05'), actual[0])
+        self.assertRaises(ApeError, parse_timestamps, ['2013-11-23'], '%Y-%m-%d %H:%M:%S')
+        return
+# end TestParseTimestamps
\ No newline at end of file
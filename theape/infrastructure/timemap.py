@@ -4,12 +4,16 @@ IN_PWEAVE = __name__ == '__builtin__'
 # python standard library
 import re
 import math
+import threading
+from collections import OrderedDict
 from datetime import timedelta
 from datetime import datetime
+from datetime import date
 if IN_PWEAVE:
     import os
 
 # third-party
+import numpy
 from dateutil.relativedelta import relativedelta
 import dateutil.parser
 from validate import Validator
@@ -17,6 +21,7 @@ from validate import Validator
 # this package
 from theape import BaseClass
 from theape import ApeError
+from theape import FILE_TIMESTAMP
 from theape.parts.oatbran import CharacterClass, Numbers, Group
 from theape.parts.oatbran import CommonPatterns
 from theape.infrastructure.code_graphs import module_diagram, class_diagram
@@ -25,6 +30,72 @@ ZERO = '0'
 INT_ZERO = 0
 ONE = 1
 MICRO = 10**6
+CACHE_SIZE = 1024
+
+class LRUCache(BaseClass):
+    """
+    A thread-safe least-recently-used cache
+    """
+    def __init__(self, maxsize=CACHE_SIZE):
+        """
+        LRUCache constructor
+
+        :param:
+
+         - `maxsize`: the most items to keep
+        """
+        super(LRUCache, self).__init__()
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        return
+
+    def get(self, key, default=None):
+        """
+        Gets the value for the key and marks it as most recently used
+
+        :param:
+
+         - `key`: hashable key for the value
+         - `default`: what to return if the key isn't in the cache
+
+        :return: value for the key or default
+        """
+        with self.lock:
+            try:
+                value = self.items.pop(key)
+            except KeyError:
+                return default
+            self.items[key] = value
+        return value
+
+    def set(self, key, value):
+        """
+        Adds the value to the cache, dropping the least recently used if it's full
+
+        :param:
+
+         - `key`: hashable key for the value
+         - `value`: the thing to cache
+        """
+        with self.lock:
+            self.items.pop(key, None)
+            self.items[key] = value
+            if len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+        return
+
+    def clear(self):
+        """
+        Empties the cache
+        """
+        with self.lock:
+            self.items.clear()
+        return
+
+    def __len__(self):
+        return len(self.items)
+# end class LRUCache
 
 class RelativeTimeMapGroups(object):
     __slots__ = ()
@@ -35,6 +106,17 @@ class RelativeTimeMapGroups(object):
     hours = 'hours'
     minutes = 'minutes'
     seconds = 'seconds'
+    number = 'number'
+    unit = 'unit'
+
+    # lower-cased unit (as matched by RelativeTimeMap.expression) to field-name
+    units = {'y': years,
+             'mo': months,
+             'w': weeks,
+             'd': days,
+             'h': hours,
+             'mi': minutes,
+             's': seconds}
 # end RelativeTimeMapGroups
 
 class RelativeTimeMap(BaseClass):
@@ -43,6 +125,7 @@ class RelativeTimeMap(BaseClass):
     """
     def __init__(self):
         super(RelativeTimeMap, self).__init__()
+        self._expression = None
         self._year_expression = None
         self._month_expression = None
         self._week_expression = None
@@ -52,6 +135,23 @@ class RelativeTimeMap(BaseClass):
         self._second_expression = None
         return
 
+    @property
+    def expression(self):
+        """
+        A compiled regex to match a number and any of the units
+        """
+        if self._expression is None:
+            self._expression = re.compile(Group.named(name=RelativeTimeMapGroups.number,
+                                                      expression=Numbers.real) +
+                                          CommonPatterns.optional_spaces +
+                                          Group.named(name=RelativeTimeMapGroups.unit,
+                                                      expression=(CharacterClass.character_class('Mm') +
+                                                                  CharacterClass.character_class('Oo') + '|' +
+                                                                  CharacterClass.character_class('Mm') +
+                                                                  CharacterClass.character_class('Ii') + '|' +
+                                                                  CharacterClass.character_class('YyWwDdHhSs'))))
+        return self._expression
+
     @property
     def year_expression(self):
         """
@@ -205,6 +305,8 @@ def unary_error(method):
             raise ApeError("timedelta must be object, not '{0}".format(self.timedelta))
     return wrapped
 
+relative_times = LRUCache()
+
 class RelativeTime(BaseClass):
     """
     A timedeltas extension
@@ -299,18 +401,57 @@ class RelativeTime(BaseClass):
             return '0'
         return match.group(group_name)
    
+    @source_required
+    def get_numbers(self):
+        """
+        Gets the numbers for all the units in one pass over the source
+
+        :return: dict of RelativeTimeMapGroups field-name: number-string (missing units are '0')
+        :raise: ApeError if self.source has not been set
+        """
+        numbers = dict.fromkeys(RelativeTimeMapGroups.units.itervalues(), ZERO)
+        found = set()
+        for match in self.time_map.expression.finditer(self.source):
+            name = RelativeTimeMapGroups.units[match.group(RelativeTimeMapGroups.unit).lower()]
+            # the first number for a unit wins (like the separate expressions)
+            if name not in found:
+                found.add(name)
+                numbers[name] = match.group(RelativeTimeMapGroups.number)
+        return numbers
+
+    def parse(self):
+        """
+        Parses the source
+
+        :return: (delta, fixed) -- a timedelta (fixed is True) or a relativedelta that needs a date (fixed is False)
+        """
+        numbers = self.get_numbers()
+        delta = relativedelta(years=int(numbers[RelativeTimeMapGroups.years]),
+                              months=int(numbers[RelativeTimeMapGroups.months]),
+                              weeks=float(numbers[RelativeTimeMapGroups.weeks]),
+                              days=float(numbers[RelativeTimeMapGroups.days]),
+                              hours=float(numbers[RelativeTimeMapGroups.hours]),
+                              minutes=float(numbers[RelativeTimeMapGroups.minutes]),
+                              seconds=float(numbers[RelativeTimeMapGroups.seconds]))
+        if delta.years or delta.months:
+            return delta, False
+        # without years or months the length doesn't depend on the date
+        now = datetime.now()
+        return now + delta - now, True
+
     def populate_fields(self):
         """
         populates the time fields with values (e.g. self.minutes)
 
         """
-        years = self.get_number(self.time_map.year_expression, RelativeTimeMapGroups.years)
-        months = self.get_number(self.time_map.month_expression, RelativeTimeMapGroups.months)
-        weeks = self.get_number(self.time_map.week_expression, RelativeTimeMapGroups.weeks)
-        days = self.get_number(self.time_map.day_expression, RelativeTimeMapGroups.days)
-        hours = self.get_number(self.time_map.hour_expression, RelativeTimeMapGroups.hours)
-        minutes = self.get_number(self.time_map.minute_expression, RelativeTimeMapGroups.minutes)
-        seconds = self.get_number(self.time_map.second_expression, RelativeTimeMapGroups.seconds)
+        parsed = relative_times.get(self.source)
+        if parsed is None:
+            parsed = self.parse()
+            relative_times.set(self.source, parsed)
+        delta, fixed = parsed
+        if fixed:
+            self.timedelta = delta
+            return
 
         now = datetime.now()
 
@@ -318,14 +459,7 @@ class RelativeTime(BaseClass):
         # timedelta doesn't handle varying-units (e.g. 28 vs 30 vs 31 day in a month)
         # relativedelta does -- but it returns a datetime object, not a timedelta
         # so the adding and subtracting is to convert it to a timedelta
-        self.timedelta = now + relativedelta(years=int(years),
-                                             months=int(months),
-                                             weeks=float(weeks),
-                                             days=float(days),
-                                             hours=float(hours),
-                                             minutes=float(minutes),
-                                             seconds=float(seconds)) - now
-        
+        self.timedelta = now + delta - now
         return
 
     @source_required
@@ -530,6 +664,13 @@ class RelativeTime(BaseClass):
         return self.source
 # end class RelativeTime
 
+ISO_EXPRESSION = re.compile(r'^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})'
+                            r'(?:[T ](?P<hour>\d{2}):(?P<minute>\d{2})'
+                            r'(?::(?P<second>\d{2})(?:\.(?P<fraction>\d{1,6}))?)?)?$')
+FILE_TIMESTAMP_EXPRESSION = re.compile(r'^\d{4}_\d{2}_\d{2}_\d{2}:\d{2}:\d{2}_[AaPp][Mm]$')
+
+absolute_times = LRUCache()
+
 class AbsoluteTime(BaseClass):
     """
     A container for the dateutil.parser.parse
@@ -559,6 +700,31 @@ class AbsoluteTime(BaseClass):
         self.parserinfo = parserinfo
         return
 
+    def fast_parse(self, source):
+        """
+        Tries the ISO-8601 and FILE_TIMESTAMP formats
+
+        :param:
+
+         - `source`: string with time and date information
+
+        :return: datetime or None if source isn't in one of the formats
+        """
+        match = ISO_EXPRESSION.match(source)
+        try:
+            if match is not None:
+                fields = match.groupdict()
+                fraction = fields['fraction'] or ZERO
+                return datetime(int(fields['year']), int(fields['month']), int(fields['day']),
+                                int(fields['hour'] or INT_ZERO), int(fields['minute'] or INT_ZERO),
+                                int(fields['second'] or INT_ZERO), int(fraction.ljust(6, ZERO)))
+            if FILE_TIMESTAMP_EXPRESSION.match(source):
+                return datetime.strptime(source, FILE_TIMESTAMP)
+        except ValueError as error:
+            # something like a 13th month -- let dateutil decide what to do
+            self.logger.debug(error)
+        return
+
     def __call__(self, source):
         """
         The main interface -- calls dateutil.parser.parse(source)
@@ -570,24 +736,106 @@ class AbsoluteTime(BaseClass):
         :return: datetime object created from `source`
         :raise: ApeError if the string is unrecognizable
         """
+        key = None
+        if (isinstance(source, basestring) and self.tzinfos is None
+            and self.parserinfo is None):
+            key = (source, self.default or date.today(), self.ignoretz,
+                   self.dayfirst, self.yearfirst, self.fuzzy)
+            parsed = absolute_times.get(key)
+            if parsed is not None:
+                return parsed
+            if self.default is None and not self.dayfirst:
+                parsed = self.fast_parse(source)
+                if parsed is not None:
+                    absolute_times.set(key, parsed)
+                    return parsed
         try:
-            return dateutil.parser.parse(source,
-                                         default=self.default,
-                                         ignoretz=self.ignoretz,
-                                         tzinfos=self.tzinfos,
-                                         dayfirst=self.dayfirst,
-                                         yearfirst=self.yearfirst,
-                                         fuzzy=self.fuzzy,
-                                         parserinfo=self.parserinfo)
+            parsed = dateutil.parser.parse(source,
+                                           default=self.default,
+                                           ignoretz=self.ignoretz,
+                                           tzinfos=self.tzinfos,
+                                           dayfirst=self.dayfirst,
+                                           yearfirst=self.yearfirst,
+                                           fuzzy=self.fuzzy,
+                                           parserinfo=self.parserinfo)
         except ValueError as error:
             self.log_error(error)
             raise ApeError("dateutil.parser.parse unable to parse '{0}'".format(source))
-        return
+        if key is not None:
+            absolute_times.set(key, parsed)
+        return parsed
 # end class AbsoluteTime
 
 time_validator = Validator({'relative_time':RelativeTime,
                        'absolute_time':AbsoluteTime()})
 
+TIMESTAMP_LENGTH = len(datetime(2000, 1, 1).strftime(FILE_TIMESTAMP))
+# column: expected character for the separators in the FILE_TIMESTAMP
+TIMESTAMP_SEPARATORS = {4: '_', 7: '_', 10: '_', 13: ':', 16: ':', 19: '_'}
+TIMESTAMP_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+
+def parse_timestamps(timestamps, timestamp_format=FILE_TIMESTAMP):
+    """
+    Converts a sequence of timestamp strings to a datetime64 array
+
+    :param:
+
+     - `timestamps`: sequence (or numpy array) of timestamp strings
+     - `timestamp_format`: strftime format of the timestamps
+
+    :return: numpy datetime64[s] array (datetime64[us] if not FILE_TIMESTAMP)
+    :raise: ApeError if a timestamp doesn't match the format
+    """
+    if timestamp_format != FILE_TIMESTAMP:
+        try:
+            return numpy.array([datetime.strptime(timestamp, timestamp_format)
+                                for timestamp in timestamps],
+                               dtype='datetime64[us]')
+        except ValueError as error:
+            raise ApeError("unable to parse timestamps: {0}".format(error))
+
+    strings = numpy.asarray(timestamps)
+    if strings.size == 0:
+        return numpy.array([], dtype='datetime64[s]')
+    try:
+        strings = strings.astype('S')
+    except UnicodeError as error:
+        raise ApeError("timestamps must be ASCII ({0})".format(error))
+    if strings.dtype.itemsize != TIMESTAMP_LENGTH:
+        raise ApeError("timestamps must be {0} characters (like '{1}')".format(TIMESTAMP_LENGTH,
+                                                                            datetime(2000, 1, 1).strftime(FILE_TIMESTAMP)))
+    characters = numpy.ascontiguousarray(strings).view(numpy.uint8).reshape(-1, TIMESTAMP_LENGTH)
+    digits = characters[:, TIMESTAMP_DIGITS].astype(numpy.int64) - ord('0')
+    meridians = characters[:, 20] | 0x20
+
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    for column, separator in TIMESTAMP_SEPARATORS.iteritems():
+        valid &= characters[:, column] == ord(separator)
+    valid &= ((meridians == ord('a')) | (meridians == ord('p')))
+    valid &= (characters[:, 21] | 0x20) == ord('m')
+
+    years = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    months = digits[:, 4] * 10 + digits[:, 5]
+    days = digits[:, 6] * 10 + digits[:, 7]
+    hours = digits[:, 8] * 10 + digits[:, 9]
+    minutes = digits[:, 10] * 10 + digits[:, 11]
+    seconds = digits[:, 12] * 10 + digits[:, 13]
+    valid &= ((months >= 1) & (months <= 12) & (days >= 1) & (days <= 31) &
+              (hours >= 1) & (hours <= 12) & (minutes <= 59) & (seconds <= 61))
+
+    # 12 AM is midnight and 12 PM is noon
+    hours = hours % 12 + 12 * (meridians == ord('p'))
+    month_starts = ((years - 1970) * 12 + months - 1).astype('datetime64[M]')
+    dates = month_starts.astype('datetime64[D]') + (days - 1).astype('timedelta64[D]')
+
+    # a day past the end of the month will have rolled into the next month
+    valid &= dates.astype('datetime64[M]') == month_starts
+    if not valid.all():
+        index = numpy.flatnonzero(~valid)[0]
+        raise ApeError("unable to parse timestamp {0}: '{1}'".format(index, strings.ravel()[index]))
+    return (dates.astype('datetime64[s]') +
+            (hours * 3600 + minutes * 60 + seconds).astype('timedelta64[s]')).reshape(strings.shape)
+
 if __name__ == '__main__':
     import pudb; pudb.set_trace()
     r = RelativeTime('3 seconds')
@@ -0,0 +1,231 @@
+
+# python standard library
+import Queue
+import threading
+import time
+import traceback
+
+# this package
+from theape import BaseThreadClass
+from theape import ApeError
+
+QUEUE_SIZE = 1024
+# bytes to buffer before writing to the file
+FLUSH_SIZE = 2**16
+# seconds to hold buffered text before writing it
+FLUSH_INTERVAL = 1
+CLOSED = "I/O operation on closed file"
+# put in the queue to tell the thread to finish
+CLOSE = object()
+
+class AsyncWriter(BaseThreadClass):
+    """
+    A file-like object that writes to a file from a background thread
+    """
+    def __init__(self, target, queue_size=QUEUE_SIZE, flush_size=FLUSH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, drop=False):
+        """
+        AsyncWriter constructor
+
+        :param:
+
+         - `target`: opened file-like object to write to
+         - `queue_size`: maximum number of un-written texts to hold
+         - `flush_size`: bytes to buffer before writing to the target
+         - `flush_interval`: seconds to hold buffered text before writing
+         - `drop`: if True, drop text when the queue is full instead of waiting
+        """
+        super(AsyncWriter, self).__init__()
+        self.target = target
+        self.queue_size = queue_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.drop = drop
+        self.closed = False
+        self.dropped = 0
+        self.waited = 0
+        self.writes = 0
+        # the exception that killed the writer thread
+        self.error = None
+        self._queue = None
+        return
+
+    @property
+    def queue(self):
+        """
+        The bounded queue of texts waiting for the writer thread
+        """
+        if self._queue is None:
+            self._queue = Queue.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    @property
+    def name(self):
+        """
+        The target's name
+        """
+        return getattr(self.target, 'name', None)
+
+    def start(self):
+        """
+        Starts the writer thread
+
+        :return: self
+        """
+        # create the queue before the thread so they can't each make one
+        self.queue
+        self.thread.name = self.__class__.__name__
+        self.thread.start()
+        return self
+
+    def put(self, item):
+        """
+        Puts the item in the queue (waiting or dropping it if the queue is full)
+
+        :param:
+
+         - `item`: text to write
+
+        :raise: ApeError if the writer thread died on an error, ValueError if closed
+        """
+        self.check_error()
+        if self.closed or not self.thread.is_alive():
+            raise ValueError(CLOSED)
+        try:
+            self.queue.put_nowait(item)
+        except Queue.Full:
+            if self.drop:
+                self.dropped += 1
+                return
+            self.waited += 1
+            while True:
+                try:
+                    self.queue.put(item, timeout=self.flush_interval)
+                    break
+                except Queue.Full:
+                    if not self.thread.is_alive():
+                        self.check_error()
+                        raise ValueError(CLOSED)
+        return
+
+    def write(self, text):
+        """
+        Queues the text to be written
+
+        :param:
+
+         - `text`: string to write to the file
+        """
+        self.put(text)
+        return
+
+    def writelines(self, texts):
+        """
+        Queues the texts to be written (as one entry in the queue)
+
+        :param:
+
+         - `texts`: collection of strings
+        """
+        self.put(''.join(texts))
+        return
+
+    def flush(self):
+        """
+        Waits until everything queued so far has been written and flushed
+
+        :raise: ApeError if the writer thread died on an error, ValueError if closed
+        """
+        self.check_error()
+        if self.closed or not self.thread.is_alive():
+            raise ValueError(CLOSED)
+        flushed = threading.Event()
+        self.queue.put(flushed)
+        while not flushed.is_set() and self.thread.is_alive():
+            flushed.wait(self.flush_interval)
+        self.check_error()
+        return
+
+    def close(self):
+        """
+        Writes whatever is queued, stops the thread and closes the target
+
+        :raise: ApeError if the writer thread died on an error (the target is still closed)
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.thread.is_alive():
+            self.queue.put(CLOSE)
+            self.thread.join()
+        self.target.close()
+        if self.dropped:
+            self.logger.warning("{0} dropped {1} writes (queue full)".format(self.name,
+                                                                            self.dropped))
+        self.check_error()
+        return
+
+    def check_error(self):
+        """
+        Re-raises the error that killed the writer thread (if there was one)
+
+        :raise: ApeError with the writer thread's error
+        """
+        if self.error is not None:
+            raise ApeError("{0} writer thread failed: {1}: {2}".format(self.name,
+                                                                      self.error.__class__.__name__,
+                                                                      self.error))
+        return
+
+    def run_thread(self):
+        """
+        Runs the writer thread, keeping the error that kills it for `check_error`
+        """
+        try:
+            self.run()
+        except Exception as error:
+            self.logger.debug(traceback.format_exc())
+            self.logger.error(error)
+            self.error = error
+        return
+
+    def run(self):
+        """
+        Gets texts from the queue and writes them to the target in batches
+        """
+        buffered = []
+        size = 0
+        deadline = None
+        while True:
+            try:
+                if deadline is None:
+                    item = self.queue.get()
+                else:
+                    item = self.queue.get(timeout=max(0, deadline - time.time()))
+            except Queue.Empty:
+                item = None
+
+            if isinstance(item, basestring):
+                if not buffered:
+                    deadline = time.time() + self.flush_interval
+                buffered.append(item)
+                size += len(item)
+                if size < self.flush_size:
+                    continue
+
+            if buffered:
+                self.target.write(''.join(buffered))
+                if hasattr(self.target, 'flush'):
+                    self.target.flush()
+                self.writes += 1
+                buffered = []
+                size = 0
+                deadline = None
+
+            if item is CLOSE:
+                break
+            if hasattr(item, 'set'):
+                # the event put in the queue by `flush`
+                item.set()
+        return
+# end class AsyncWriter
\ No newline at end of file
@@ -5,18 +5,67 @@ from abc import ABCMeta, abstractproperty, abstractmethod
 # this package
 from theape import BaseClass
 from theape import ApeError
+from theape.parts.storage.vectored import to_string
+
+NEWLINE = '\n'
+# bytes of buffered lines to hold before writing them
+HIGH_WATER_BYTES = 2**16
+# the types `writev` takes as a single buffer
+BYTES = (str, bytearray, buffer, memoryview)
 
 class BaseStorage(BaseClass):
     """A base-class based on file-objects"""
-    def __init__(self):
+    def __init__(self, high_water=None, high_water_bytes=HIGH_WATER_BYTES):
         """
         BaseStorage Constructor
+
+        :param:
+
+         - `high_water`: lines for `writeline` to buffer before writing (None to not buffer)
+         - `high_water_bytes`: bytes of lines to buffer before writing
         """
         __metaclass__ = ABCMeta
         super(BaseStorage, self).__init__()
         self._logger = None
         self.closed = True
         self._file = None
+        self.high_water = high_water
+        self.high_water_bytes = high_water_bytes
+        self.reset_buffer()
+        return
+
+    def reset_buffer(self):
+        """
+        Empties the line-buffer (without writing it)
+        """
+        self.buffered = []
+        self.line_limit = self.high_water
+        return
+
+    def write_buffer(self):
+        """
+        Writes the buffered lines to the file as one string
+        """
+        if self.buffered:
+            lines = self.buffered
+            self.buffered = []
+            # the empty string puts a newline after the last line too
+            lines.append('')
+            text = NEWLINE.join(lines)
+            # as many (average-sized) lines as fit in high_water_bytes
+            fit = self.high_water_bytes * (len(lines) - 1) // len(text)
+            self.line_limit = max(1, min(self.high_water, fit))
+            self.write(text)
+        return
+
+    def flush(self):
+        """
+        Writes the buffered lines and flushes the file
+        """
+        self.write_buffer()
+        flush = getattr(self.file, 'flush', None)
+        if flush is not None:
+            flush()
         return
 
     @abstractproperty
@@ -44,9 +93,10 @@ class BaseStorage(BaseClass):
 
     def close(self):
         """
-        Closes self.file if it exists, sets self.closed to True
+        Writes buffered lines, closes self.file if it exists, sets self.closed to True
         """
         if self.file is not None:
+            self.write_buffer()
             self.file.close()
             self.closed = True
         return
@@ -62,6 +112,8 @@ class BaseStorage(BaseClass):
 
         :raise: ApeError if one of the exceptions is raised
         """
+        if self.buffered:
+            self.write_buffer()
         try:
             self.file.write(text)
         except exceptions as error:
@@ -74,8 +126,18 @@ class BaseStorage(BaseClass):
     def writeline(self, text):
         """
         Adds newline to end of text and writes it to the file
+
+        If `high_water` is set the line is buffered until there are enough lines.
         """
-        self.write("{0}\n".format(text))
+        if self.high_water is None:
+            self.write("{0}\n".format(text))
+            return
+        if type(text) is not str:
+            text = "{0}".format(text)
+        buffered = self.buffered
+        buffered.append(text)
+        if len(buffered) >= self.line_limit:
+            self.write_buffer()
         return
 
     def writelines(self, texts, exceptions=(AttributeError, ValueError)):
@@ -87,6 +149,8 @@ class BaseStorage(BaseClass):
          - `texts`: collection of strings
          - `exceptions`: exceptions to catch if the file is closed
         """
+        if self.buffered:
+            self.write_buffer()
         try:
             self.file.writelines(texts)
         except exceptions as error:
@@ -94,4 +158,43 @@ class BaseStorage(BaseClass):
             error = "{red}{bold}`write` called of unopened file{reset}"
             raise ApeError(error)
         return        
+
+    def writev(self, buffers, exceptions=(AttributeError, ValueError)):
+        """
+        Writes the buffers to the file (without joining them)
+
+        :param:
+
+         - `buffers`: bytes (str, bytearray, buffer, memoryview) or a list of them
+         - `exceptions`: exceptions to catch if the file is closed
+
+        :return: number of bytes written
+        :raise: ApeError if one of the exceptions is raised
+        """
+        if isinstance(buffers, BYTES):
+            buffers = [buffers]
+        if self.buffered:
+            self.write_buffer()
+        total = 0
+        try:
+            for data in buffers:
+                data = to_string(data)
+                self.file.write(data)
+                total += len(data)
+        except exceptions as error:
+            self.logger.debug(error)
+            raise ApeError("`writev` called on unopened file")
+        return total
+
+    def write_bytes(self, data):
+        """
+        Writes bytes to the file
+
+        :param:
+
+         - `data`: str, bytearray, buffer or memoryview
+
+        :return: number of bytes written
+        """
+        return self.writev([data])
 # end BaseStorage
\ No newline at end of file
@@ -0,0 +1,154 @@
+
+# python standard library
+import datetime
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+
+# this package
+from theape import BaseClass
+from theape import ApeError
+
+COLUMNS = 'id path requested plugin section repetition start end size'.split()
+CONTEXT = ('plugin', 'section', 'repetition')
+CREATE_TABLE = """CREATE TABLE IF NOT EXISTS outputs
+(id INTEGER PRIMARY KEY,
+ path TEXT,
+ requested TEXT,
+ plugin TEXT,
+ section TEXT,
+ repetition INTEGER,
+ start TEXT,
+ end TEXT,
+ size INTEGER)"""
+CREATE_INDEX = "CREATE INDEX IF NOT EXISTS outputs_{0} ON outputs ({0})"
+INDEXED = ('path', 'plugin', 'repetition', 'start')
+INSERT = ("INSERT INTO outputs (path, requested, plugin, section, repetition, start) "
+          "VALUES (?, ?, ?, ?, ?, ?)")
+FINISH = "UPDATE outputs SET end = ?, size = ? WHERE id = ?"
+PATH = "SELECT path FROM outputs WHERE id = ?"
+SELECT = "SELECT {0} FROM outputs".format(', '.join(COLUMNS))
+
+Output = namedtuple('Output', COLUMNS)
+
+class OutputCatalog(BaseClass):
+    """
+    An sqlite index of the files written during a run
+    """
+    def __init__(self, filename, clock=datetime.datetime.now):
+        """
+        OutputCatalog constructor
+
+        :param:
+
+         - `filename`: path to the sqlite database (created if it doesn't exist)
+         - `clock`: callable that returns the current datetime
+        """
+        super(OutputCatalog, self).__init__()
+        self.filename = filename
+        self.clock = clock
+        self.context = dict.fromkeys(CONTEXT)
+        self.lock = threading.Lock()
+        self._connection = None
+        return
+
+    @property
+    def connection(self):
+        """
+        The sqlite connection (the table is created if needed)
+        """
+        if self._connection is None:
+            folder = os.path.dirname(self.filename)
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+            # the storages can be opened and closed from other threads
+            self._connection = sqlite3.connect(self.filename, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(CREATE_TABLE)
+                for column in INDEXED:
+                    self._connection.execute(CREATE_INDEX.format(column))
+        return self._connection
+
+    def set_context(self, **context):
+        """
+        Sets the plugin, section or repetition to record with the files opened next
+
+        :param:
+
+         - `context`: plugin, section and/or repetition values
+
+        :raise: ApeError for any other keyword
+        """
+        unknown = set(context) - set(CONTEXT)
+        if unknown:
+            raise ApeError("Unknown catalog context: {0}".format(', '.join(sorted(unknown))))
+        self.context.update(context)
+        return
+
+    def register(self, path, requested=None):
+        """
+        Adds a newly opened file to the catalog
+
+        :param:
+
+         - `path`: full path to the file
+         - `requested`: name the file was opened with
+
+        :return: id of the file's row (to pass to `finish`)
+        """
+        row = (path, requested, self.context['plugin'], self.context['section'],
+               self.context['repetition'], self.clock().isoformat())
+        with self.lock:
+            with self.connection:
+                return self.connection.execute(INSERT, row).lastrowid
+
+    def finish(self, identifier):
+        """
+        Records the end-time and size of a file
+
+        :param:
+
+         - `identifier`: id returned by `register`
+        """
+        with self.lock:
+            row = self.connection.execute(PATH, (identifier,)).fetchone()
+            if row is None:
+                return
+            size = os.path.getsize(row[0]) if os.path.exists(row[0]) else None
+            with self.connection:
+                self.connection.execute(FINISH, (self.clock().isoformat(), size, identifier))
+        return
+
+    def outputs(self, **where):
+        """
+        Gets the files matching all the column=value pairs given
+
+        :param:
+
+         - `where`: columns and values to match (e.g. repetition=3)
+
+        :return: list of Output (in the order they were opened)
+        :raise: ApeError for unknown columns
+        """
+        unknown = set(where) - set(COLUMNS)
+        if unknown:
+            raise ApeError("Unknown catalog column: {0}".format(', '.join(sorted(unknown))))
+        query = SELECT
+        columns = sorted(where)
+        if columns:
+            query += " WHERE " + " AND ".join("{0} = ?".format(column) for column in columns)
+        query += " ORDER BY id"
+        with self.lock:
+            rows = self.connection.execute(query, [where[column] for column in columns])
+            return [Output(*row) for row in rows]
+
+    def close(self):
+        """
+        Closes the database connection
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        return
+# end class OutputCatalog
\ No newline at end of file
@@ -0,0 +1,238 @@
+
+# python standard library
+import copy
+import os
+import struct
+
+# third party
+import numpy
+import numpy.lib.format
+
+# the ape
+from theape import BaseClass
+from theape import ApeError
+import theape.parts.storage.filestorage
+
+MAGIC = numpy.lib.format.MAGIC_PREFIX + '\x01\x00'
+# the preamble is the magic string and a little-endian unsigned short (header length)
+PREAMBLE_SIZE = len(MAGIC) + struct.calcsize('<H')
+HEADER_ALIGNMENT = 64
+HEADER = "{{'descr': {descr}, 'fortran_order': False, 'shape': ({rows},), }}"
+# the header is padded for this many digits in the row-count
+ROW_DIGITS = 20
+# rows to buffer before writing them to the file
+BUFFER_ROWS = 4096
+
+def npy_header(dtype, rows):
+    """
+    Creates a fixed-size .npy header (the size doesn't depend on `rows`)
+
+    :param:
+
+     - `dtype`: numpy dtype of the records
+     - `rows`: number of records in the file
+
+    :return: the magic string, header-length and padded header
+    """
+    descr = repr(numpy.lib.format.dtype_to_descr(dtype))
+    header = HEADER.format(descr=descr, rows=rows)
+    longest = len(HEADER.format(descr=descr, rows='9' * ROW_DIGITS))
+    # the header ends with a newline and the data starts on an aligned offset
+    size = PREAMBLE_SIZE + longest + 1
+    size += -size % HEADER_ALIGNMENT
+    header = header.ljust(size - PREAMBLE_SIZE - 1) + '\n'
+    return MAGIC + struct.pack('<H', len(header)) + header
+
+def read_columns(name):
+    """
+    Memory-maps a column-storage (.npy) file
+
+    The number of rows comes from the file's size (so files that weren't closed can be read)
+
+    :param:
+
+     - `name`: path to the file
+
+    :return: read-only numpy.memmap of records (or empty array if there are no rows)
+    :raise: ApeError if the file isn't a version 1.0 .npy file
+    """
+    with open(name, 'rb') as reader:
+        try:
+            version = numpy.lib.format.read_magic(reader)
+            if version != (1, 0):
+                raise ValueError("unsupported .npy version {0}".format(version))
+            shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(reader)
+        except ValueError as error:
+            raise ApeError("Can't read '{0}' as column storage: {1}".format(name, error))
+        offset = reader.tell()
+    rows = (os.path.getsize(name) - offset) // dtype.itemsize
+    if rows == 0:
+        return numpy.zeros(0, dtype=dtype)
+    return numpy.memmap(name, dtype=dtype, mode='r', offset=offset, shape=(rows,))
+
+class ColumnStorage(BaseClass):
+    """
+    A storage that writes fixed-type records to a .npy file
+    """
+    def __init__(self, columns, path=None, storage=None, buffer_rows=BUFFER_ROWS):
+        """
+        ColumnStorage constructor
+
+        :param:
+
+         - `columns`: list of (name, numpy type) pairs (or a numpy record dtype)
+         - `path`: path to folder to store output-file in
+         - `storage`: FileStorage to use instead of creating one from 'path'
+         - `buffer_rows`: number of rows to hold in memory before writing them
+        :raises: ApeError if neither `path` nor `storage` given or columns are invalid
+        """
+        super(ColumnStorage, self).__init__()
+        if not any((path, storage)):
+            raise ApeError("Path or storage needed.")
+        try:
+            self.dtype = numpy.dtype(columns)
+        except TypeError as error:
+            raise ApeError("Invalid columns {0}: {1}".format(columns, error))
+        if self.dtype.names is None:
+            raise ApeError("Columns need names: {0}".format(columns))
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self._storage = storage
+        self.file = None
+        self.name = None
+        self.buffer = None
+        self.buffered = 0
+        self.rows = 0
+        return
+
+    @property
+    def headers(self):
+        """
+        The column names (in order)
+        """
+        return self.dtype.names
+
+    @property
+    def storage(self):
+        """
+        A file-storage created from the path (unless passed into constructor)
+
+        :return: FileStorage
+        """
+        if self._storage is None:
+            self._storage = theape.parts.storage.filestorage.FileStorage(path=self.path)
+        return self._storage
+
+    @property
+    def closed(self):
+        """
+        True if there's no open file
+        """
+        return self.file is None or self.file.closed
+
+    def open(self, filename):
+        """
+        Opens the file (the name is made safe by the FileStorage)
+
+        :param:
+
+         - `filename`: the name of the file to open
+
+        :postcondition: header written to file
+        :return: copy of self with the file open
+        """
+        opened = copy.copy(self)
+        # the records are written raw (so they can be memory-mapped) even if the
+        # FileStorage compresses its other files
+        opened.name = self.storage.safe_name(filename, compressed=False)
+        opened.file = open(opened.name, 'wb')
+        opened.buffer = numpy.zeros(self.buffer_rows, dtype=self.dtype)
+        opened.buffered = 0
+        opened.rows = 0
+        opened.file.write(npy_header(self.dtype, 0))
+        return opened
+
+    def writerow(self, row):
+        """
+        Adds the row to the buffer (writing the buffer to the file if it's full)
+
+        :param:
+
+         - `row`: dict of column:value or sequence of values in column-order
+
+        :raise: ApeError if the file isn't open or the row doesn't fit the columns
+        """
+        if self.closed:
+            raise ApeError("`writerow` called on unopened ColumnStorage")
+        if isinstance(row, dict):
+            try:
+                row = tuple(row[column] for column in self.dtype.names)
+            except KeyError as error:
+                raise ApeError("rowdict missing column {0}".format(error))
+        try:
+            self.buffer[self.buffered] = tuple(row)
+        except (ValueError, TypeError) as error:
+            raise ApeError("row {0} doesn't fit the columns {1}: {2}".format(row,
+                                                                           self.dtype.names,
+                                                                           error))
+        self.buffered += 1
+        if self.buffered == self.buffer_rows:
+            self.write_buffer()
+        return
+
+    def writerows(self, rows):
+        """
+        Writes the rows
+
+        :param:
+
+         - `rows`: numpy array (with the columns as fields) or iterable of rows
+        """
+        if isinstance(rows, numpy.ndarray) and rows.dtype.names is not None:
+            if self.closed:
+                raise ApeError("`writerows` called on unopened ColumnStorage")
+            self.write_buffer()
+            try:
+                records = numpy.asarray(rows[list(self.dtype.names)], dtype=self.dtype)
+            except (ValueError, KeyError) as error:
+                raise ApeError("rows don't have the columns {0}: {1}".format(self.dtype.names,
+                                                                             error))
+            self.file.write(records.tobytes())
+            self.rows += len(records)
+            return
+        for row in rows:
+            self.writerow(row)
+        return
+
+    def write_buffer(self):
+        """
+        Writes the buffered rows to the file
+        """
+        if self.buffered:
+            self.file.write(self.buffer[:self.buffered].tobytes())
+            self.rows += self.buffered
+            self.buffered = 0
+        return
+
+    def flush(self):
+        """
+        Writes the buffered rows, updates the header's row-count and flushes the file
+        """
+        if self.closed:
+            return
+        self.write_buffer()
+        self.file.seek(0)
+        self.file.write(npy_header(self.dtype, self.rows))
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+        return
+
+    def close(self):
+        """
+        Flushes and closes the file
+        """
+        if not self.closed:
+            self.flush()
+            self.file.close()
+        return
+# end class ColumnStorage
\ No newline at end of file
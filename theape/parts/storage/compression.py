@@ -0,0 +1,334 @@
+
+# python standard library
+import bz2
+import os
+import zlib
+
+# this package
+from theape import BaseClass
+from theape import ApeError
+
+GZIP = 'gzip'
+BZ2 = 'bz2'
+EXTENSIONS = {GZIP: '.gz',
+              BZ2: '.bz2'}
+COMPRESSIONS = dict((extension, compression)
+                    for compression, extension in EXTENSIONS.iteritems())
+# uncompressed bytes between flush-points
+FLUSH_SIZE = 2**20
+CHUNK_SIZE = 2**16
+LEVEL = 6
+# zlib adds the gzip header and trailer if 16 is added to the window bits
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+NEWLINE = '\n'
+
+def compressor(compression, level=LEVEL):
+    """
+    Creates a compressor for a new stream
+
+    :param:
+
+     - `compression`: one of the EXTENSIONS keys (e.g. 'gzip')
+     - `level`: compression level (1-9)
+
+    :return: object with compress and flush methods
+    """
+    if compression == GZIP:
+        return zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return bz2.BZ2Compressor(level)
+
+def decompressor(compression):
+    """
+    Creates a decompressor for a new stream
+
+    :param:
+
+     - `compression`: one of the EXTENSIONS keys (e.g. 'gzip')
+
+    :return: object with decompress method and unused_data attribute
+    """
+    if compression == GZIP:
+        return zlib.decompressobj(GZIP_WBITS)
+    return bz2.BZ2Decompressor()
+
+def compression_extension(compression):
+    """
+    Gets the file-extension for the compression
+
+    :param:
+
+     - `compression`: name of the compression (e.g. 'gzip')
+
+    :return: extension (e.g. '.gz')
+    :raise: ApeError if the compression isn't known
+    """
+    try:
+        return EXTENSIONS[compression]
+    except KeyError:
+        raise ApeError("Unknown compression '{0}' (use one of {1})".format(compression,
+                                                                         sorted(EXTENSIONS)))
+
+def split_extension(name):
+    """
+    Like os.path.splitext but keeps compressed extensions (e.g. 'data.csv.gz') together
+
+    :param:
+
+     - `name`: file-name
+
+    :return: (base, extension) -- e.g. ('data', '.csv.gz')
+    """
+    base, extension = os.path.splitext(name)
+    if extension in COMPRESSIONS:
+        base, inner = os.path.splitext(base)
+        extension = inner + extension
+    return base, extension
+
+def open_file(name, mode='r'):
+    """
+    Opens the file for reading, decompressing it if it has a compressed extension
+
+    :param:
+
+     - `name`: path to the file
+     - `mode`: mode for uncompressed files
+
+    :return: opened file or CompressedReader
+    """
+    extension = os.path.splitext(name)[1]
+    if extension in COMPRESSIONS:
+        return CompressedReader(open(name, 'rb'), COMPRESSIONS[extension])
+    return open(name, mode)
+
+class CompressedFile(BaseClass):
+    """
+    A file-like object that compresses what's written to it
+    """
+    def __init__(self, target, compression=GZIP, flush_size=FLUSH_SIZE, level=LEVEL):
+        """
+        CompressedFile constructor
+
+        :param:
+
+         - `target`: file opened for (binary) writing
+         - `compression`: 'gzip' or 'bz2'
+         - `flush_size`: uncompressed bytes to write before ending the stream
+         - `level`: compression level (1-9)
+        """
+        super(CompressedFile, self).__init__()
+        compression_extension(compression)
+        self.target = target
+        self.compression = compression
+        self.flush_size = flush_size
+        self.level = level
+        self.size = 0
+        self._compressor = None
+        return
+
+    @property
+    def name(self):
+        """
+        The target's name
+        """
+        return getattr(self.target, 'name', None)
+
+    @property
+    def closed(self):
+        """
+        True if the target is closed
+        """
+        return self.target.closed
+
+    @property
+    def compressor(self):
+        """
+        The compressor for the current stream
+        """
+        if self._compressor is None:
+            self._compressor = compressor(self.compression, self.level)
+        return self._compressor
+
+    def write(self, text):
+        """
+        Compresses the text and writes it to the target
+
+        :param:
+
+         - `text`: string to write
+        """
+        if self.target.closed:
+            raise ValueError("I/O operation on closed file")
+        compressed = self.compressor.compress(text)
+        if compressed:
+            self.target.write(compressed)
+        self.size += len(text)
+        if self.size >= self.flush_size:
+            self.flush()
+        return
+
+    def writelines(self, texts):
+        """
+        Compresses the texts and writes them to the target
+
+        :param:
+
+         - `texts`: collection of strings
+        """
+        self.write(''.join(texts))
+        return
+
+    def flush(self):
+        """
+        Ends the current stream (so the file is readable up to here) and flushes the target
+        """
+        if self._compressor is not None:
+            self.target.write(self._compressor.flush())
+            self._compressor = None
+            self.size = 0
+        self.target.flush()
+        return
+
+    def close(self):
+        """
+        Ends the current stream and closes the target
+        """
+        if not self.target.closed:
+            self.flush()
+            self.target.close()
+        return
+# end class CompressedFile
+
+class CompressedReader(BaseClass):
+    """
+    A read-only file-like object for (possibly multi-stream) compressed files
+    """
+    def __init__(self, source, compression=GZIP, chunk_size=CHUNK_SIZE):
+        """
+        CompressedReader constructor
+
+        :param:
+
+         - `source`: file opened for (binary) reading
+         - `compression`: 'gzip' or 'bz2'
+         - `chunk_size`: compressed bytes to read at a time
+        """
+        super(CompressedReader, self).__init__()
+        compression_extension(compression)
+        self.source = source
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self.decompressor = decompressor(compression)
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+        return
+
+    @property
+    def name(self):
+        """
+        The source's name
+        """
+        return getattr(self.source, 'name', None)
+
+    def decompress(self, data):
+        """
+        Decompresses the data, starting new streams as needed
+
+        :param:
+
+         - `data`: compressed bytes
+
+        :return: decompressed text
+        """
+        output = []
+        while data:
+            try:
+                output.append(self.decompressor.decompress(data))
+            except EOFError:
+                # bz2 raises this if the last stream ended exactly at the end of `data`
+                self.decompressor = decompressor(self.compression)
+                continue
+            data = self.decompressor.unused_data
+            if data:
+                self.decompressor = decompressor(self.compression)
+        return ''.join(output)
+
+    def fill(self):
+        """
+        Reads and decompresses the next chunk onto the end of the buffer
+
+        :return: False if the source is exhausted
+        """
+        while not self.exhausted:
+            data = self.source.read(self.chunk_size)
+            if not data:
+                self.exhausted = True
+                return False
+            text = self.decompress(data)
+            if text:
+                self.buffer = self.buffer[self.position:] + text
+                self.position = 0
+                return True
+        return False
+
+    def read(self, size=-1):
+        """
+        Reads the decompressed text
+
+        :param:
+
+         - `size`: maximum bytes to read (everything if negative)
+        """
+        if size < 0:
+            chunks = [self.buffer[self.position:]]
+            while not self.exhausted:
+                data = self.source.read(self.chunk_size)
+                if not data:
+                    self.exhausted = True
+                    break
+                chunks.append(self.decompress(data))
+            self.buffer = ''
+            self.position = 0
+            return ''.join(chunks)
+        while len(self.buffer) - self.position < size and self.fill():
+            pass
+        text = self.buffer[self.position:self.position + size]
+        self.position += len(text)
+        return text
+
+    def readline(self):
+        """
+        Reads the next line (with its newline)
+        """
+        index = self.buffer.find(NEWLINE, self.position)
+        while index < 0:
+            start = len(self.buffer) - self.position
+            if not self.fill():
+                break
+            index = self.buffer.find(NEWLINE, start)
+        end = len(self.buffer) if index < 0 else index + 1
+        line = self.buffer[self.position:end]
+        self.position = end
+        return line
+
+    def __iter__(self):
+        line = self.readline()
+        while line:
+            yield line
+            line = self.readline()
+        return
+
+    def close(self):
+        """
+        Closes the source
+        """
+        self.source.close()
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+        return
+# end class CompressedReader
\ No newline at end of file
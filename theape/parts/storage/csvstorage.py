@@ -2,6 +2,9 @@
 # python standard library
 import copy
 import csv
+import itertools
+import operator
+from cStringIO import StringIO
 from types import DictType
 
 # the ape
@@ -9,6 +12,9 @@ from theape import BaseClass
 from theape import ApeError
 import theape.parts.storage.filestorage
 
+# rows per batch for `writerows`
+BATCH_ROWS = 4096
+
 class CsvDictStorage(BaseClass):
     """
     A storage that writes to csv files
@@ -30,6 +36,8 @@ class CsvDictStorage(BaseClass):
         self.headers = headers
         self._storage = storage
         self._writer = None
+        self._output = None
+        self._getter = None
 
         if not any((self.path, self._storage)):
             raise ApeError("Path or storage needed.")
@@ -71,6 +79,7 @@ class CsvDictStorage(BaseClass):
                 raise ApeError("FileStorage not open")
             self._writer = csv.DictWriter(self.storage,
                                           self.headers)
+            self._output = self.storage
             # assume this is a new file
             self._writer.writeheader()
         return self._writer
@@ -92,6 +101,7 @@ class CsvDictStorage(BaseClass):
         # DictWriter doesn't like keyword arguments
         new_writer._writer = csv.DictWriter(open_file,
                                            self.headers)
+        new_writer._output = open_file
         new_writer.writer.writeheader()
         return new_writer
 
@@ -121,20 +131,71 @@ class CsvDictStorage(BaseClass):
             raise ApeError("rowdict keys and values invalid")
         return
     
+    @property
+    def getter(self):
+        """
+        Callable that returns a tuple of a rowdict's values in header-order
+        """
+        if self._getter is None:
+            if len(self.headers) == 1:
+                header = self.headers[0]
+                self._getter = lambda rowdict: (rowdict[header],)
+            else:
+                self._getter = operator.itemgetter(*self.headers)
+        return self._getter
+
     def writerows(self, rowdicts):
         """
         Writes each dictionary in rowdicts to the csv
 
+        The rows are written a batch at a time, falling back to `writerow`
+        for any batch with a row that doesn't match the headers.
+
         :param:
 
          - `rowdicts`: iterable collection of dictionaries
 
         :raise: ApeError (see writerow)
         """
-        for rowdict in rowdicts:
-            self.writerow(rowdict)
+        rowdicts = iter(rowdicts)
+        batch = list(itertools.islice(rowdicts, BATCH_ROWS))
+        while batch:
+            if not self.write_batch(batch):
+                for rowdict in batch:
+                    self.writerow(rowdict)
+            batch = list(itertools.islice(rowdicts, BATCH_ROWS))
         return
 
+    def write_batch(self, rowdicts):
+        """
+        Writes the rows as one block if all their keys match the headers
+
+        :param:
+
+         - `rowdicts`: list of dictionaries
+
+        :return: True if written, False if a row didn't match (nothing written)
+        """
+        width = len(self.headers)
+        getter = self.getter
+        try:
+            rows = [getter(rowdict) for rowdict in rowdicts
+                    if len(rowdict) <= width]
+        except (KeyError, TypeError):
+            return False
+        if len(rows) != len(rowdicts):
+            # at least one rowdict has keys that aren't headers
+            return False
+        # creates the DictWriter (and writes the header) if needed
+        self.writer
+        buffer = StringIO()
+        try:
+            csv.writer(buffer).writerows(rows)
+        except (csv.Error, UnicodeError):
+            return False
+        self._output.write(buffer.getvalue())
+        return True
+
 if __name__ == "__main__":
     #import pudb; pudb.set_trace()
     #from mock import mock_open, patch
@@ -0,0 +1,524 @@
+
+# python standard library
+import csv
+import json
+import os
+from collections import namedtuple
+
+# third party
+import numpy
+
+# the ape
+from theape import BaseClass
+from theape import ApeError
+from theape import FILE_TIMESTAMP
+from theape.infrastructure.timemap import parse_timestamps
+from theape.parts.storage.columnstorage import read_columns
+from theape.parts.storage.compression import open_file, split_extension
+
+CHUNK_ROWS = 2**16
+TIMESTAMP = 'timestamp'
+METADATA = '_metadata.json'
+CHUNK_NAME = 'chunk_{0:05d}'
+COLUMN_FILE = '{0}.{1}.npy'
+PARTITION_KEYS = ('run', 'device', 'date')
+PARTITION_FOLDER = '{0}={1}'
+ONE_DAY = numpy.timedelta64(1, 'D')
+CSV_EXTENSIONS = ('.csv',)
+NPY_EXTENSION = '.npy'
+
+Partition = namedtuple('Partition', 'run device date path')
+Chunk = namedtuple('Chunk', 'partition path name rows minimum maximum')
+
+def partition_value(value):
+    """
+    Makes a value safe to use in a partition's folder-name
+
+    :param:
+
+     - `value`: run, device or date
+
+    :return: string without path-separators or '='
+    """
+    value = str(value)
+    for character in (os.sep, '='):
+        value = value.replace(character, '_')
+    return value
+
+def infer_column(values):
+    """
+    Converts a column of strings to the narrowest of int64, float64 or string
+
+    :param:
+
+     - `values`: sequence of strings
+
+    :return: numpy array
+    """
+    strings = numpy.array(values, dtype=str)
+    for dtype in (numpy.int64, numpy.float64):
+        try:
+            return strings.astype(dtype)
+        except ValueError:
+            pass
+    return strings
+
+def promote(first, second):
+    """
+    Gets a column type that can hold the values of both types
+
+    :param:
+
+     - `first`: numpy dtype
+     - `second`: numpy dtype
+
+    :return: numpy dtype (e.g. the wider of two strings or float for int and float)
+    :raise: ApeError if the types can't be combined (e.g. datetimes and numbers)
+    """
+    try:
+        return numpy.promote_types(first, second)
+    except TypeError as error:
+        raise ApeError("Can't combine column types {0} and {1}: {2}".format(first, second,
+                                                                           error))
+
+def read_csv(name, separator=',', timestamp=TIMESTAMP, timestamp_format=FILE_TIMESTAMP):
+    """
+    Reads a CSV file (with a header) into a typed numpy array
+
+    :param:
+
+     - `name`: path to the file (can be compressed)
+     - `separator`: column-separator
+     - `timestamp`: name of the timestamp column
+     - `timestamp_format`: strftime format of the timestamps
+
+    :return: numpy structured array
+    :raise: ApeError if the file is empty or doesn't have the timestamp column
+    """
+    with open_file(name) as reader:
+        rows = [row for row in csv.reader(reader, delimiter=separator) if row]
+    if not rows:
+        raise ApeError("'{0}' is empty".format(name))
+    header, rows = [column.strip() for column in rows[0]], rows[1:]
+    if timestamp not in header:
+        raise ApeError("'{0}' doesn't have a '{1}' column".format(name, timestamp))
+    columns = zip(*rows) if rows else [()] * len(header)
+    if len(columns) != len(header):
+        raise ApeError("'{0}' has rows that don't match its header".format(name))
+    arrays = []
+    for column, values in zip(header, columns):
+        if column == timestamp:
+            arrays.append(parse_timestamps([value.strip() for value in values],
+                                           timestamp_format))
+        else:
+            arrays.append(infer_column(values))
+    return numpy.rec.fromarrays(arrays, names=header).view(numpy.ndarray)
+
+def encode(value):
+    """
+    Converts a numpy value to something JSON can store
+
+    :param:
+
+     - `value`: numpy scalar
+
+    :return: bool, int, float, string (dates are ISO-8601) or None (for NaN)
+    """
+    if isinstance(value, numpy.datetime64):
+        return str(value)
+    if isinstance(value, numpy.bool_):
+        return bool(value)
+    if isinstance(value, numpy.integer):
+        return int(value)
+    if isinstance(value, numpy.floating):
+        return None if numpy.isnan(value) else float(value)
+    return str(value)
+
+def decode(value, dtype):
+    """
+    Converts a value from the metadata back to the column's type
+
+    :param:
+
+     - `value`: value from the JSON
+     - `dtype`: numpy dtype of the column
+
+    :return: numpy scalar (or None)
+    """
+    if value is None:
+        return None
+    if dtype.kind == 'M':
+        return numpy.datetime64(value)
+    return dtype.type(value)
+
+class DatasetExporter(BaseClass):
+    """
+    Converts outputs into a partitioned, columnar dataset
+    """
+    def __init__(self, root, chunk_rows=CHUNK_ROWS, timestamp=TIMESTAMP):
+        """
+        DatasetExporter constructor
+
+        :param:
+
+         - `root`: folder for the dataset (created if needed)
+         - `chunk_rows`: most rows to put in a chunk
+         - `timestamp`: name of the timestamp column
+        """
+        super(DatasetExporter, self).__init__()
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.timestamp = timestamp
+        return
+
+    def folder(self, run, device, date, source):
+        """
+        Creates (if needed) the folder for a source in a partition
+
+        :return: path to the folder
+        """
+        values = (run, device, date)
+        folder = os.path.join(self.root, *[PARTITION_FOLDER.format(key, partition_value(value))
+                                           for key, value in zip(PARTITION_KEYS, values)])
+        folder = os.path.join(folder, partition_value(source))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        return folder
+
+    def load_metadata(self, folder, table):
+        """
+        Gets the folder's metadata (or new metadata for the table)
+
+        If the table's column types differ from the existing ones the metadata's
+        types are promoted to hold both.
+
+        :raise: ApeError if the table's column names don't match the existing ones
+        """
+        columns = [{'name': name, 'dtype': table.dtype[name].str} for name in table.dtype.names]
+        name = os.path.join(folder, METADATA)
+        if not os.path.isfile(name):
+            return {'columns': columns, 'timestamp': self.timestamp, 'chunks': []}
+        with open(name) as reader:
+            metadata = json.load(reader)
+        if [column['name'] for column in metadata['columns']] != list(table.dtype.names):
+            raise ApeError("Columns for '{0}' don't match the dataset's".format(folder))
+        for column in metadata['columns']:
+            column['dtype'] = promote(numpy.dtype(str(column['dtype'])),
+                                      table.dtype[str(column['name'])]).str
+        return metadata
+
+    def save_metadata(self, folder, metadata):
+        """
+        Replaces the folder's metadata (renamed into place so readers never see half of it)
+        """
+        name = os.path.join(folder, METADATA)
+        temporary = name + '.tmp'
+        with open(temporary, 'w') as writer:
+            json.dump(metadata, writer, indent=1, sort_keys=True)
+        os.rename(temporary, name)
+        return
+
+    def write_chunk(self, folder, name, rows):
+        """
+        Saves each column of the rows and gets their statistics
+
+        :return: dict of the chunk's metadata
+        """
+        minimum, maximum = {}, {}
+        for index, column in enumerate(rows.dtype.names):
+            values = numpy.ascontiguousarray(rows[column])
+            numpy.save(os.path.join(folder, COLUMN_FILE.format(name, index)), values)
+            if values.dtype.kind == 'f' and numpy.isnan(values).all():
+                minimum[column] = maximum[column] = None
+            elif values.dtype.kind == 'f':
+                minimum[column] = encode(numpy.nanmin(values))
+                maximum[column] = encode(numpy.nanmax(values))
+            elif values.dtype.kind in 'SU':
+                # numpy can't reduce strings with min and max
+                ordered = numpy.sort(values)
+                minimum[column], maximum[column] = encode(ordered[0]), encode(ordered[-1])
+            else:
+                minimum[column] = encode(values.min())
+                maximum[column] = encode(values.max())
+        return {'name': name, 'rows': len(rows), 'min': minimum, 'max': maximum}
+
+    def export(self, table, source, run, device):
+        """
+        Adds the table's rows to the dataset
+
+        :param:
+
+         - `table`: numpy structured array with a datetime64 timestamp column
+         - `source`: name for the table (e.g. the file it came from)
+         - `run`: identifier of the run
+         - `device`: name of the device
+
+        :return: list of folders written to
+        :raise: ApeError if the table doesn't have a datetime64 timestamp column
+        """
+        if table.dtype.names is None or self.timestamp not in table.dtype.names:
+            raise ApeError("Table doesn't have a '{0}' column".format(self.timestamp))
+        times = table[self.timestamp]
+        if times.dtype.kind != 'M':
+            raise ApeError("'{0}' column isn't datetime64".format(self.timestamp))
+        if not len(table):
+            # e.g. a CSV file with only a header -- there's no date to partition it by
+            self.logger.debug("{0} has no rows to export".format(source))
+            return []
+        if len(times) > 1 and not (times[1:] >= times[:-1]).all():
+            order = numpy.argsort(times, kind='mergesort')
+            table, times = table[order], times[order]
+        dates = times.astype('datetime64[D]')
+        # the rows are sorted so each date is a contiguous slice
+        boundaries = numpy.flatnonzero(dates[1:] != dates[:-1]) + 1
+        starts = numpy.concatenate(([0], boundaries))
+        stops = numpy.concatenate((boundaries, [len(table)]))
+        folders = []
+        for start, stop in zip(starts, stops):
+            folder = self.folder(run, device, dates[start], source)
+            metadata = self.load_metadata(folder, table)
+            dtype = numpy.dtype([(str(column['name']), str(column['dtype']))
+                                 for column in metadata['columns']])
+            rows = table[start:stop]
+            if rows.dtype != dtype:
+                rows = rows.astype(dtype)
+            for offset in range(0, len(rows), self.chunk_rows):
+                name = CHUNK_NAME.format(len(metadata['chunks']))
+                metadata['chunks'].append(self.write_chunk(folder, name,
+                                                           rows[offset:offset + self.chunk_rows]))
+            self.save_metadata(folder, metadata)
+            folders.append(folder)
+        self.logger.debug("Exported {0} rows of {1} to {2} partitions".format(len(table), source,
+                                                                             len(folders)))
+        return folders
+
+    def export_csv(self, name, run, device, source=None, **kwargs):
+        """
+        Adds a CSV file (e.g. a watcher's output) to the dataset
+
+        :param:
+
+         - `name`: path to the file
+         - `run`: identifier of the run
+         - `device`: name of the device
+         - `source`: name for the data (default is the file's base-name)
+         - `kwargs`: separator and timestamp_format for `read_csv`
+
+        :return: list of folders written to
+        """
+        if source is None:
+            source = split_extension(os.path.basename(name))[0]
+        table = read_csv(name, timestamp=self.timestamp, **kwargs)
+        return self.export(table, source, run, device)
+
+    def export_columns(self, name, run, device, source=None):
+        """
+        Adds a column-storage (.npy) file to the dataset
+
+        :param:
+
+         - `name`: path to the file
+         - `run`: identifier of the run
+         - `device`: name of the device
+         - `source`: name for the data (default is the file's base-name)
+
+        :return: list of folders written to
+        """
+        if source is None:
+            source = os.path.splitext(os.path.basename(name))[0]
+        return self.export(read_columns(name), source, run, device)
+
+    def export_folder(self, path, run, device):
+        """
+        Adds all the CSV and column-storage files in a run's folder to the dataset
+
+        Files that can't be exported (e.g. no timestamp column) are logged and skipped.
+
+        :param:
+
+         - `path`: the run's folder
+         - `run`: identifier of the run
+         - `device`: name of the device
+
+        :return: list of files exported
+        """
+        exported = []
+        for name in sorted(os.listdir(path)):
+            full_name = os.path.join(path, name)
+            extension = split_extension(name)[1]
+            try:
+                if extension.startswith(CSV_EXTENSIONS):
+                    self.export_csv(full_name, run, device)
+                elif extension == NPY_EXTENSION:
+                    self.export_columns(full_name, run, device)
+                else:
+                    continue
+            except (ApeError, ValueError) as error:
+                self.logger.warning("Not exporting {0}: {1}".format(full_name, error))
+                continue
+            exported.append(full_name)
+        return exported
+# end class DatasetExporter
+
+class DatasetReader(BaseClass):
+    """
+    Reads the parts of a partitioned dataset that match a filter
+    """
+    def __init__(self, root):
+        """
+        DatasetReader constructor
+
+        :param:
+
+         - `root`: folder of the dataset
+        """
+        super(DatasetReader, self).__init__()
+        self.root = root
+        return
+
+    def values(self, path, key):
+        """
+        Generates the partition-values in a folder
+
+        :yield: (value, path)
+        """
+        prefix = PARTITION_FOLDER.format(key, '')
+        if not os.path.isdir(path):
+            return
+        for name in sorted(os.listdir(path)):
+            if name.startswith(prefix):
+                yield name[len(prefix):], os.path.join(path, name)
+        return
+
+    def partitions(self, run=None, device=None, start=None, end=None):
+        """
+        Generates the partitions that match (using only the folder-names)
+
+        :param:
+
+         - `run`: only this run (None for all)
+         - `device`: only this device (None for all)
+         - `start`: skip dates before this datetime
+         - `end`: skip dates from this datetime on
+
+        :yield: Partition
+        """
+        start = None if start is None else numpy.datetime64(start)
+        end = None if end is None else numpy.datetime64(end)
+        for run_value, run_path in self.values(self.root, 'run'):
+            if run is not None and run_value != partition_value(run):
+                continue
+            for device_value, device_path in self.values(run_path, 'device'):
+                if device is not None and device_value != partition_value(device):
+                    continue
+                for date_value, date_path in self.values(device_path, 'date'):
+                    date = numpy.datetime64(date_value, 'D')
+                    if start is not None and date + ONE_DAY <= start:
+                        continue
+                    if end is not None and date >= end:
+                        continue
+                    yield Partition(run_value, device_value, date_value, date_path)
+        return
+
+    def metadata(self, partition, source):
+        """
+        Loads a source's metadata from a partition
+
+        :return: dict (or None if the source isn't in the partition)
+        """
+        name = os.path.join(partition.path, partition_value(source), METADATA)
+        if not os.path.isfile(name):
+            return None
+        with open(name) as reader:
+            metadata = json.load(reader)
+        for column in metadata['columns']:
+            column['dtype'] = numpy.dtype(str(column['dtype']))
+        return metadata
+
+    def chunks(self, source, run=None, device=None, start=None, end=None):
+        """
+        Generates the chunks that might have rows in the time-range
+
+        :param:
+
+         - `source`: name the data was exported as
+         - `run`, `device`, `start`, `end`: filters (see `partitions`)
+
+        :yield: (metadata, Chunk)
+        """
+        start = None if start is None else numpy.datetime64(start)
+        end = None if end is None else numpy.datetime64(end)
+        for partition in self.partitions(run=run, device=device, start=start, end=end):
+            metadata = self.metadata(partition, source)
+            if metadata is None:
+                continue
+            dtypes = dict((column['name'], column['dtype']) for column in metadata['columns'])
+            timestamp = metadata['timestamp']
+            for chunk in metadata['chunks']:
+                minimum = dict((name, decode(value, dtypes[name]))
+                               for name, value in chunk['min'].iteritems())
+                maximum = dict((name, decode(value, dtypes[name]))
+                               for name, value in chunk['max'].iteritems())
+                if start is not None and maximum[timestamp] < start:
+                    continue
+                if end is not None and minimum[timestamp] >= end:
+                    continue
+                yield metadata, Chunk(partition,
+                                      os.path.join(partition.path, partition_value(source)),
+                                      chunk['name'], chunk['rows'], minimum, maximum)
+        return
+
+    def read(self, source, columns=None, run=None, device=None, start=None, end=None):
+        """
+        Loads the rows that match the filters
+
+        :param:
+
+         - `source`: name the data was exported as
+         - `columns`: names of the columns to load (None for all)
+         - `run`, `device`, `start`, `end`: filters (see `partitions`)
+
+        :return: numpy structured array (None if no rows match)
+        :raise: ApeError if a column isn't in the data (or its types can't be combined)
+        """
+        start = None if start is None else numpy.datetime64(start)
+        end = None if end is None else numpy.datetime64(end)
+        pieces = []
+        for metadata, chunk in self.chunks(source, run=run, device=device, start=start,
+                                           end=end):
+            # the JSON names are unicode but numpy wants strings for field-names
+            indices = dict((str(column['name']), index)
+                           for index, column in enumerate(metadata['columns']))
+            if columns is None:
+                names = [str(column['name']) for column in metadata['columns']]
+            else:
+                names = list(columns)
+            missing = [name for name in names if name not in indices]
+            if missing:
+                raise ApeError("'{0}' doesn't have columns: {1}".format(source,
+                                                                       ', '.join(missing)))
+
+            def load(name):
+                return numpy.load(os.path.join(chunk.path,
+                                               COLUMN_FILE.format(chunk.name, indices[name])),
+                                  mmap_mode='r')
+
+            times = load(metadata['timestamp'])
+            keep = numpy.ones(len(times), dtype=bool)
+            if start is not None:
+                keep &= times >= start
+            if end is not None:
+                keep &= times < end
+            pieces.append(numpy.rec.fromarrays([load(name)[keep] for name in names],
+                                               names=names).view(numpy.ndarray))
+        if not pieces:
+            return None
+        # the chunks' types can differ if they came from different exports
+        names = pieces[0].dtype.names
+        if any(piece.dtype.names != names for piece in pieces):
+            raise ApeError("'{0}' doesn't have the same columns in every partition".format(source))
+        dtype = numpy.dtype([(name, reduce(promote, [piece.dtype[name] for piece in pieces]))
+                             for name in names])
+        return numpy.concatenate([piece if piece.dtype == dtype else piece.astype(dtype)
+                                  for piece in pieces])
+# end class DatasetReader
\ No newline at end of file
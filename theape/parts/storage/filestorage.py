@@ -1,16 +1,28 @@
 
 # python standard library
 import os
+import errno
 import shutil
 import datetime
 import re
 import copy
+import functools
+import threading
 
 # this package
 from base_storage import BaseStorage
+from theape.parts.storage.asyncwriter import AsyncWriter
+from theape.parts.storage.compression import CompressedFile
+from theape.parts.storage.compression import compression_extension, split_extension
+from theape.parts.storage.rotatingfile import RotatingFile
+from theape.parts.storage.journal import JournalFile, recover
+from theape.parts.storage.preallocation import PreallocatedFile
+from theape.parts.storage.vectored import writev
+from theape.parts.storage.base_storage import BYTES
 #from ape import BaseClass
 from theape import FILE_TIMESTAMP
 from theape import ApeError
+from theape import BaseClass
 from theape.infrastructure.code_graphs import module_diagram, class_diagram
 
 WRITEABLE = 'w'
@@ -21,6 +33,11 @@ UNDERSCORE = '_'
 FILENAME_SUFFIX = UNDERSCORE + DIGIT + ONE_OR_MORE
 IN_PWEAVE = __name__ == '__builtin__'
 AMBIGUOUS = "Ambiguous call: 'overwrite' True and mode 'a'"
+SUFFIXED = re.compile(r"^(?P<base>.*){0}(?P<count>{1}{2})$".format(UNDERSCORE,
+                                                                   DIGIT,
+                                                                   ONE_OR_MORE))
+CLAIM_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+CLAIM_MODE = 0666
 
 if IN_PWEAVE:
     example_path = 'aoeu/snth'
@@ -67,12 +84,111 @@ if IN_PWEAVE:
     
     print(name)
 
+class NameIndex(BaseClass):
+    """
+    An index of the highest count used for names in a directory
+    """
+    def __init__(self, path):
+        """
+        NameIndex constructor
+
+        :param:
+
+         - `path`: the directory to index
+        """
+        super(NameIndex, self).__init__()
+        self.path = path
+        self.lock = threading.Lock()
+        self._counts = None
+        return
+
+    @property
+    def counts(self):
+        """
+        dict of (base, extension): highest count (seeded from the directory)
+        """
+        if self._counts is None:
+            self._counts = {}
+            for name in os.listdir(self.path):
+                self.record(name)
+        return self._counts
+
+    def record(self, name):
+        """
+        Updates the counts if the name has a count in it
+
+        :param:
+
+         - `name`: file-name (without the path)
+        """
+        base, extension = split_extension(name)
+        match = SUFFIXED.match(base)
+        if match is not None:
+            key = (match.group('base'), extension)
+            count = int(match.group('count'))
+            if count > self._counts.get(key, 0):
+                self._counts[key] = count
+        return
+
+    def claim(self, name):
+        """
+        Creates an empty file with the name (adding a count if the name's taken)
+
+        :param:
+
+         - `name`: file-name (without the path)
+
+        :return: full name (with path) of the claimed file
+        """
+        base, extension = split_extension(name)
+        key = (base, extension)
+        with self.lock:
+            counts = self.counts
+            candidate = name
+            while True:
+                full_name = os.path.join(self.path, candidate)
+                try:
+                    os.close(os.open(full_name, CLAIM_FLAGS, CLAIM_MODE))
+                    self.record(candidate)
+                    return full_name
+                except OSError as error:
+                    if error.errno != errno.EEXIST:
+                        raise
+                counts[key] = counts.get(key, 0) + 1
+                candidate = "{b}_{c}{e}".format(b=base,
+                                                c=str(counts[key]).zfill(4),
+                                                e=extension)
+        return
+# end class NameIndex
+
+name_indices = {}
+name_indices_lock = threading.Lock()
+
+def get_name_index(path):
+    """
+    Gets the shared NameIndex for the path
+
+    :param:
+
+     - `path`: directory the names are in
+
+    :return: NameIndex
+    """
+    key = os.path.normpath(path)
+    with name_indices_lock:
+        if key not in name_indices:
+            name_indices[key] = NameIndex(path)
+        return name_indices[key]
+
 class FileStorage(BaseStorage):
     """
     A class to store data to a file
     """
     def __init__(self, path=None, timestamp=FILE_TIMESTAMP,
-                 name=None, overwrite=False, mode=WRITEABLE):
+                 name=None, overwrite=False, mode=WRITEABLE,
+                 asynchronous=False, drop=False, compression=None,
+                 max_bytes=None, max_seconds=None, hourly=False, high_water=None,
+                 journal=False, catalog=None, size_hint=None):
         """
         FileStorage constructor
 
@@ -83,8 +199,19 @@ class FileStorage(BaseStorage):
          - `name`: Filename to use
          - `overwrite`: If true, clobber existing file with same name
          - `mode`: file mode (e.g. 'a' for append)
+         - `asynchronous`: if True, write to opened files from a background thread
+         - `drop`: if asynchronous and the write-queue is full, drop writes instead of waiting
+         - `compression`: 'gzip' or 'bz2' to compress the files (None for plain text)
+         - `max_bytes`: rotate to a new file after this many bytes
+         - `max_seconds`: rotate to a new file after this many seconds
+         - `hourly`: if True, rotate to a new file at the top of every hour
+         - `high_water`: lines for `writeline` to buffer before writing (None to not buffer)
+         - `journal`: if True, periodically fsync the files and journal the commits
+         - `catalog`: OutputCatalog to register the opened files in
+         - `size_hint`: estimated bytes per file to reserve on disk when it's opened
+        :raise: ApeError if `journal` and `compression` are both set
         """
-        super(FileStorage, self).__init__()
+        super(FileStorage, self).__init__(high_water=high_water)
         self._path = None
         self.path = path
         self.timestamp = timestamp
@@ -93,9 +220,32 @@ class FileStorage(BaseStorage):
         self.name = name
         self.overwrite = overwrite
         self.mode = mode
+        self.asynchronous = asynchronous
+        self.drop = drop
+        self.compression = compression
+        if compression is not None:
+            # fail early if it's not a known compression
+            compression_extension(compression)
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.hourly = hourly
+        self.journal = journal
+        if journal and compression is not None:
+            raise ApeError("Journaled files can't be compressed")
+        self.catalog = catalog
+        self.catalog_id = None
+        self.size_hint = size_hint
         self.closed = True
         return
 
+    @property
+    def rotating(self):
+        """
+        True if one of the rotation policies is set
+        """
+        return (self.max_bytes is not None or self.max_seconds is not None or
+                self.hourly)
+
     @property
     def writeable(self):
         """
@@ -127,36 +277,84 @@ class FileStorage(BaseStorage):
         self._path = path
         return
 
-    def safe_name(self, name, overwrite=False):
+    def safe_name(self, name, overwrite=False, compressed=True):
         """
         Adds a timestamp if formatted for it, increments if already exists
 
+        Unless `overwrite` is True, the file is created (empty) to claim the name. If
+        `compression` is set, its extension is added (if the name doesn't have it).
+
         :param:
 
          - `name`: name for file (without path added)
          - `overwrite`: if True, don't mangle the name
+         - `compressed`: if False, the file won't be compressed so leave off the extension
 
         :return: unique name with full path
         """
         name = name.format(timestamp=datetime.datetime.now().strftime(self.timestamp))
-        full_name = os.path.join(self.path, name)
-        
+        if compressed and self.compression is not None:
+            extension = compression_extension(self.compression)
+            if not name.endswith(extension):
+                name += extension
         if overwrite:
-            return full_name
-        
-        if os.path.exists(full_name):
-            base, extension = os.path.splitext(name)
+            return os.path.join(self.path, name)
+        return get_name_index(self.path).claim(name)
+
+    def open_disk_file(self, name, mode=WRITEABLE):
+        """
+        Opens the file on disk (preallocating it if there's a `size_hint`)
+
+        :param:
+
+         - `name`: full name of the file
+         - `mode`: file-mode
+
+        :return: opened file
+        """
+        if self.size_hint is None:
+            return open(name, mode)
+        return PreallocatedFile(name, mode, self.size_hint)
+
+    def open_file(self, name, mode=WRITEABLE):
+        """
+        Opens the file (compressing it if `compression` is set)
 
+        :param:
+
+         - `name`: full name of the file
+         - `mode`: file-mode
 
-            expression = r"{b}{s}{e}".format(b=base,
-                                             s=FILENAME_SUFFIX,
-                                             e=extension)
-            regex = re.compile(expression)
-            count = sum(1 for name in os.listdir(self.path) if regex.match(name))
-            count = str(count + 1).zfill(4)
-            name = "{b}_{c}{e}".format(b=base, c=count, e=extension)
-            full_name = os.path.join(self.path, name)
-        return full_name
+        :return: opened file-like object
+        """
+        if self.journal:
+            if mode.startswith(APPENDABLE):
+                recovered = recover(name)
+                if recovered is not None and recovered.truncated:
+                    self.logger.warning("Truncated {0} bytes from {1}".format(recovered.truncated,
+                                                                              name))
+            return JournalFile(self.open_disk_file(name, mode), name)
+        if self.compression is None:
+            return self.open_disk_file(name, mode)
+        binary = mode if 'b' in mode else mode + 'b'
+        return CompressedFile(open(name, binary), self.compression)
+
+    def open_segment(self, name):
+        """
+        Opens the next file for a rotating file
+
+        :param:
+
+         - `name`: the name originally passed to `open`
+
+        :return: (full name, opened file)
+        """
+        requested = name
+        name = self.safe_name(name)
+        if self.catalog is not None:
+            self.catalog.finish(self.catalog_id)
+            self.catalog_id = self.catalog.register(name, requested)
+        return name, self.open_file(name)
 
     def open(self, name, overwrite=False, mode=WRITEABLE, return_copy=True):
         """
@@ -173,6 +371,7 @@ class FileStorage(BaseStorage):
         """
         if overwrite and mode == APPENDABLE:
             self.logger.warning(AMBIGUOUS)
+        requested = name
         name = self.safe_name(name, overwrite=overwrite or mode==APPENDABLE)
         self.logger.debug("Opening {0} for writing".format(name))
         if return_copy:
@@ -180,7 +379,19 @@ class FileStorage(BaseStorage):
         else:
             opened = self
         opened.name = name
-        opened._file = open(name, mode)
+        # the copy can't share the original's line-buffer
+        opened.reset_buffer()
+        opened._file = self.open_file(name, mode)
+        if self.catalog is not None:
+            opened.catalog_id = self.catalog.register(name, requested)
+        if self.rotating:
+            opened._file = RotatingFile(opened._file, name,
+                                        opener=functools.partial(opened.open_segment, requested),
+                                        max_bytes=self.max_bytes,
+                                        max_seconds=self.max_seconds,
+                                        hourly=self.hourly)
+        if self.asynchronous:
+            opened._file = AsyncWriter(opened._file, drop=self.drop).start()
         opened.mode = 'w'
         opened.closed = False
         return opened
@@ -191,12 +402,42 @@ class FileStorage(BaseStorage):
         """
         if self.file is not None:
             self.logger.debug("Closing the File")
+            self.write_buffer()
             self.file.close()
             self.closed = True
+            if self.catalog is not None and self.catalog_id is not None:
+                self.catalog.finish(self.catalog_id)
+                self.catalog_id = None
         else:
             self.logger.debug("File is None")
         return
 
+    def writev(self, buffers):
+        """
+        Writes the buffers to the file without joining them
+
+        :param:
+
+         - `buffers`: bytes (str, bytearray, buffer, memoryview) or a list of them
+
+        :return: number of bytes written
+        :raise: ApeError if the file isn't open
+        """
+        # only plain files can be written to below their `write` method
+        if not isinstance(self.file, file):
+            return super(FileStorage, self).writev(buffers)
+        if isinstance(buffers, BYTES):
+            buffers = [buffers]
+        if self.buffered:
+            self.write_buffer()
+        try:
+            # anything the file is still holding has to go first
+            self.file.flush()
+        except ValueError as error:
+            self.logger.debug(error)
+            raise ApeError("`writev` called on unopened file")
+        return writev(self.file.fileno(), buffers)
+
     def __enter__(self):
         """
         Support for the 'with' statement
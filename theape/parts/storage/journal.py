@@ -0,0 +1,228 @@
+
+# python standard library
+import os
+import struct
+import time
+import zlib
+from collections import namedtuple
+
+# this package
+from theape import BaseClass
+
+JOURNAL_EXTENSION = '.journal'
+# offset, records, crc of the data, crc of the first three fields
+ENTRY = struct.Struct('<QQII')
+CHECKED = struct.Struct('<QQI')
+# bytes to write between commits
+COMMIT_BYTES = 2**20
+# seconds between commits
+COMMIT_SECONDS = 1
+NEWLINE = '\n'
+# bytes to read at a time when checking the data
+READ_SIZE = 2**20
+CRC_MASK = 0xffffffff
+
+JournalEntry = namedtuple('JournalEntry', 'offset records crc')
+Recovery = namedtuple('Recovery', 'name offset records truncated')
+
+def crc32(data, crc=0):
+    """
+    An unsigned crc32 (python 2's zlib.crc32 can be negative)
+
+    :param:
+
+     - `data`: string to add to the checksum
+     - `crc`: checksum of the data before this string
+    """
+    return zlib.crc32(data, crc) & CRC_MASK
+
+def read_journal(name):
+    """
+    Reads the commit-entries for a data file
+
+    :param:
+
+     - `name`: path to the data file (not the journal)
+
+    :return: list of JournalEntry (empty if there's no journal)
+    """
+    journal_name = name + JOURNAL_EXTENSION
+    if not os.path.exists(journal_name):
+        return []
+    entries = []
+    with open(journal_name, 'rb') as reader:
+        while True:
+            raw = reader.read(ENTRY.size)
+            if len(raw) < ENTRY.size:
+                # missing or torn last entry
+                break
+            offset, records, crc, check = ENTRY.unpack(raw)
+            if crc32(raw[:CHECKED.size]) != check:
+                continue
+            entries.append(JournalEntry(offset, records, crc))
+    return entries
+
+def recover(name):
+    """
+    Truncates the data file to its last good commit
+
+    :param:
+
+     - `name`: path to the data file
+
+    :return: Recovery (name, offset, records, bytes truncated) or None if there's no journal
+    """
+    if not os.path.exists(name + JOURNAL_EXTENSION) or not os.path.exists(name):
+        return None
+    # an empty journal means nothing was committed so the whole file gets cut
+    entries = read_journal(name)
+    size = os.path.getsize(name)
+    good = JournalEntry(0, 0, 0)
+    crc = 0
+    position = 0
+    with open(name, 'rb') as reader:
+        for entry in entries:
+            if entry.offset > size or entry.offset < position:
+                break
+            while position < entry.offset:
+                data = reader.read(min(READ_SIZE, entry.offset - position))
+                crc = crc32(data, crc)
+                position += len(data)
+            if crc != entry.crc:
+                break
+            good = entry
+    if good.offset < size:
+        with open(name, 'r+b') as data_file:
+            data_file.truncate(good.offset)
+            data_file.flush()
+            os.fsync(data_file.fileno())
+    return Recovery(name, good.offset, good.records, size - good.offset)
+
+class JournalFile(BaseClass):
+    """
+    A file-like object that periodically commits (fsyncs) a file and journals it
+    """
+    def __init__(self, target, name, commit_bytes=COMMIT_BYTES,
+                 commit_seconds=COMMIT_SECONDS, clock=time.time):
+        """
+        JournalFile constructor
+
+        :param:
+
+         - `target`: file opened for writing (or appending)
+         - `name`: path to the file
+         - `commit_bytes`: bytes to write before committing
+         - `commit_seconds`: seconds after the last commit to commit again
+         - `clock`: callable that returns the time in seconds
+        """
+        super(JournalFile, self).__init__()
+        self.target = target
+        self.name = name
+        self.commit_bytes = commit_bytes
+        self.commit_seconds = commit_seconds
+        self.clock = clock
+        self.offset = 0
+        self.records = 0
+        self.crc = 0
+        self.committed = 0
+        self.commits = 0
+        self.at_line_start = True
+        self.last_commit = clock()
+        self.read_existing()
+        # a new (empty) file gets a new journal
+        self.journal = open(name + JOURNAL_EXTENSION, 'ab' if self.offset else 'wb')
+        if self.offset and not read_journal(name):
+            # the file was written without a journal so commit what's already there
+            self.committed = 0
+            self.commit()
+        return
+
+    @property
+    def closed(self):
+        """
+        True if the file is closed
+        """
+        return self.target.closed
+
+    def read_existing(self):
+        """
+        Counts the bytes, lines and checksum of what's already in the file (when appending)
+        """
+        if os.path.exists(self.name) and os.path.getsize(self.name):
+            with open(self.name, 'rb') as reader:
+                for data in iter(lambda: reader.read(READ_SIZE), ''):
+                    self.crc = crc32(data, self.crc)
+                    self.records += data.count(NEWLINE)
+                    self.offset += len(data)
+            self.committed = self.offset
+        return
+
+    def write(self, text):
+        """
+        Writes the text (committing if it ends a line and a commit is due)
+
+        :param:
+
+         - `text`: string to write
+        """
+        self.target.write(text)
+        self.offset += len(text)
+        self.records += text.count(NEWLINE)
+        self.crc = crc32(text, self.crc)
+        if text:
+            self.at_line_start = text.endswith(NEWLINE)
+        if self.at_line_start and (self.offset - self.committed >= self.commit_bytes or
+                                   self.clock() - self.last_commit >= self.commit_seconds):
+            self.commit()
+        return
+
+    def writelines(self, texts):
+        """
+        Writes the texts
+
+        :param:
+
+         - `texts`: collection of strings
+        """
+        for text in texts:
+            self.write(text)
+        return
+
+    def commit(self):
+        """
+        Syncs the file to disk and journals its size and checksum
+
+        Only what's been written up to the end of the last complete line is committed.
+        """
+        if not self.at_line_start:
+            return
+        self.last_commit = self.clock()
+        if self.offset == self.committed:
+            return
+        self.target.flush()
+        os.fsync(self.target.fileno())
+        entry = CHECKED.pack(self.offset, self.records, self.crc)
+        self.journal.write(entry + struct.pack('<I', crc32(entry)))
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.committed = self.offset
+        self.commits += 1
+        return
+
+    def flush(self):
+        """
+        Commits everything written so far (up to the last complete line)
+        """
+        self.commit()
+        return
+
+    def close(self):
+        """
+        Commits and closes the file and journal
+        """
+        if not self.target.closed:
+            self.commit()
+            self.target.close()
+            self.journal.close()
+        return
+# end class JournalFile
\ No newline at end of file
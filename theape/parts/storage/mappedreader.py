@@ -0,0 +1,279 @@
+
+# python standard library
+import mmap
+import os
+from datetime import datetime
+
+# third party
+import numpy
+
+# this package
+from theape import BaseClass
+from theape import ApeError
+from theape import FILE_TIMESTAMP
+from theape.infrastructure.timemap import parse_timestamps, TIMESTAMP_LENGTH
+from theape.parts.storage.compression import COMPRESSIONS
+
+NEWLINE = '\n'
+# bytes to search for newlines at a time when building the index
+INDEX_CHUNK = 2**24
+
+class MappedReader(BaseClass):
+    """
+    A memory-mapped reader for (timestamped) text output files
+    """
+    def __init__(self, name, header=True, separator=',', timestamp_format=FILE_TIMESTAMP):
+        """
+        MappedReader constructor
+
+        :param:
+
+         - `name`: path to the file
+         - `header`: if True, the first line is a header, not data
+         - `separator`: token between the columns (timestamp is the first column)
+         - `timestamp_format`: strftime format of the timestamps
+        """
+        super(MappedReader, self).__init__()
+        if os.path.splitext(name)[1] in COMPRESSIONS:
+            raise ApeError("Can't memory-map compressed file '{0}'".format(name))
+        self.name = name
+        self.has_header = header
+        self.separator = separator
+        self.timestamp_format = timestamp_format
+        self._file = None
+        self._mapped = None
+        self._data_start = None
+        self._end = None
+        self._starts = None
+        self._timestamps = None
+        return
+
+    @property
+    def mapped(self):
+        """
+        The read-only memory-map of the file (an empty string if the file's empty)
+        """
+        if self._mapped is None:
+            self._file = open(self.name, 'rb')
+            if os.fstat(self._file.fileno()).st_size:
+                self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._mapped = ''
+        return self._mapped
+
+    @property
+    def data_start(self):
+        """
+        Byte-offset of the first line of data (after the header)
+        """
+        if self._data_start is None:
+            self._data_start = 0
+            if self.has_header:
+                self._data_start = self.line_end(0)
+        return self._data_start
+
+    @property
+    def end(self):
+        """
+        Byte-offset of the end of the data (trailing newline excluded)
+        """
+        if self._end is None:
+            self._end = len(self.mapped)
+            if self._end and self.mapped[self._end - 1] == NEWLINE:
+                self._end -= 1
+            self._end = max(self._end, self.data_start)
+        return self._end
+
+    @property
+    def header(self):
+        """
+        The header line (None if `header` was False)
+        """
+        if not self.has_header:
+            return None
+        return self.mapped[:self.data_start].rstrip(NEWLINE)
+
+    def line_end(self, offset):
+        """
+        :param:
+
+         - `offset`: byte-offset in a line
+
+        :return: offset of the start of the next line (or the size of the file)
+        """
+        newline = self.mapped.find(NEWLINE, offset)
+        return len(self.mapped) if newline < 0 else newline + 1
+
+    def line_start(self, offset):
+        """
+        :param:
+
+         - `offset`: byte-offset in a data line
+
+        :return: offset of the start of the line
+        """
+        return max(self.mapped.rfind(NEWLINE, self.data_start, offset) + 1, self.data_start)
+
+    @property
+    def starts(self):
+        """
+        numpy array of the byte-offsets of the start of each data-line
+        """
+        if self._starts is None:
+            data = numpy.frombuffer(self.mapped, dtype=numpy.uint8) if self.end else None
+            newlines = [numpy.array([self.data_start - 1], dtype=numpy.int64)]
+            for start in xrange(self.data_start, self.end, INDEX_CHUNK):
+                chunk = data[start:min(start + INDEX_CHUNK, self.end)]
+                newlines.append(numpy.flatnonzero(chunk == ord(NEWLINE)) + start)
+            self._starts = numpy.concatenate(newlines) + 1
+            if self.data_start == self.end:
+                self._starts = self._starts[:0]
+        return self._starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lines(self, start=None, stop=None):
+        """
+        Gets a block of lines
+
+        :param:
+
+         - `start`: index of the first line (0 is the first data-line)
+         - `stop`: index of the line after the last line
+
+        :return: the lines as one string
+        """
+        start, stop, step = slice(start, stop).indices(len(self))
+        if start >= stop:
+            return ''
+        end = self.end if stop == len(self) else self.starts[stop] - 1
+        return self.mapped[self.starts[start]:end]
+
+    def __getitem__(self, index):
+        """
+        :return: line (or list of lines for a slice) without newlines
+        """
+        if isinstance(index, slice):
+            if index.step not in (None, 1):
+                return [self[line] for line in xrange(*index.indices(len(self)))]
+            block = self.lines(index.start, index.stop)
+            return block.split(NEWLINE) if block else []
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line {0} not in {1} lines".format(index, len(self)))
+        return self.lines(index, index + 1)
+
+    def timestamp(self, offset):
+        """
+        Parses the timestamp of the line starting at the offset
+
+        :param:
+
+         - `offset`: byte-offset of the start of a line
+
+        :return: datetime
+        :raise: ApeError if it can't be parsed
+        """
+        end = self.mapped.find(self.separator, offset, self.line_end(offset))
+        if end < 0:
+            end = self.line_end(offset)
+        text = self.mapped[offset:end].rstrip()
+        try:
+            return datetime.strptime(text, self.timestamp_format)
+        except ValueError as error:
+            raise ApeError("Can't parse timestamp at byte {0} of {1}: {2}".format(offset,
+                                                                                  self.name,
+                                                                                  error))
+
+    def offset(self, time):
+        """
+        Binary-searches the file for the first line at or after the time
+
+        :param:
+
+         - `time`: datetime to look for
+
+        :return: byte-offset of the line (or end of data if all are earlier)
+        """
+        low, high = self.data_start, self.end
+        while low < high:
+            start = self.line_start((low + high) // 2)
+            if self.timestamp(start) < time:
+                low = min(self.line_end(start), high)
+            else:
+                high = start
+        return low
+
+    def between(self, start=None, end=None):
+        """
+        Gets the lines whose timestamps are in [start, end)
+
+        :param:
+
+         - `start`: datetime of the earliest line (None for the first line)
+         - `end`: datetime after the latest line (None for through the last line)
+
+        :return: the lines as one string
+        """
+        first = self.data_start if start is None else self.offset(start)
+        last = self.end if end is None else self.offset(end)
+        if first >= last:
+            return ''
+        return self.mapped[first:last].rstrip(NEWLINE)
+
+    def line_numbers(self, start=None, end=None):
+        """
+        Finds the line-numbers for a time-range (to use with `lines`)
+
+        :param:
+
+         - `start`: datetime of the earliest line
+         - `end`: datetime after the latest line
+
+        :return: (first, stop) line indices
+        """
+        first = self.data_start if start is None else self.offset(start)
+        last = self.end if end is None else self.offset(end)
+        first, last = numpy.searchsorted(self.starts, [first, last])
+        return int(first), int(max(first, last))
+
+    @property
+    def timestamps(self):
+        """
+        numpy datetime64 array of the timestamps of every line
+        """
+        if self._timestamps is None:
+            if self.timestamp_format == FILE_TIMESTAMP and len(self):
+                data = numpy.frombuffer(self.mapped, dtype=numpy.uint8)
+                columns = numpy.arange(TIMESTAMP_LENGTH)
+                if self.starts[-1] + TIMESTAMP_LENGTH > len(data):
+                    raise ApeError("last line of {0} is too short for a timestamp".format(self.name))
+                matrix = data[self.starts[:, numpy.newaxis] + columns]
+                strings = matrix.view('S{0}'.format(TIMESTAMP_LENGTH)).ravel()
+                self._timestamps = parse_timestamps(strings)
+            else:
+                self._timestamps = numpy.array([self.timestamp(start)
+                                                for start in self.starts],
+                                               dtype='datetime64[us]')
+        return self._timestamps
+
+    def close(self):
+        """
+        Closes the map and file
+        """
+        if self._mapped is not None:
+            if self._mapped:
+                self._mapped.close()
+            self._file.close()
+            self._mapped = None
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+        return
+# end class MappedReader
\ No newline at end of file
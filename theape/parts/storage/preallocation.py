@@ -0,0 +1,85 @@
+
+# python standard library
+import ctypes
+import ctypes.util
+import logging
+import os
+
+# reserve the blocks but leave the file's size alone
+FALLOC_FL_KEEP_SIZE = 1
+# the 64-bit version is needed for large files on 32-bit systems
+FALLOCATE_NAMES = ('fallocate64', 'fallocate')
+LOGGER = logging.getLogger(__name__)
+
+def load_fallocate():
+    """
+    Gets the C-library's fallocate
+
+    :return: the function or None if it isn't available
+    """
+    name = ctypes.util.find_library('c')
+    if name is None:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+    except OSError:
+        return None
+    for function_name in FALLOCATE_NAMES:
+        function = getattr(libc, function_name, None)
+        if function is not None:
+            function.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+            function.restype = ctypes.c_int
+            return function
+    return None
+
+fallocate = load_fallocate()
+
+def preallocate(descriptor, size):
+    """
+    Reserves disk-blocks past the end of a file (without changing its size)
+
+    :param:
+
+     - `descriptor`: the open file's file-descriptor
+     - `size`: number of bytes to reserve after what's already in the file
+
+    :return: True if the space was reserved
+    """
+    if fallocate is None or size <= 0:
+        return False
+    # a file opened to append already has its blocks, the new lines go after them
+    offset = os.fstat(descriptor).st_size
+    if fallocate(descriptor, FALLOC_FL_KEEP_SIZE, offset, size) != 0:
+        error = ctypes.get_errno()
+        LOGGER.debug("fallocate failed: {0}".format(os.strerror(error)))
+        return False
+    return True
+
+class PreallocatedFile(file):
+    """
+    A file whose disk-blocks are reserved when it's opened
+    """
+    def __init__(self, name, mode, size):
+        """
+        PreallocatedFile constructor
+
+        :param:
+
+         - `name`: path to the file
+         - `mode`: file-mode
+         - `size`: number of bytes to reserve
+        """
+        super(PreallocatedFile, self).__init__(name, mode)
+        self.preallocated = preallocate(self.fileno(), size)
+        return
+
+    def close(self):
+        """
+        Gives back the unused blocks and closes the file
+        """
+        if not self.closed and self.preallocated:
+            self.flush()
+            os.ftruncate(self.fileno(), os.fstat(self.fileno()).st_size)
+        super(PreallocatedFile, self).close()
+        return
+# end class PreallocatedFile
\ No newline at end of file
@@ -0,0 +1,223 @@
+
+# python standard library
+import csv
+import datetime
+import os
+
+# this package
+from theape import BaseClass
+
+SEGMENTS_EXTENSION = '.segments'
+SEGMENT_FIELDS = 'segment start end lines bytes'.split()
+NEWLINE = '\n'
+TEMPORARY = '.tmp'
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+ONE_HOUR = datetime.timedelta(hours=1)
+
+class Segment(object):
+    """
+    The bookkeeping for one segment of a rotating file
+    """
+    __slots__ = ('name', 'start', 'end', 'lines', 'bytes')
+    def __init__(self, name, start=None, end=None, lines=0, bytes=0):
+        """
+        Segment constructor
+
+        :param:
+
+         - `name`: full name of the segment file
+         - `start`: datetime of the first write
+         - `end`: datetime of the last write (None if still open)
+         - `lines`: number of newlines written
+         - `bytes`: number of (uncompressed) bytes written
+        """
+        self.name = name
+        self.start = start
+        self.end = end
+        self.lines = lines
+        self.bytes = bytes
+        return
+
+    @property
+    def row(self):
+        """
+        The segment as a row for the index
+        """
+        return [os.path.basename(self.name),
+                '' if self.start is None else self.start.strftime(TIME_FORMAT),
+                '' if self.end is None else self.end.strftime(TIME_FORMAT),
+                self.lines,
+                self.bytes]
+# end class Segment
+
+def read_segments(index_name):
+    """
+    Reads a segment index
+
+    :param:
+
+     - `index_name`: path to the .segments file
+
+    :return: list of Segments (names have the index's directory added)
+    """
+    path = os.path.dirname(index_name)
+    segments = []
+    with open(index_name) as reader:
+        for row in csv.DictReader(reader):
+            times = [datetime.datetime.strptime(row[field], TIME_FORMAT)
+                     if row[field] else None
+                     for field in ('start', 'end')]
+            segments.append(Segment(os.path.join(path, row['segment']),
+                                    times[0], times[1],
+                                    int(row['lines']), int(row['bytes'])))
+    return segments
+
+class RotatingFile(BaseClass):
+    """
+    A file-like object that rolls over to new files
+    """
+    def __init__(self, target, name, opener, max_bytes=None, max_seconds=None,
+                 hourly=False, clock=datetime.datetime.now):
+        """
+        RotatingFile constructor
+
+        :param:
+
+         - `target`: opened file for the first segment
+         - `name`: full name of the first segment
+         - `opener`: callable that returns (name, opened file) for the next segment
+         - `max_bytes`: bytes to write to a segment before rotating
+         - `max_seconds`: seconds after its first write to rotate a segment
+         - `hourly`: if True, rotate at the top of each hour
+         - `clock`: callable that returns the current datetime
+        """
+        super(RotatingFile, self).__init__()
+        self.target = target
+        self.opener = opener
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.hourly = hourly
+        self.clock = clock
+        self.segments = [Segment(name)]
+        self.deadline = None
+        self.at_line_start = True
+        # the whole name so files that only differ by extension get their own index
+        self.index_name = name + SEGMENTS_EXTENSION
+        self.write_index()
+        return
+
+    @property
+    def name(self):
+        """
+        The name of the current segment
+        """
+        return self.segments[-1].name
+
+    @property
+    def closed(self):
+        """
+        True if the current segment is closed
+        """
+        return self.target.closed
+
+    def set_deadline(self, start):
+        """
+        Sets the time the current segment should be rotated
+
+        :param:
+
+         - `start`: datetime of the first write to the segment
+        """
+        deadlines = []
+        if self.max_seconds is not None:
+            deadlines.append(start + datetime.timedelta(seconds=self.max_seconds))
+        if self.hourly:
+            deadlines.append(start.replace(minute=0, second=0, microsecond=0) + ONE_HOUR)
+        self.deadline = min(deadlines) if deadlines else None
+        return
+
+    def write(self, text):
+        """
+        Writes the text to the current segment (rotating first if it's due)
+
+        :param:
+
+         - `text`: string to write
+        """
+        now = self.clock()
+        segment = self.segments[-1]
+        if self.at_line_start and segment.bytes:
+            if ((self.max_bytes is not None and segment.bytes >= self.max_bytes) or
+                (self.deadline is not None and now >= self.deadline)):
+                self.rotate()
+                segment = self.segments[-1]
+        self.target.write(text)
+        segment.end = now
+        segment.bytes += len(text)
+        segment.lines += text.count(NEWLINE)
+        if text:
+            self.at_line_start = text.endswith(NEWLINE)
+        if segment.start is None:
+            segment.start = now
+            self.set_deadline(now)
+            # so the index has the start-time of the current segment
+            self.write_index()
+        return
+
+    def writelines(self, texts):
+        """
+        Writes the texts (the file can rotate between them)
+
+        :param:
+
+         - `texts`: collection of strings
+        """
+        for text in texts:
+            self.write(text)
+        return
+
+    def rotate(self):
+        """
+        Closes the current segment and opens the next one
+        """
+        self.target.close()
+        name, self.target = self.opener()
+        self.logger.debug("Rotating to {0}".format(name))
+        self.segments.append(Segment(name))
+        self.deadline = None
+        self.write_index()
+        return
+
+    def write_index(self):
+        """
+        Writes the segments to the index file (the current segment has no end)
+        """
+        temporary = self.index_name + TEMPORARY
+        with open(temporary, 'w') as writer:
+            index = csv.writer(writer)
+            index.writerow(SEGMENT_FIELDS)
+            for segment in self.segments[:-1]:
+                index.writerow(segment.row)
+            row = self.segments[-1].row
+            if not self.target.closed:
+                row[SEGMENT_FIELDS.index('end')] = ''
+            index.writerow(row)
+        os.rename(temporary, self.index_name)
+        return
+
+    def flush(self):
+        """
+        Flushes the current segment
+        """
+        self.target.flush()
+        return
+
+    def close(self):
+        """
+        Closes the current segment and writes the final index
+        """
+        if not self.target.closed:
+            self.target.close()
+            self.write_index()
+        return
+# end class RotatingFile
\ No newline at end of file
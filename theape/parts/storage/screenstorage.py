@@ -26,8 +26,9 @@ class ScreenStorage(BaseStorage):
 
     def close(self):
         """
-        Does nothing
+        Writes any buffered lines (doesn't close stdout)
         """
+        self.write_buffer()
         return
 
     def open(self, name):
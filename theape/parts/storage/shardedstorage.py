@@ -0,0 +1,234 @@
+
+# python standard library
+import copy
+import datetime
+import heapq
+import os
+import tempfile
+import threading
+
+# this package
+from theape import BaseClass
+from theape import ApeError
+from theape import FILE_TIMESTAMP
+import theape.parts.storage.filestorage
+
+SHARD_EXTENSION = '.shard'
+
+class TimestampKey(object):
+    """
+    A callable that gets the timestamp at the start of a line
+    """
+    def __init__(self, timestamp_format=FILE_TIMESTAMP, separator=','):
+        """
+        TimestampKey constructor
+
+        :param:
+
+         - `timestamp_format`: strftime format of the timestamps
+         - `separator`: token after the timestamp
+        """
+        self.timestamp_format = timestamp_format
+        self.separator = separator
+        self.last_text = None
+        self.last_time = None
+        return
+
+    def __call__(self, line):
+        """
+        :param:
+
+         - `line`: line that starts with a timestamp
+
+        :return: datetime (or None if the line doesn't start with a timestamp)
+        """
+        text = line.split(self.separator, 1)[0].rstrip()
+        if text != self.last_text:
+            try:
+                time = datetime.datetime.strptime(text, self.timestamp_format)
+            except ValueError:
+                return None
+            self.last_text, self.last_time = text, time
+        return self.last_time
+# end class TimestampKey
+
+class ShardedStorage(BaseClass):
+    """
+    A storage that gives each writing thread its own file and merges them on close
+    """
+    def __init__(self, path=None, storage=None, key=None, timestamp_format=FILE_TIMESTAMP):
+        """
+        ShardedStorage constructor
+
+        :param:
+
+         - `path`: path to folder to store output-file in
+         - `storage`: FileStorage to use instead of creating one from 'path'
+         - `key`: callable that gets a line's sort-key (default is its timestamp)
+         - `timestamp_format`: strftime format of the lines' timestamps (for the default key)
+        :raises: ApeError if neither `path` nor `storage` given
+        """
+        super(ShardedStorage, self).__init__()
+        if not any((path, storage)):
+            raise ApeError("Path or storage needed.")
+        self.path = path
+        self.key = key
+        self.timestamp_format = timestamp_format
+        self._storage = storage
+        self.name = None
+        self.shards = None
+        self.lock = None
+        self.local = None
+        self.output = None
+        return
+
+    @property
+    def storage(self):
+        """
+        A file-storage created from the path (unless passed into constructor)
+
+        :return: FileStorage
+        """
+        if self._storage is None:
+            self._storage = theape.parts.storage.filestorage.FileStorage(path=self.path)
+        return self._storage
+
+    @property
+    def closed(self):
+        """
+        True if not opened (or already merged)
+        """
+        return self.shards is None
+
+    def open(self, name):
+        """
+        Sets up the shards for a file (nothing is created until a thread writes)
+
+        :param:
+
+         - `name`: name of the merged file (passed to the FileStorage on close)
+
+        :return: copy of self ready for writing
+        """
+        opened = copy.copy(self)
+        opened.name = name
+        opened.shards = []
+        opened.lock = threading.Lock()
+        opened.local = threading.local()
+        opened.output = None
+        return opened
+
+    @property
+    def shard(self):
+        """
+        The calling thread's shard (created on its first write)
+
+        :raise: ApeError if not opened (or already closed)
+        """
+        if self.closed:
+            raise ApeError("`write` called on unopened ShardedStorage")
+        shard = getattr(self.local, 'shard', None)
+        if shard is None:
+            descriptor, name = tempfile.mkstemp(prefix=os.path.basename(self.name) + '.',
+                                                suffix=SHARD_EXTENSION,
+                                                dir=self.storage.path)
+            shard = os.fdopen(descriptor, 'w')
+            with self.lock:
+                self.shards.append((name, shard))
+            self.local.shard = shard
+        return shard
+
+    def write(self, text):
+        """
+        Writes the text to the calling thread's shard
+
+        :param:
+
+         - `text`: string to write
+        """
+        self.shard.write(text)
+        return
+
+    def writeline(self, text):
+        """
+        Adds newline to end of text and writes it to the calling thread's shard
+        """
+        self.shard.write("{0}\n".format(text))
+        return
+
+    def writelines(self, texts):
+        """
+        Writes the texts to the calling thread's shard
+        """
+        self.shard.writelines(texts)
+        return
+
+    def keyed(self, index, reader):
+        """
+        Generates the lines of a shard with their sort-keys
+
+        :param:
+
+         - `index`: position of the shard (breaks ties between equal keys)
+         - `reader`: the opened shard
+
+        :yield: (has-key, key, index, line)
+        """
+        key = self.key
+        if key is None:
+            key = TimestampKey(timestamp_format=self.timestamp_format)
+        last = None
+        for line in reader:
+            current = key(line)
+            if current is not None:
+                last = current
+            # lines before the first key sort first (None can't be compared to the keys)
+            yield last is not None, last, index, line
+        return
+
+    def merged(self, readers):
+        """
+        Merges the shards' lines by their keys
+
+        :param:
+
+         - `readers`: the shards opened for reading
+
+        :return: generator of lines in key-order
+        """
+        keyed = [self.keyed(index, reader) for index, reader in enumerate(readers)]
+        return (line for has_key, key, index, line in heapq.merge(*keyed))
+
+    def close(self):
+        """
+        Closes the shards, merges them into the output file and deletes them
+
+        The shards are deleted even if the merge fails (the error is re-raised).
+        """
+        if self.closed:
+            return
+        with self.lock:
+            shards, self.shards = self.shards, None
+        names = [name for name, shard in shards]
+        readers = []
+        try:
+            for name, shard in shards:
+                shard.close()
+            for name in names:
+                readers.append(open(name))
+            self.output = self.storage.open(self.name)
+            self.output.writelines(self.merged(readers))
+            self.output.close()
+        except Exception as error:
+            self.logger.error("Unable to merge the shards into '{0}', deleting {1} ({2})".format(self.name,
+                                                                                                ', '.join(names),
+                                                                                                error))
+            raise
+        finally:
+            for reader in readers:
+                reader.close()
+            for name in names:
+                if os.path.exists(name):
+                    os.remove(name)
+        return
+# end class ShardedStorage
\ No newline at end of file
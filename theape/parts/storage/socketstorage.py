@@ -5,6 +5,7 @@ import socket
 
 # this package
 from base_storage import BaseStorage
+from base_storage import BYTES
 
 #from ape import BaseClass
 from theape import ApeError
@@ -101,6 +102,42 @@ class SocketStorage(BaseStorage):
         """
         super(SocketStorage, self).writelines(texts, socket.error)
         
+    def writev(self, buffers):
+        """
+        Sends the buffers without joining them
+
+        If the file was made by a socket's ``makefile`` any buffered lines are
+        written, its buffer is flushed and the buffers are sent with the
+        socket's ``sendall`` (the file's ``write``
+        would copy them to strings first). Python 2 sockets don't have
+        ``sendmsg`` so they're sent one at a time.
+
+        :param:
+
+         - `buffers`: bytes (str, bytearray, buffer, memoryview) or a list of them
+
+        :return: number of bytes sent
+        :raise: ApeError on socket.error
+        """
+        sock = getattr(self.file, '_sock', None)
+        if sock is None:
+            return super(SocketStorage, self).writev(buffers, socket.error)
+        if isinstance(buffers, BYTES):
+            buffers = [buffers]
+        # the lines writeline buffered have to go out before these
+        if self.buffered:
+            self.write_buffer()
+        total = 0
+        try:
+            self.file.flush()
+            for data in buffers:
+                sock.sendall(data)
+                total += len(data)
+        except socket.error as error:
+            self.logger.debug(error)
+            raise ApeError("Socket Error: {0}".format(error))
+        return total
+
 
     def __iter__(self):
         """
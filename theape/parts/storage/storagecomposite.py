@@ -1,7 +1,15 @@
 
+# python standard library
+from collections import namedtuple
+
 # this package 
 from theape import BaseClass
 from theape import ApeError
+from theape.parts.storage.asyncwriter import AsyncWriter, QUEUE_SIZE
+
+SinkHealth = namedtuple('SinkHealth', 'name alive queued dropped waited writes')
+# what the sinks can raise when they're closed
+CLOSE_ERRORS = (ApeError, EnvironmentError)
 
 def check_opened(method):
     """
@@ -23,9 +31,22 @@ class StorageComposite(BaseClass):
     """
     A composite for storages
     """
-    def __init__(self):
+    def __init__(self, threaded=False, queue_size=QUEUE_SIZE):
+        """
+        StorageComposite constructor
+
+        :param:
+
+         - `threaded`: if True, write to each opened storage from its own thread
+         - `queue_size`: lines each storage's queue holds (if threaded)
+        """
+        super(StorageComposite, self).__init__()
+        self.threaded = threaded
+        self.queue_size = queue_size
         self._storages = None
+        self.drops = {}
         self.open_storages = None
+        self.failed = set()
         return
 
     @property
@@ -37,16 +58,18 @@ class StorageComposite(BaseClass):
             self._storages = []
         return self._storages
 
-    def add(self, storage):
+    def add(self, storage, drop=False):
         """
         Adds the storage to the list of storages
 
         :param:
 
          - `storage`: a configured storage
+         - `drop`: if threaded, drop lines instead of waiting when its queue is full
         """
         if storage not in self.storages:         
             self.storages.append(storage)
+        self.drops[id(storage)] = drop
         return
 
     def remove(self, storage):
@@ -59,10 +82,49 @@ class StorageComposite(BaseClass):
         """
         try:
             self.storages.remove(storage)
+            self.drops.pop(id(storage), None)
         except ValueError as error:
             self.log_error(error)
         return
 
+    @property
+    def health(self):
+        """
+        The state of the threaded sinks (empty if not threaded or not opened)
+
+        :return: list of SinkHealth
+        """
+        if not self.threaded or self.open_storages is None:
+            return []
+        return [SinkHealth(name=sink.name or str(sink.target),
+                           alive=sink.thread.is_alive(),
+                           queued=sink.queue.qsize(),
+                           dropped=sink.dropped,
+                           waited=sink.waited,
+                           writes=sink.writes)
+                for sink in self.open_storages]
+
+    def send(self, method, argument):
+        """
+        Calls the method on the threaded sinks (skipping sinks whose thread died)
+
+        :param:
+
+         - `method`: name of the method to call (e.g. 'write')
+         - `argument`: what to pass to the method
+        """
+        for sink in self.open_storages:
+            if id(sink) in self.failed:
+                continue
+            try:
+                getattr(sink, method)(argument)
+            except (ApeError, ValueError) as error:
+                # the ApeError carries the error that killed the sink's thread
+                self.failed.add(id(sink))
+                self.log_error(error, " -- no longer writing to {0}".format(sink.name or
+                                                                          sink.target))
+        return
+
     @check_opened
     def write(self, line):
         """
@@ -74,6 +136,9 @@ class StorageComposite(BaseClass):
 
         :raise: ApeError if storages not opened
         """
+        if self.threaded:
+            self.send('write', line)
+            return
         for storage in self.open_storages:
             storage.write(line)
         return
@@ -89,6 +154,9 @@ class StorageComposite(BaseClass):
 
         :raise: ApeError if storages not opened
         """
+        if self.threaded:
+            self.send('writelines', lines)
+            return
         for storage in self.open_storages:
             storage.writelines(lines)
         return
@@ -102,6 +170,13 @@ class StorageComposite(BaseClass):
          - `name`: name to give opened file
         """
         self.open_storages = [storage.open(name) for storage in self.storages]
+        if self.threaded:
+            self.failed = set()
+            self.open_storages = [AsyncWriter(storage if opened is None else opened,
+                                              queue_size=self.queue_size,
+                                              drop=self.drops.get(id(storage), False)).start()
+                                  for storage, opened in zip(self.storages,
+                                                             self.open_storages)]
         return
 
     def close(self):
@@ -110,6 +185,13 @@ class StorageComposite(BaseClass):
         """
         if self.open_storages is not None:
             for storage in self.open_storages:
-                storage.close()
+                if not self.threaded:
+                    storage.close()
+                    continue
+                try:
+                    storage.close()
+                except CLOSE_ERRORS as error:
+                    self.log_error(error, " -- closing {0}".format(storage.name or
+                                                                 storage.target))
             self.open_storages = None
         return
\ No newline at end of file
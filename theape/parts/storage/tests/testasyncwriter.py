@@ -0,0 +1,182 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+from StringIO import StringIO
+
+# third party
+from mock import MagicMock
+
+# this package
+from theape.parts.storage.asyncwriter import AsyncWriter
+from theape.parts.storage.filestorage import FileStorage
+from theape import ApeError
+
+class SlowFile(StringIO):
+    """
+    A StringIO whose writes wait for the `go` event
+    """
+    def __init__(self):
+        StringIO.__init__(self)
+        self.go = threading.Event()
+        self.writes = []
+        return
+
+    def write(self, text):
+        self.go.wait()
+        self.writes.append(text)
+        StringIO.write(self, text)
+        return
+
+    def close(self):
+        self.closed_value = self.getvalue()
+        StringIO.close(self)
+        return
+
+class TestAsyncWriter(unittest.TestCase):
+    def setUp(self):
+        self.target = SlowFile()
+        return
+
+    def test_coalesce(self):
+        """
+        Are queued writes joined into one write to the target?
+        """
+        writer = AsyncWriter(self.target).start()
+        for index in range(100):
+            writer.write("{0}\n".format(index))
+        writer.writelines(['a\n', 'b\n'])
+        self.target.go.set()
+        writer.flush()
+        self.assertEqual(1, len(self.target.writes))
+        self.assertEqual(1, writer.writes)
+        writer.close()
+        expected = ''.join("{0}\n".format(index) for index in range(100)) + 'a\nb\n'
+        self.assertEqual(expected, self.target.closed_value)
+        return
+
+    def test_flush_size(self):
+        """
+        Does it write once enough has been buffered?
+        """
+        self.target.go.set()
+        writer = AsyncWriter(self.target, flush_size=10, flush_interval=60).start()
+        writer.write('a' * 10)
+        for attempt in range(100):
+            if self.target.writes:
+                break
+            time.sleep(0.01)
+        self.assertEqual(['a' * 10], self.target.writes)
+        writer.close()
+        return
+
+    def test_flush_interval(self):
+        """
+        Does it write buffered text once it's old enough?
+        """
+        self.target.go.set()
+        writer = AsyncWriter(self.target, flush_interval=0.05).start()
+        writer.write('alpha')
+        for attempt in range(100):
+            if self.target.writes:
+                break
+            time.sleep(0.01)
+        self.assertEqual(['alpha'], self.target.writes)
+        writer.close()
+        return
+
+    def test_closed(self):
+        """
+        Does writing to a closed (or un-started) writer raise a ValueError?
+        """
+        writer = AsyncWriter(self.target)
+        self.assertRaises(ValueError, writer.write, 'alpha')
+        writer.start()
+        self.target.go.set()
+        writer.close()
+        self.assertRaises(ValueError, writer.write, 'alpha')
+        self.assertRaises(ValueError, writer.flush)
+        return
+
+    def test_drop(self):
+        """
+        Does it drop (and count) writes if the queue is full and `drop` is set?
+        """
+        writer = AsyncWriter(self.target, queue_size=2, flush_size=1, drop=True).start()
+        writer._logger = MagicMock()
+        writer.write('a')
+        # wait for the thread to take 'a' and get stuck writing it
+        for attempt in range(100):
+            if writer.queue.empty():
+                break
+            time.sleep(0.01)
+        for text in 'bcde':
+            writer.write(text)
+        self.assertEqual(2, writer.dropped)
+        self.assertEqual(0, writer.waited)
+        self.target.go.set()
+        writer.close()
+        self.assertEqual('abc', self.target.closed_value)
+        self.assertTrue(writer._logger.warning.called)
+        return
+
+    def test_wait(self):
+        """
+        Does it wait (and count) if the queue is full and `drop` isn't set?
+        """
+        writer = AsyncWriter(self.target, queue_size=1, flush_size=1).start()
+        writer.write('a')
+        for attempt in range(100):
+            if writer.queue.empty():
+                break
+            time.sleep(0.01)
+        writer.write('b')
+        timer = threading.Timer(0.05, self.target.go.set)
+        timer.start()
+        writer.write('c')
+        self.assertEqual(1, writer.waited)
+        writer.close()
+        self.assertEqual('abc', self.target.closed_value)
+        return
+
+    def test_error(self):
+        """
+        Is the error that killed the writer thread raised (as an ApeError) by put, flush and close?
+        """
+        self.target.write = MagicMock(side_effect=IOError('No space left on device'))
+        writer = AsyncWriter(self.target, flush_size=1).start()
+        writer._logger = MagicMock()
+        writer.write('alpha')
+        writer.thread.join(5)
+        self.assertFalse(writer.thread.is_alive())
+        self.assertIsInstance(writer.error, IOError)
+        with self.assertRaisesRegexp(ApeError, 'No space left on device'):
+            writer.write('beta')
+        self.assertRaises(ApeError, writer.flush)
+        self.assertRaises(ApeError, writer.close)
+        self.assertTrue(self.target.closed)
+        return
+
+    def test_file_storage(self):
+        """
+        Does an asynchronous FileStorage write through the AsyncWriter?
+        """
+        path = tempfile.mkdtemp()
+        try:
+            storage = FileStorage(path=path, asynchronous=True)
+            opened = storage.open('ummagumma.txt')
+            self.assertIsInstance(opened.file, AsyncWriter)
+            opened.writeline('alpha')
+            opened.writelines(['beta\n', 'gamma\n'])
+            opened.close()
+            with open(os.path.join(path, 'ummagumma.txt')) as reader:
+                self.assertEqual('alpha\nbeta\ngamma\n', reader.read())
+            self.assertRaises(ApeError, opened.write, 'delta')
+        finally:
+            shutil.rmtree(path)
+        return
+# end TestAsyncWriter
\ No newline at end of file
@@ -0,0 +1,102 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# this package
+from theape.parts.storage.catalog import OutputCatalog
+from theape.parts.storage.filestorage import FileStorage, name_indices
+import theape.infrastructure.singletons as singletons
+from theape import ApeError
+
+class TestOutputCatalog(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.now = datetime(2013, 11, 23, 20, 0)
+        self.catalog = OutputCatalog(os.path.join(self.path, 'catalog', 'outputs.sqlite'),
+                                     clock=self.clock)
+        name_indices.clear()
+        return
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.path)
+        return
+
+    def clock(self):
+        self.now += timedelta(seconds=1)
+        return self.now
+
+    def test_register(self):
+        """
+        Are the files recorded with the context and queryable?
+        """
+        name = os.path.join(self.path, 'iperf.csv')
+        with open(name, 'w') as writer:
+            writer.write('12345')
+        self.catalog.set_context(plugin='iperf', section='client', repetition=1)
+        first = self.catalog.register(name, 'iperf.csv')
+        self.catalog.set_context(repetition=2)
+        second = self.catalog.register(os.path.join(self.path, 'missing.csv'))
+        self.catalog.finish(first)
+        self.catalog.finish(second)
+        self.catalog.finish(12)
+
+        outputs = self.catalog.outputs()
+        self.assertEqual([first, second], [output.id for output in outputs])
+        output = self.catalog.outputs(repetition=1)[0]
+        self.assertEqual((name, 'iperf.csv', 'iperf', 'client', 1, 5),
+                         (output.path, output.requested, output.plugin, output.section,
+                          output.repetition, output.size))
+        self.assertEqual('2013-11-23T20:00:01', output.start)
+        self.assertEqual('2013-11-23T20:00:03', output.end)
+        self.assertIsNone(self.catalog.outputs(repetition=2)[0].size)
+        self.assertEqual([], self.catalog.outputs(plugin='iperf', repetition=3))
+        return
+
+    def test_errors(self):
+        """
+        Are unknown context-keys and columns ApeErrors?
+        """
+        self.assertRaises(ApeError, self.catalog.set_context, device='dut')
+        self.assertRaises(ApeError, self.catalog.outputs, device='dut')
+        return
+
+    def test_file_storage(self):
+        """
+        Does the FileStorage register its files and segments?
+        """
+        storage = FileStorage(path=self.path, catalog=self.catalog, max_bytes=10)
+        for repetition in (1, 2):
+            self.catalog.set_context(repetition=repetition)
+            opened = storage.open('data.csv')
+            for line in range(3):
+                opened.writeline('{0:09}'.format(line))
+            opened.close()
+        outputs = self.catalog.outputs()
+        self.assertEqual(['data.csv', 'data_0001.csv', 'data_0002.csv',
+                          'data_0003.csv', 'data_0004.csv', 'data_0005.csv'],
+                         [os.path.basename(output.path) for output in outputs])
+        self.assertEqual([1, 1, 1, 2, 2, 2], [output.repetition for output in outputs])
+        self.assertEqual([10] * 6, [output.size for output in outputs])
+        self.assertTrue(all(output.end > output.start for output in outputs))
+        return
+
+    def test_singleton(self):
+        """
+        Does get_catalog return the same catalog (and refresh close it)?
+        """
+        singletons.refresh()
+        self.assertRaises(ApeError, singletons.get_catalog, 'test')
+        filename = os.path.join(self.path, 'singleton.sqlite')
+        catalog = singletons.get_catalog('test', filename=filename)
+        self.assertIs(catalog, singletons.get_catalog('test'))
+        catalog.register('file.csv')
+        singletons.refresh()
+        self.assertIsNone(catalog._connection)
+        self.assertTrue(os.path.exists(filename))
+        return
+# end TestOutputCatalog
\ No newline at end of file
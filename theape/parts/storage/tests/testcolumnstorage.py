@@ -0,0 +1,125 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+# third party
+import numpy
+
+# this package
+from theape.parts.storage.columnstorage import ColumnStorage, read_columns, npy_header
+from theape.parts.storage.filestorage import FileStorage, name_indices
+from theape import ApeError
+
+COLUMNS = [('timestamp', 'datetime64[us]'), ('rssi', 'i2'), ('bitrate', 'f8')]
+
+class TestColumnStorage(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.storage = ColumnStorage(COLUMNS, path=self.path, buffer_rows=4)
+        self.time = datetime(2013, 11, 23, 20, 0, 5, 123)
+        name_indices.clear()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def test_header(self):
+        """
+        Is the header the same (aligned) size no matter how many rows there are?
+        """
+        dtype = numpy.dtype(COLUMNS)
+        sizes = set(len(npy_header(dtype, rows)) for rows in (0, 1, 10**6, 10**19))
+        self.assertEqual(1, len(sizes))
+        self.assertEqual(0, sizes.pop() % 64)
+        return
+
+    def test_writerow(self):
+        """
+        Can numpy read the rows back (as a memmap)?
+        """
+        opened = self.storage.open('wifi.npy')
+        self.assertEqual(os.path.join(self.path, 'wifi.npy'), opened.name)
+        for index in range(10):
+            opened.writerow((self.time, -40 - index, 54.0))
+        opened.writerow({'timestamp': self.time, 'rssi': 0, 'bitrate': 1.5})
+        opened.close()
+
+        loaded = numpy.load(opened.name, mmap_mode='r')
+        self.assertIsInstance(loaded, numpy.memmap)
+        self.assertEqual((11,), loaded.shape)
+        self.assertEqual(range(-40, -50, -1) + [0], list(loaded['rssi']))
+        self.assertEqual(numpy.datetime64(self.time), loaded['timestamp'][0])
+        self.assertEqual(1.5, loaded['bitrate'][-1])
+        self.assertEqual(list(loaded), list(read_columns(opened.name)))
+        return
+
+    def test_writerows(self):
+        """
+        Are record-arrays written without going row by row?
+        """
+        records = numpy.zeros(100, dtype=[('bitrate', 'f8'), ('rssi', 'i4'),
+                                          ('timestamp', 'datetime64[us]'), ('extra', 'i1')])
+        records['rssi'] = numpy.arange(100)
+        opened = self.storage.open('wifi.npy')
+        opened.writerow((self.time, -1, 0))
+        opened.writerows(records)
+        opened.writerows([(self.time, 100, 0)])
+        opened.close()
+        columns = read_columns(opened.name)
+        self.assertEqual(numpy.dtype(COLUMNS), columns.dtype)
+        self.assertEqual(range(-1, 101), list(columns['rssi']))
+        return
+
+    def test_unflushed(self):
+        """
+        Does read_columns find rows written after the last header update?
+        """
+        opened = self.storage.open('wifi.npy')
+        for index in range(6):
+            opened.writerow((self.time, index, 0))
+        # the first 4 were written when the buffer filled but the header says 0
+        opened.file.flush()
+        self.assertEqual((0,), numpy.load(opened.name).shape)
+        self.assertEqual(range(4), list(read_columns(opened.name)['rssi']))
+        opened.flush()
+        self.assertEqual((6,), numpy.load(opened.name).shape)
+        opened.close()
+        self.assertEqual(0, len(read_columns(self.storage.open('empty.npy').name)))
+        return
+
+    def test_errors(self):
+        """
+        Are bad columns, rows and files reported as ApeErrors?
+        """
+        self.assertRaises(ApeError, ColumnStorage, COLUMNS)
+        self.assertRaises(ApeError, ColumnStorage, 'f8', path=self.path)
+        self.assertRaises(ApeError, self.storage.writerow, (self.time, 1, 1))
+        opened = self.storage.open('wifi.npy')
+        self.assertRaises(ApeError, opened.writerow, {'rssi': 1})
+        self.assertRaises(ApeError, opened.writerow, (self.time, 'strong', 1))
+        self.assertRaises(ApeError, opened.writerow, (self.time, 1))
+        opened.close()
+        text = os.path.join(self.path, 'text.npy')
+        with open(text, 'w') as writer:
+            writer.write('timestamp,rssi,bitrate\n')
+        self.assertRaises(ApeError, read_columns, text)
+        return
+
+    def test_compressed_storage(self):
+        """
+        Does a compressing FileStorage leave the compression extension off the raw file?
+        """
+        storage = ColumnStorage(COLUMNS, storage=FileStorage(path=self.path,
+                                                              compression='gzip'))
+        opened = storage.open('wifi.npy')
+        opened.writerow((self.time, -40, 54.0))
+        opened.close()
+        self.assertEqual(os.path.join(self.path, 'wifi.npy'), opened.name)
+        self.assertEqual([-40], list(numpy.load(opened.name)['rssi']))
+        return
+# end TestColumnStorage
\ No newline at end of file
@@ -0,0 +1,114 @@
+
+# python standard library
+import unittest
+import os
+import gzip
+import shutil
+import tempfile
+
+# this package
+from theape.parts.storage.compression import CompressedFile, CompressedReader
+from theape.parts.storage.compression import open_file, split_extension
+from theape.parts.storage.compression import GZIP, BZ2, EXTENSIONS
+from theape.parts.storage.filestorage import FileStorage, name_indices
+from theape import ApeError
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.lines = ["2013_11_23_08:00:{0:02}_PM,{1},-42\n".format(index % 60, index)
+                      for index in range(5000)]
+        name_indices.clear()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def write(self, compression, flush_size=1000, lines=None):
+        name = os.path.join(self.path, 'data.csv' + EXTENSIONS[compression])
+        writer = CompressedFile(open(name, 'wb'), compression, flush_size=flush_size)
+        for line in self.lines if lines is None else lines:
+            writer.write(line)
+        writer.close()
+        return name
+
+    def test_round_trip(self):
+        """
+        Does what's written come back out of the reader?
+        """
+        for compression in (GZIP, BZ2):
+            name = self.write(compression)
+            self.assertLess(os.path.getsize(name), len(''.join(self.lines)) / 4)
+            with open_file(name) as reader:
+                self.assertEqual(self.lines, list(reader))
+            with open_file(name) as reader:
+                self.assertEqual(self.lines[0], reader.read(len(self.lines[0])))
+                self.assertEqual(''.join(self.lines[1:]), reader.read())
+
+        # the standard library can read the gzip members too
+        self.assertEqual(''.join(self.lines), gzip.open(self.write(GZIP)).read())
+        self.assertRaises(ApeError, CompressedFile, None, 'lzma')
+        return
+
+    def test_flush_points(self):
+        """
+        Do streams ending on chunk boundaries get read?
+        """
+        for compression in (GZIP, BZ2):
+            name = self.write(compression, flush_size=1, lines=self.lines[:300])
+            for chunk_size in (1, 7, 4096):
+                reader = CompressedReader(open(name, 'rb'), compression, chunk_size=chunk_size)
+                self.assertEqual(self.lines[:300], list(reader))
+                reader.close()
+        return
+
+    def test_truncated(self):
+        """
+        Is a file that was cut off readable up to the last flush-point?
+        """
+        name = os.path.join(self.path, 'crashed.csv.gz')
+        target = open(name, 'wb')
+        writer = CompressedFile(target, GZIP, flush_size=10**9)
+        writer.writelines(self.lines[:10])
+        writer.flush()
+        writer.writelines(self.lines[10:])
+        # the crash: the last stream is never finished
+        target.close()
+        with open_file(name) as reader:
+            lines = list(reader)
+        self.assertEqual(self.lines[:10], lines[:10])
+        return
+
+    def test_split_extension(self):
+        """
+        Are compressed extensions kept with the extension before them?
+        """
+        self.assertEqual(('data', '.csv.gz'), split_extension('data.csv.gz'))
+        self.assertEqual(('data', '.bz2'), split_extension('data.bz2'))
+        self.assertEqual(('data.old', '.csv'), split_extension('data.old.csv'))
+        return
+
+    def test_file_storage(self):
+        """
+        Does the FileStorage add the extension and compress the file?
+        """
+        storage = FileStorage(path=self.path, compression=GZIP)
+        names = []
+        for repetition in range(2):
+            opened = storage.open('data.csv')
+            opened.writelines(self.lines)
+            opened.close()
+            names.append(opened.name)
+        self.assertEqual([os.path.join(self.path, 'data.csv.gz'),
+                          os.path.join(self.path, 'data_0001.csv.gz')], names)
+
+        # appending adds a new member
+        opened = storage.open('data.csv', mode='a')
+        opened.writeline('appended')
+        opened.close()
+        with open_file(names[0]) as reader:
+            self.assertEqual(self.lines + ['appended\n'], list(reader))
+        self.assertRaises(ApeError, FileStorage, path=self.path, compression='zip')
+        return
+# end TestCompression
\ No newline at end of file
@@ -18,6 +18,10 @@ class TestCsvStorage(unittest.TestCase):
         #self.mocked_file = mock_open()
         self.patcher = patch('__builtin__.open')
         self.mocked_file = self.patcher.start()
+        # FileStorage.open claims names by creating the files
+        self.os_patchers = [patch('os.open'), patch('os.close')]
+        for patcher in self.os_patchers:
+            patcher.start()
         self.path = 'folder'
         self.headers = "able baker charley".split()
         self.path = 'cow'
@@ -28,6 +32,8 @@ class TestCsvStorage(unittest.TestCase):
 
     def tearDown(self):
         self.patcher.stop()
+        for patcher in self.os_patchers:
+            patcher.stop()
         return
 
     def test_constructor(self):
@@ -133,6 +139,30 @@ class TestCsvStorage(unittest.TestCase):
         self.assertEqual(calls, writer.writerow.mock_calls)
         return
 
+    def test_write_batch(self):
+        """
+        Does it write matching rows as one block and fall back otherwise?
+        """
+        writer = MagicMock()
+        output = MagicMock()
+        self.storage._writer = writer
+        self.storage._output = output
+        rows = [dict(zip(self.headers, (index, index + 1, 'c'))) for index in range(3)]
+        self.storage.writerows(rows)
+        output.write.assert_called_once_with('0,1,c\r\n1,2,c\r\n2,3,c\r\n')
+        self.assertEqual([], writer.writerow.mock_calls)
+
+        # a missing or extra key sends the whole batch through writerow
+        output.reset_mock()
+        extra = dict(rows[0], delta=4)
+        for bad in ({'able': 1}, extra):
+            writer.reset_mock()
+            self.storage.writerows(rows[:1] + [bad])
+            self.assertEqual([call(rowdict=rows[0]), call(rowdict=bad)],
+                             writer.writerow.mock_calls)
+        self.assertEqual([], output.write.mock_calls)
+        return
+
     def test_open(self):
         """
         Does it open a file with the given filename?
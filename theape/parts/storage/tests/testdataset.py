@@ -0,0 +1,191 @@
+
+# python standard library
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# third party
+import numpy
+
+# this package
+from theape.parts.storage.dataset import DatasetExporter, DatasetReader, read_csv
+from theape.parts.storage.dataset import METADATA
+from theape.parts.storage.columnstorage import ColumnStorage
+from theape.parts.storage.filestorage import name_indices
+from theape import ApeError, FILE_TIMESTAMP
+
+# two hours either side of midnight, one row a minute
+START = datetime(2013, 11, 23, 22, 0)
+ROWS = 240
+CHUNK_ROWS = 50
+
+class TestDataset(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.root = os.path.join(self.path, 'dataset')
+        self.exporter = DatasetExporter(self.root, chunk_rows=CHUNK_ROWS)
+        self.reader = DatasetReader(self.root)
+        name_indices.clear()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def time(self, minute):
+        return START + timedelta(minutes=minute)
+
+    def write_csv(self, name='rssi.csv', rows=ROWS):
+        name = os.path.join(self.path, name)
+        with open(name, 'w') as writer:
+            writer.write('timestamp,rssi,bitrate,ssid\n')
+            for row in range(rows):
+                writer.write('{0},{1},{2},ape{3}\n'.format(self.time(row).strftime(FILE_TIMESTAMP),
+                                                           -row, row * 1.5, row % 3))
+        return name
+
+    def test_read_csv(self):
+        """
+        Are the columns typed?
+        """
+        table = read_csv(self.write_csv(rows=3))
+        self.assertEqual(('timestamp', 'rssi', 'bitrate', 'ssid'), table.dtype.names)
+        self.assertEqual(['M', 'i', 'f', 'S'], [table.dtype[name].kind
+                                                for name in table.dtype.names])
+        self.assertEqual(numpy.datetime64(self.time(2)), table['timestamp'][2])
+        self.assertEqual([0, -1, -2], list(table['rssi']))
+        self.assertEqual(['ape0', 'ape1', 'ape2'], list(table['ssid']))
+        return
+
+    def test_export(self):
+        """
+        Is the table split into date-partitions and chunks with statistics?
+        """
+        folders = self.exporter.export_csv(self.write_csv(), run='run/1', device='dut')
+        self.assertEqual([os.path.join(self.root, 'run=run_1', 'device=dut', 'date=' + date, 'rssi')
+                          for date in ('2013-11-23', '2013-11-24')], folders)
+        with open(os.path.join(folders[0], METADATA)) as reader:
+            metadata = json.load(reader)
+        self.assertEqual('timestamp', metadata['timestamp'])
+        self.assertEqual([CHUNK_ROWS, CHUNK_ROWS, 20], [chunk['rows'] for chunk in metadata['chunks']])
+        first = metadata['chunks'][0]
+        self.assertEqual('2013-11-23T22:00:00', first['min']['timestamp'])
+        self.assertEqual('2013-11-23T22:49:00', first['max']['timestamp'])
+        self.assertEqual((-49, 0), (first['min']['rssi'], first['max']['rssi']))
+        rssi = numpy.load(os.path.join(folders[1], 'chunk_00000.1.npy'))
+        self.assertEqual(range(-120, -170, -1), list(rssi))
+
+        table = self.reader.read('rssi')
+        self.assertEqual(ROWS, len(table))
+        self.assertEqual(read_csv(self.write_csv()).tolist(), table.tolist())
+        return
+
+    def test_pruning(self):
+        """
+        Are partitions and chunks outside the filters skipped?
+        """
+        self.exporter.export_csv(self.write_csv(), run=1, device='dut')
+        self.exporter.export_csv(self.write_csv(), run=2, device='tpc')
+        start, end = self.time(130), self.time(175)
+        partitions = list(self.reader.partitions(start=start, end=end))
+        self.assertEqual([('1', 'dut', '2013-11-24'), ('2', 'tpc', '2013-11-24')],
+                         [partition[:3] for partition in partitions])
+        self.assertEqual([], list(self.reader.partitions(run=3)))
+
+        chunks = [chunk for metadata, chunk in self.reader.chunks('rssi', device='dut',
+                                                                  start=start, end=end)]
+        self.assertEqual(['chunk_00000', 'chunk_00001'], [chunk.name for chunk in chunks])
+        self.assertEqual(numpy.datetime64(self.time(170)), chunks[1].minimum['timestamp'])
+
+        table = self.reader.read('rssi', columns=['timestamp', 'rssi'], device='dut',
+                                 start=start, end=end)
+        self.assertEqual(('timestamp', 'rssi'), table.dtype.names)
+        self.assertEqual(range(-130, -175, -1), list(table['rssi']))
+        self.assertIsNone(self.reader.read('rssi', start=self.time(ROWS)))
+        self.assertIsNone(self.reader.read('missing'))
+        return
+
+    def test_append(self):
+        """
+        Does exporting to the same partition add chunks (and sort the rows first)?
+        """
+        table = read_csv(self.write_csv(rows=10))
+        self.exporter.export(table[5:], 'rssi', 1, 'dut')
+        self.exporter.export(table[:5][::-1], 'rssi', 1, 'dut')
+        chunks = [chunk for metadata, chunk in self.reader.chunks('rssi')]
+        self.assertEqual([5, 5], [chunk.rows for chunk in chunks])
+        table = self.reader.read('rssi')
+        self.assertEqual(range(-5, -10, -1) + range(0, -5, -1), list(table['rssi']))
+        self.assertRaises(ApeError, self.exporter.export, table[['timestamp', 'rssi']],
+                          'rssi', 1, 'dut')
+        return
+
+    def test_promotion(self):
+        """
+        Are exports with wider strings or floats instead of ints read back together?
+        """
+        runs = ((1, 'ape', '-{0}'), (1, 'longer-ape', '-{0}.5'), (2, 'ape', '-{0}'))
+        for index, (run, ssid, rssi) in enumerate(runs):
+            name = os.path.join(self.path, 'wifi.csv')
+            with open(name, 'w') as writer:
+                writer.write('timestamp,rssi,ssid\n')
+                for row in range(3):
+                    writer.write('{0},{1},{2}\n'.format(self.time(index * 3 + row).strftime(FILE_TIMESTAMP),
+                                                         rssi.format(row), ssid))
+            self.exporter.export_csv(name, run=run, device='dut')
+        folder = os.path.join(self.root, 'run=1', 'device=dut', 'date=2013-11-23', 'wifi')
+        with open(os.path.join(folder, METADATA)) as reader:
+            metadata = json.load(reader)
+        self.assertEqual(['<f8', '|S10'],
+                         [column['dtype'] for column in metadata['columns'][1:]])
+
+        table = self.reader.read('wifi')
+        self.assertEqual(['M', 'f', 'S'], [table.dtype[name].kind for name in table.dtype.names])
+        self.assertEqual(['ape'] * 3 + ['longer-ape'] * 3 + ['ape'] * 3, list(table['ssid']))
+        self.assertEqual([0, -1, -2, -0.5, -1.5, -2.5, 0, -1, -2], list(table['rssi']))
+
+        table = numpy.zeros(1, dtype=[('timestamp', 'M8[us]'), ('rssi', 'M8[us]'),
+                                      ('ssid', 'S3')])
+        table['timestamp'] = numpy.datetime64(self.time(0))
+        self.assertRaises(ApeError, self.exporter.export, table, 'wifi', 1, 'dut')
+        return
+
+    def test_export_folder(self):
+        """
+        Are the CSV and column files exported (and the others skipped)?
+        """
+        self.write_csv()
+        self.write_csv(name='empty.csv', rows=0)
+        with open(os.path.join(self.path, 'notes.csv'), 'w') as writer:
+            writer.write('a,b\n1,2\n')
+        opened = ColumnStorage([('timestamp', 'datetime64[us]'), ('level', 'f8')],
+                               path=self.path).open('levels.npy')
+        opened.writerow((self.time(0), 0.5))
+        opened.close()
+        exported = self.exporter.export_folder(self.path, run=1, device='dut')
+        self.assertEqual(['empty.csv', 'levels.npy', 'rssi.csv'],
+                         [os.path.basename(name) for name in exported])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'run=1', 'device=dut',
+                                                     'date=2013-11-23', 'empty')))
+        self.assertEqual([0.5], list(self.reader.read('levels')['level']))
+        return
+
+    def test_errors(self):
+        """
+        Are tables without a datetime timestamp and unknown columns ApeErrors?
+        """
+        table = numpy.zeros(3, dtype=[('time', 'f8')])
+        self.assertRaises(ApeError, self.exporter.export, table, 'x', 1, 'dut')
+        table = numpy.zeros(3, dtype=[('timestamp', 'f8')])
+        self.assertRaises(ApeError, self.exporter.export, table, 'x', 1, 'dut')
+        self.exporter.export_csv(self.write_csv(rows=3), run=1, device='dut')
+        self.assertRaises(ApeError, self.reader.read, 'rssi', columns=['noise'])
+
+        # a header without rows has nothing to partition
+        table = read_csv(self.write_csv(rows=0))
+        self.assertEqual([], self.exporter.export(table, 'rssi', 2, 'dut'))
+        return
+# end TestDataset
\ No newline at end of file
@@ -3,6 +3,9 @@
 import unittest
 import shutil
 import os
+import errno
+import tempfile
+import threading
 
 # third party
 try:
@@ -12,6 +15,7 @@ except ImportError:
 
 # this package
 from theape.parts.storage.filestorage import FileStorage, AMBIGUOUS
+from theape.parts.storage.filestorage import NameIndex, name_indices
 from theape import ApeError
 
 PATH = 'ape/call'
@@ -19,6 +23,7 @@ class TestFileStorage(unittest.TestCase):
     def setUp(self):
         self.storage = FileStorage('test')
         self.mock_file = MagicMock()
+        name_indices.clear()
         return
 
     def test_constructor(self):
@@ -46,6 +51,40 @@ class TestFileStorage(unittest.TestCase):
         self.mock_file.write.assert_called_with('beta\n')
         return
 
+    def test_high_water(self):
+        """
+        Are buffered lines written together (and before other writes)?
+        """
+        storage = FileStorage('test', high_water=3)
+        storage._file = self.mock_file
+        storage.writeline('a')
+        storage.writeline(2)
+        self.assertEqual([], self.mock_file.write.mock_calls)
+        storage.writeline('c')
+        self.mock_file.write.assert_called_once_with('a\n2\nc\n')
+
+        storage.writeline('d')
+        storage.write('e')
+        self.assertEqual(['d\n', 'e'],
+                         [args[0] for name, args, kwargs in self.mock_file.write.mock_calls[1:]])
+        storage.writeline('f')
+        storage.flush()
+        self.mock_file.write.assert_called_with('f\n')
+        self.mock_file.flush.assert_called_with()
+
+        # the bytes-limit lowers the number of lines per write
+        storage.high_water_bytes = 10
+        storage.writelines(['g'])
+        for line in ('12345', '67890', 'abcde'):
+            storage.writeline(line)
+        storage.writeline('klmno')
+        self.assertEqual(1, storage.line_limit)
+        storage.writeline('pqrst')
+        storage.close()
+        self.assertEqual('pqrst\n', self.mock_file.write.mock_calls[-1][1][0])
+        self.assertEqual([], storage.buffered)
+        return
+
     def test_writelines(self):
         text = 'gamma delta sigma rho'.split()
         self.storage._file = self.mock_file
@@ -58,7 +97,7 @@ class TestFileStorage(unittest.TestCase):
         name = 'ummagumma.txt'
         full_name = 'test/' + name
         storage = FileStorage('test/')
-        with patch('__builtin__.open', mocked):
+        with patch('__builtin__.open', mocked), patch('os.open'), patch('os.close'):
             self.assertFalse(storage.writeable)
             opened = storage.open(name)
             self.assertTrue(opened.writeable)
@@ -85,6 +124,7 @@ class TestFileStorageOpen(unittest.TestCase):
     def setUp(self):
         self.storage = FileStorage('test')
         self.mock_file = MagicMock()
+        name_indices.clear()
         return
 
     def test_open(self):
@@ -95,7 +135,7 @@ class TestFileStorageOpen(unittest.TestCase):
         name = 'ummagumma.txt'
         full_name = 'test/' + name
         storage = FileStorage('test/')
-        with patch('__builtin__.open', mocked):
+        with patch('__builtin__.open', mocked), patch('os.open'), patch('os.close'):
             self.assertTrue(storage.closed)
             opened = storage.open(name)
             self.assertEqual(full_name, opened.name)
@@ -125,10 +165,9 @@ class TestFileStorageOpen(unittest.TestCase):
         
         storage = FileStorage('test/')
         mock_os_listdir = MagicMock()
-        mock_os_path_exists = MagicMock()
+        mock_os_open = MagicMock()
         mock_os_path_join = MagicMock()
 
-        mock_open_path_exists = True
         mock_os_listdir.return_value = ['ummagumma.txt']
         def join(path, name):
             return path + name
@@ -138,9 +177,16 @@ class TestFileStorageOpen(unittest.TestCase):
         mangled = 'test/ummagumma_0001.txt'
         un_mangled = 'test/' + name
         
+        # the un-mangled name has already been claimed
+        def claim(name, flags, mode):
+            if name == un_mangled:
+                raise OSError(errno.EEXIST, 'File exists')
+            return 3
+        mock_os_open.side_effect = claim
+
         with patch('__builtin__.open', mocked):
             with patch('os.path.join', mock_os_path_join):
-                with patch('os.path.exists', mock_os_path_exists):
+                with patch('os.open', mock_os_open), patch('os.close'):
                     with patch('os.listdir', mock_os_listdir):
                         # default behavior
                         opened = storage.open(name)
@@ -164,10 +210,71 @@ class TestFileStorageOpen(unittest.TestCase):
         return
 # end class TestFileStorageOpen
 
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.index = NameIndex(self.path)
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def touch(self, name):
+        open(os.path.join(self.path, name), 'w').close()
+        return
+
+    def test_seed(self):
+        """
+        Does it find the highest count in the directory only once?
+        """
+        for name in 'ape.csv ape_0001.csv ape_0007.csv ape_0002.txt other.csv'.split():
+            self.touch(name)
+        self.assertEqual({('ape', '.csv'): 7, ('ape', '.txt'): 2}, self.index.counts)
+        with patch('os.listdir') as listdir:
+            self.assertEqual(os.path.join(self.path, 'ape_0008.csv'),
+                             self.index.claim('ape.csv'))
+            self.assertEqual(listdir.mock_calls, [])
+        return
+
+    def test_claim(self):
+        """
+        Does it create the files and step around names taken outside of the index?
+        """
+        first = self.index.claim('ape.csv')
+        self.assertEqual(os.path.join(self.path, 'ape.csv'), first)
+        self.assertTrue(os.path.isfile(first))
+        self.assertEqual(os.path.join(self.path, 'ape_0001.csv'), self.index.claim('ape.csv'))
+
+        # someone else took the next one
+        self.touch('ape_0002.csv')
+        self.assertEqual(os.path.join(self.path, 'ape_0003.csv'), self.index.claim('ape.csv'))
+        return
+
+    def test_threads(self):
+        """
+        Do threads sharing the index always get different names?
+        """
+        names = []
+        def claim():
+            for count in range(20):
+                names.append(self.index.claim('ape.csv'))
+            return
+        threads = [threading.Thread(target=claim) for thread in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(100, len(set(names)))
+        self.assertEqual(100, len(os.listdir(self.path)))
+        return
+# end class TestNameIndex
+
 class TestFileStorageWith(unittest.TestCase):
     def setUp(self):
         self.storage = FileStorage('test')
         self.mock_file = MagicMock()
+        name_indices.clear()
         return
 
     def test_with(self):
@@ -180,7 +287,7 @@ class TestFileStorageWith(unittest.TestCase):
         name = 'ummagumma.txt'
         full_name = 'test/' + name
         #storage = FileStorage('test/')
-        with patch('__builtin__.open', mocked):
+        with patch('__builtin__.open', mocked), patch('os.open'), patch('os.close'):
             with FileStorage(path='test', name=name) as new_storage:
                 mocked.assert_called_with(full_name, 'w')
                 self.assertEqual(open_file, new_storage.file)
@@ -0,0 +1,151 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+
+# this package
+from theape.parts.storage.journal import JournalFile, read_journal, recover
+from theape.parts.storage.journal import JOURNAL_EXTENSION
+from theape.parts.storage.filestorage import FileStorage, name_indices
+from theape import ApeError
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.name = os.path.join(self.path, 'data.csv')
+        self.now = 0
+        name_indices.clear()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def clock(self):
+        return self.now
+
+    def journal_file(self, **kwargs):
+        return JournalFile(open(self.name, 'w'), self.name, clock=self.clock, **kwargs)
+
+    def contents(self):
+        with open(self.name) as reader:
+            return reader.read()
+
+    def test_group_commit(self):
+        """
+        Does it commit by bytes and time instead of every line?
+        """
+        journal = self.journal_file(commit_bytes=10, commit_seconds=5)
+        for line in ('abc\n', 'def\n', 'ghi\n', 'j\n'):
+            journal.write(line)
+        self.assertEqual(1, journal.commits)
+        self.now = 5
+        journal.write('k\n')
+        self.assertEqual(2, journal.commits)
+        journal.close()
+        self.assertEqual(2, journal.commits)
+        entries = read_journal(self.name)
+        self.assertEqual([12, 16], [entry.offset for entry in entries])
+        self.assertEqual([3, 5], [entry.records for entry in entries])
+        return
+
+    def test_partial_line(self):
+        """
+        Does it wait for the end of a line to commit?
+        """
+        journal = self.journal_file(commit_bytes=1)
+        journal.writelines(['ab', 'cd'])
+        journal.flush()
+        self.assertEqual(0, journal.commits)
+        journal.write('\n')
+        self.assertEqual(1, journal.commits)
+        journal.write('ef')
+        journal.close()
+        self.assertEqual([5], [entry.offset for entry in read_journal(self.name)])
+        return
+
+    def test_recover(self):
+        """
+        Is the file cut back to the last commit?
+        """
+        journal = self.journal_file(commit_bytes=2**20, commit_seconds=2**20)
+        journal.write('committed\n')
+        journal.commit()
+        journal.write('not committed\ntorn li')
+        # the process dies (the data gets to the file but the journal isn't updated)
+        journal.target.flush()
+        recovered = recover(self.name)
+        self.assertEqual((self.name, 10, 1, 21), recovered)
+        self.assertEqual('committed\n', self.contents())
+        self.assertEqual(0, recover(self.name).truncated)
+        self.assertIsNone(recover(os.path.join(self.path, 'other.csv')))
+        return
+
+    def test_crash_before_commit(self):
+        """
+        Is the file emptied if it dies before the first commit?
+        """
+        journal = self.journal_file(commit_bytes=2**20, commit_seconds=2**20)
+        journal.write('not committed\ntorn li')
+        journal.target.flush()
+        self.assertEqual([], read_journal(self.name))
+        self.assertEqual((self.name, 0, 0, 21), recover(self.name))
+        self.assertEqual('', self.contents())
+        return
+
+    def test_unjournaled_file(self):
+        """
+        Is what was written without a journal kept when it's appended to?
+        """
+        with open(self.name, 'w') as writer:
+            writer.write('old\n')
+        journal = JournalFile(open(self.name, 'a'), self.name, clock=self.clock,
+                              commit_bytes=2**20, commit_seconds=2**20)
+        journal.write('torn')
+        journal.target.flush()
+        self.assertEqual((self.name, 4, 1, 4), recover(self.name))
+        self.assertEqual('old\n', self.contents())
+        return
+
+    def test_bad_entries(self):
+        """
+        Are torn entries ignored and corrupted data rolled back to an earlier commit?
+        """
+        journal = self.journal_file(commit_bytes=1)
+        for line in ('one\n', 'two\n', 'three\n'):
+            journal.write(line)
+        journal.close()
+        with open(self.name + JOURNAL_EXTENSION, 'ab') as writer:
+            writer.write('torn')
+        self.assertEqual(3, len(read_journal(self.name)))
+
+        with open(self.name, 'r+b') as writer:
+            writer.seek(9)
+            writer.write('X')
+        recovered = recover(self.name)
+        self.assertEqual(8, recovered.offset)
+        self.assertEqual('one\ntwo\n', self.contents())
+        return
+
+    def test_file_storage(self):
+        """
+        Does the FileStorage journal its files and recover them before appending?
+        """
+        self.assertRaises(ApeError, FileStorage, path=self.path, journal=True,
+                          compression='gzip')
+        storage = FileStorage(path=self.path, journal=True)
+        opened = storage.open('data.csv')
+        opened.writeline('alpha')
+        opened.close()
+        with open(self.name, 'a') as writer:
+            writer.write('garbage')
+        appended = storage.open('data.csv', mode='a')
+        appended.writeline('beta')
+        appended.close()
+        self.assertEqual('alpha\nbeta\n', self.contents())
+        self.assertEqual(11, read_journal(self.name)[-1].offset)
+        self.assertEqual(2, read_journal(self.name)[-1].records)
+        return
+# end TestJournal
\ No newline at end of file
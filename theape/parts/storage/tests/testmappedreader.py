@@ -0,0 +1,115 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# third party
+import numpy
+
+# this package
+from theape.parts.storage.mappedreader import MappedReader
+from theape import ApeError
+from theape import FILE_TIMESTAMP
+
+class TestMappedReader(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.name = os.path.join(self.path, 'wifi.csv')
+        self.start = datetime(2013, 11, 23, 11, 59, 50)
+        # three lines per timestamp, one timestamp every 2 seconds
+        self.times = [self.start + timedelta(seconds=2 * (index // 3))
+                      for index in range(60)]
+        self.lines = ["{0},{1},54.0".format(time.strftime(FILE_TIMESTAMP), -index)
+                      for index, time in enumerate(self.times)]
+        self.write('timestamp,rssi,bitrate\n' + '\n'.join(self.lines) + '\n')
+        self.reader = MappedReader(self.name)
+        return
+
+    def tearDown(self):
+        self.reader.close()
+        shutil.rmtree(self.path)
+        return
+
+    def write(self, text, name=None):
+        with open(name or self.name, 'w') as writer:
+            writer.write(text)
+        return
+
+    def expected(self, start, end):
+        return [line for line, time in zip(self.lines, self.times)
+                if start <= time < end]
+
+    def test_lines(self):
+        """
+        Does it get lines by number?
+        """
+        self.assertEqual('timestamp,rssi,bitrate', self.reader.header)
+        self.assertEqual(60, len(self.reader))
+        self.assertEqual(self.lines[0], self.reader[0])
+        self.assertEqual(self.lines[-1], self.reader[-1])
+        self.assertEqual(self.lines[5:12], self.reader[5:12])
+        self.assertEqual(self.lines[::7], self.reader[::7])
+        self.assertEqual('\n'.join(self.lines[58:]), self.reader.lines(58))
+        self.assertEqual('', self.reader.lines(10, 10))
+        self.assertRaises(IndexError, self.reader.__getitem__, 60)
+        return
+
+    def test_between(self):
+        """
+        Does the binary search find the same lines as a scan?
+        """
+        for seconds in ((0, 3), (1, 2), (4, 40), (-10, 1), (100, 200), (118, 119)):
+            start, end = [self.start + timedelta(seconds=second) for second in seconds]
+            expected = self.expected(start, end)
+            between = self.reader.between(start, end)
+            self.assertEqual(expected, between.split('\n') if between else [])
+            first, stop = self.reader.line_numbers(start, end)
+            self.assertEqual(expected, self.reader[first:stop])
+        self.assertEqual('\n'.join(self.lines), self.reader.between())
+        end = self.start + timedelta(seconds=4)
+        self.assertEqual(self.lines[:6], self.reader.between(end=end).split('\n'))
+        return
+
+    def test_timestamps(self):
+        """
+        Are the timestamps parsed for all the lines?
+        """
+        expected = numpy.array(self.times, dtype='datetime64[s]')
+        self.assertTrue((expected == self.reader.timestamps).all())
+
+        # other formats are parsed line by line
+        name = os.path.join(self.path, 'iso.csv')
+        self.write('\n'.join(time.isoformat() + ',1' for time in self.times), name)
+        with MappedReader(name, header=False, timestamp_format='%Y-%m-%dT%H:%M:%S') as reader:
+            self.assertTrue((expected == reader.timestamps).all())
+            start = self.start + timedelta(seconds=10)
+            self.assertEqual(15, reader.line_numbers(start)[0])
+        return
+
+    def test_empty(self):
+        """
+        Do empty and header-only files have no lines?
+        """
+        for text in ('', 'timestamp,rssi\n', 'timestamp,rssi'):
+            self.write(text)
+            with MappedReader(self.name) as reader:
+                self.assertEqual(0, len(reader))
+                self.assertEqual([], reader[:])
+                self.assertEqual('', reader.between(self.start))
+                self.assertEqual(0, len(reader.timestamps))
+        return
+
+    def test_errors(self):
+        """
+        Are compressed files and bad timestamps reported as ApeErrors?
+        """
+        self.assertRaises(ApeError, MappedReader, self.name + '.gz')
+        self.write('timestamp\nnot a time\n')
+        with MappedReader(self.name) as reader:
+            self.assertRaises(ApeError, reader.between, self.start)
+            self.assertRaises(ApeError, lambda: reader.timestamps)
+        return
+# end TestMappedReader
\ No newline at end of file
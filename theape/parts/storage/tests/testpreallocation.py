@@ -0,0 +1,98 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+
+# third party
+try:
+    from mock import patch
+except ImportError:
+    pass
+
+# this package
+from theape.parts.storage.preallocation import PreallocatedFile, preallocate
+from theape.parts.storage.preallocation import FALLOC_FL_KEEP_SIZE
+from theape.parts.storage.filestorage import FileStorage, name_indices
+from theape.parts.storage.compression import CompressedFile
+
+SIZE = 2**20
+BLOCK_SIZE = 512
+
+class TestPreallocation(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.name = os.path.join(self.path, 'data.csv')
+        name_indices.clear()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def allocated(self, name):
+        return os.stat(name).st_blocks * BLOCK_SIZE
+
+    def test_preallocated_file(self):
+        """
+        Are the blocks reserved without changing the size (and given back on close)?
+        """
+        opened = PreallocatedFile(self.name, 'w', SIZE)
+        if not opened.preallocated:
+            opened.close()
+            self.skipTest("fallocate isn't supported here")
+        self.assertEqual(0, os.path.getsize(self.name))
+        self.assertGreaterEqual(self.allocated(self.name), SIZE)
+        opened.write('abc\n')
+        opened.close()
+        self.assertEqual(4, os.path.getsize(self.name))
+        self.assertLess(self.allocated(self.name), SIZE)
+        with open(self.name) as reader:
+            self.assertEqual('abc\n', reader.read())
+        return
+
+    def test_unavailable(self):
+        """
+        Does the file still work if fallocate isn't there?
+        """
+        with patch('theape.parts.storage.preallocation.fallocate', None):
+            opened = PreallocatedFile(self.name, 'w', SIZE)
+            self.assertFalse(opened.preallocated)
+            opened.write('abc')
+            opened.close()
+        self.assertEqual(3, os.path.getsize(self.name))
+        self.assertFalse(preallocate(0, 0))
+        return
+
+    def test_append(self):
+        """
+        Are the blocks reserved after what's already in the file?
+        """
+        with open(self.name, 'w') as writer:
+            writer.write('abc\n')
+        with patch('theape.parts.storage.preallocation.fallocate') as fallocate:
+            fallocate.return_value = 0
+            opened = PreallocatedFile(self.name, 'a', SIZE)
+            self.assertTrue(opened.preallocated)
+            fallocate.assert_called_with(opened.fileno(), FALLOC_FL_KEEP_SIZE, 4, SIZE)
+            opened.close()
+        return
+
+    def test_file_storage(self):
+        """
+        Does the FileStorage preallocate uncompressed files when given a size-hint?
+        """
+        opened = FileStorage(path=self.path, size_hint=SIZE).open('data.csv')
+        self.assertIsInstance(opened.file, PreallocatedFile)
+        opened.writeline('alpha')
+        opened.close()
+        self.assertEqual(6, os.path.getsize(self.name))
+
+        opened = FileStorage(path=self.path, size_hint=SIZE, compression='gzip').open('data.csv')
+        self.assertIsInstance(opened.file, CompressedFile)
+        opened.close()
+        self.assertNotIsInstance(FileStorage(path=self.path).open('data.csv').file,
+                                 PreallocatedFile)
+        return
+# end TestPreallocation
\ No newline at end of file
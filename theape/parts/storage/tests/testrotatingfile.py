@@ -0,0 +1,153 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# this package
+from theape.parts.storage.rotatingfile import RotatingFile, read_segments
+from theape.parts.storage.filestorage import FileStorage, name_indices
+from theape.parts.storage.compression import open_file
+
+class TestRotatingFile(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.now = datetime(2013, 11, 23, 20, 58)
+        self.count = 0
+        name_indices.clear()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def clock(self):
+        return self.now
+
+    def opener(self):
+        self.count += 1
+        name = os.path.join(self.path, 'data_{0:04}.csv'.format(self.count))
+        return name, open(name, 'w')
+
+    def rotating_file(self, **kwargs):
+        name = os.path.join(self.path, 'data.csv')
+        return RotatingFile(open(name, 'w'), name, self.opener, clock=self.clock,
+                            **kwargs)
+
+    def contents(self):
+        contents = []
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith('.csv'):
+                with open(os.path.join(self.path, name)) as reader:
+                    contents.append(reader.read())
+        return contents
+
+    def test_max_bytes(self):
+        """
+        Does it start a new file once the current one is big enough?
+        """
+        rotating = self.rotating_file(max_bytes=10)
+        for line in ('abcdef\n', 'ghijkl\n', 'mn\n', 'op\n', 'qr\n', 'st\n'):
+            rotating.write(line)
+        rotating.close()
+        self.assertEqual(['abcdef\nghijkl\n', 'mn\nop\nqr\nst\n'], self.contents())
+        return
+
+    def test_partial_lines(self):
+        """
+        Does it wait for the end of the line to rotate?
+        """
+        rotating = self.rotating_file(max_bytes=1)
+        rotating.writelines(['ab', 'cd', '\n', 'ef\n'])
+        rotating.close()
+        self.assertEqual(['abcd\n', 'ef\n'], self.contents())
+        return
+
+    def test_max_seconds(self):
+        """
+        Does it rotate once the first write is old enough?
+        """
+        rotating = self.rotating_file(max_seconds=60)
+        for second in (0, 30, 59, 60, 61, 119, 120):
+            self.now = datetime(2013, 11, 23, 20, 0) + timedelta(seconds=second)
+            rotating.write("{0}\n".format(second))
+        rotating.close()
+        self.assertEqual(['0\n30\n59\n', '60\n61\n119\n', '120\n'], self.contents())
+        return
+
+    def test_hourly(self):
+        """
+        Does it rotate at the top of the hour?
+        """
+        rotating = self.rotating_file(hourly=True)
+        for minute in (58, 59, 60, 61, 120):
+            self.now = datetime(2013, 11, 23, 20, 0) + timedelta(minutes=minute)
+            rotating.write("{0}\n".format(minute))
+        rotating.close()
+        self.assertEqual(['58\n59\n', '60\n61\n', '120\n'], self.contents())
+        return
+
+    def test_index(self):
+        """
+        Does the index list the segments and their times?
+        """
+        rotating = self.rotating_file(max_bytes=1)
+        index_name = os.path.join(self.path, 'data.csv.segments')
+        rotating.write('a\n')
+        self.now += timedelta(seconds=1)
+        rotating.write('b\n')
+
+        # the current segment has no end until it's closed
+        segments = read_segments(index_name)
+        self.assertEqual(2, len(segments))
+        self.assertEqual(os.path.join(self.path, 'data.csv'), segments[0].name)
+        self.assertEqual(self.now - timedelta(seconds=1), segments[0].start)
+        self.assertEqual(self.now - timedelta(seconds=1), segments[0].end)
+        self.assertEqual(self.now, segments[1].start)
+        self.assertIsNone(segments[1].end)
+
+        rotating.close()
+        segments = read_segments(index_name)
+        self.assertEqual(self.now, segments[1].end)
+        self.assertEqual([1, 1], [segment.lines for segment in segments])
+        self.assertEqual([2, 2], [segment.bytes for segment in segments])
+        self.assertFalse(os.path.exists(index_name + '.tmp'))
+        return
+
+    def test_file_storage(self):
+        """
+        Does the FileStorage rotate (compressed) files using safe_name?
+        """
+        storage = FileStorage(path=self.path, compression='gzip', max_bytes=100)
+        opened = storage.open('data.csv')
+        lines = ["{0:09}\n".format(index) for index in range(25)]
+        for line in lines:
+            opened.write(line)
+        opened.close()
+        segments = read_segments(os.path.join(self.path, 'data.csv.gz.segments'))
+        self.assertEqual(['data.csv.gz', 'data_0001.csv.gz', 'data_0002.csv.gz'],
+                         [os.path.basename(segment.name) for segment in segments])
+        read = []
+        for segment in segments:
+            with open_file(segment.name) as reader:
+                read.extend(reader)
+        self.assertEqual(lines, read)
+        return
+
+    def test_index_names(self):
+        """
+        Do files that only differ by extension get their own index?
+        """
+        storage = FileStorage(path=self.path, max_bytes=1)
+        for name in ('data.csv', 'data.log'):
+            opened = storage.open(name)
+            opened.writelines(['a\n', 'b\n'])
+            opened.close()
+        for extension in ('.csv', '.log'):
+            segments = read_segments(os.path.join(self.path, 'data{0}.segments'.format(extension)))
+            self.assertEqual(['data' + extension, 'data_0001' + extension],
+                             [os.path.basename(segment.name) for segment in segments])
+        return
+# end TestRotatingFile
\ No newline at end of file
@@ -0,0 +1,160 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+# third party
+from mock import patch
+
+# this package
+from theape.parts.storage.shardedstorage import ShardedStorage, TimestampKey, SHARD_EXTENSION
+from theape.parts.storage.filestorage import FileStorage, name_indices
+from theape import ApeError, FILE_TIMESTAMP
+
+START = datetime(2013, 11, 23, 20, 0)
+THREADS = 4
+LINES = 100
+
+class TestTimestampKey(unittest.TestCase):
+    def test_call(self):
+        """
+        Does it parse the first column (and return None if it isn't a timestamp)?
+        """
+        key = TimestampKey()
+        text = START.strftime(FILE_TIMESTAMP)
+        self.assertEqual(START, key('{0},1,2\n'.format(text)))
+        self.assertEqual(START, key('{0},3,4\n'.format(text)))
+        self.assertIsNone(key('timestamp,a,b\n'))
+        self.assertEqual(START, key('{0}\n'.format(text)))
+        return
+# end TestTimestampKey
+
+class TestShardedStorage(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        name_indices.clear()
+        self.storage = ShardedStorage(path=self.path)
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def line(self, second, thread):
+        timestamp = (START + timedelta(seconds=second)).strftime(FILE_TIMESTAMP)
+        return '{0},{1}'.format(timestamp, thread)
+
+    def read(self, name='data.csv'):
+        with open(os.path.join(self.path, name)) as reader:
+            return reader.read().splitlines()
+
+    def test_constructor(self):
+        """
+        Does it need a path or storage (and build the FileStorage from the path)?
+        """
+        self.assertRaises(ApeError, ShardedStorage)
+        self.assertIsInstance(self.storage.storage, FileStorage)
+        self.assertEqual(self.path, self.storage.storage.path)
+        storage = FileStorage(path=self.path)
+        self.assertIs(storage, ShardedStorage(storage=storage).storage)
+        return
+
+    def test_threads(self):
+        """
+        Does each thread get its own shard and are they merged in time-order?
+        """
+        opened = self.storage.open('data.csv')
+        shards = {}
+
+        def write(thread):
+            # the threads take turns at the seconds so every line interleaves
+            for second in range(thread, LINES * THREADS, THREADS):
+                opened.writeline(self.line(second, thread))
+            shards[thread] = opened.shard
+            return
+
+        threads = [threading.Thread(target=write, args=(thread,)) for thread in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(THREADS, len(set(id(shard) for shard in shards.values())))
+        opened.close()
+        expected = [self.line(second, second % THREADS) for second in range(LINES * THREADS)]
+        self.assertEqual(expected, self.read())
+        self.assertEqual(['data.csv'], os.listdir(self.path))
+
+        # closing again does nothing
+        opened.close()
+        return
+
+    def test_header(self):
+        """
+        Do un-timestamped lines come first or stay with the line before them?
+        """
+        opened = self.storage.open('data.csv')
+        opened.writeline('timestamp,thread')
+        opened.writelines([self.line(2, 0) + '\n', 'note\n'])
+
+        def write():
+            opened.write(self.line(1, 1) + '\n')
+            opened.writeline(self.line(3, 1))
+            return
+        thread = threading.Thread(target=write)
+        thread.start()
+        thread.join()
+        opened.close()
+        self.assertEqual(['timestamp,thread', self.line(1, 1), self.line(2, 0), 'note',
+                          self.line(3, 1)], self.read())
+        return
+
+    def test_timestamp_format(self):
+        """
+        Are the lines parsed with the timestamp-format (not the storage's file-name format)?
+        """
+        file_storage = FileStorage(path=self.path, timestamp='%Y%m%d')
+        for arguments, line_format in (({}, FILE_TIMESTAMP),
+                                       ({'timestamp_format': '%H:%M:%S'}, '%H:%M:%S')):
+            storage = ShardedStorage(storage=file_storage, **arguments)
+            lines = ['{0},{1}'.format((START + timedelta(seconds=second)).strftime(line_format),
+                                      second) for second in range(4)]
+            opened = storage.open('{0}.csv'.format(len(line_format)))
+
+            def write(thread):
+                opened.writelines(line + '\n' for line in lines[thread::2])
+                return
+            for thread in (1, 0):
+                writer = threading.Thread(target=write, args=(thread,))
+                writer.start()
+                writer.join()
+            opened.close()
+            self.assertEqual(lines, self.read(os.path.basename(opened.output.name)))
+        return
+
+    def test_unopened(self):
+        """
+        Does writing to an unopened (or closed) storage raise an ApeError?
+        """
+        self.assertRaises(ApeError, self.storage.writeline, 'abc')
+        opened = self.storage.open('data.csv')
+        opened.close()
+        self.assertRaises(ApeError, opened.write, 'abc')
+        return
+
+    def test_failed_merge(self):
+        """
+        Are the shards deleted if the output can't be written?
+        """
+        opened = self.storage.open('data.csv')
+        opened.writeline('abc')
+        with patch.object(FileStorage, 'open', side_effect=IOError('disk full')):
+            self.assertRaises(IOError, opened.close)
+        self.assertTrue(opened.closed)
+        self.assertEqual([], [name for name in os.listdir(self.path)
+                              if name.endswith(SHARD_EXTENSION)])
+        return
+# end TestShardedStorage
\ No newline at end of file
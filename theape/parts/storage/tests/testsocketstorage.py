@@ -6,7 +6,7 @@ import textwrap
 
 # third-party
 try:
-    from mock import patch, MagicMock
+    from mock import patch, MagicMock, call
 except ImportError:
     pass
 
@@ -155,6 +155,46 @@ class TestSocketStorage(unittest.TestCase):
         self.assertRaises(ApeError, self.storage.writelines, '')
         return
 
+    def test_writev(self):
+        """
+        Does it flush the file and send the buffers with the socket (or write them if there isn't one)?
+        """
+        data = bytearray('efgh')
+        self.assertEqual(8, self.storage.writev(['abcd', data]))
+        self.socket.flush.assert_called_with()
+        self.assertEqual([(('abcd',),), ((data,),)],
+                         self.socket._sock.sendall.call_args_list)
+        self.assertFalse(self.socket.write.called)
+
+        channel = MagicMock(spec=['write'])
+        storage = SocketStorage(channel)
+        self.assertEqual(4, storage.write_bytes(memoryview('abcd')))
+        channel.write.assert_called_with('abcd')
+        return
+
+    def test_writev_error(self):
+        """
+        Does it raise an ApeError on socket.error?
+        """
+        self.socket._sock.sendall.side_effect = socket.error
+        self.assertRaises(ApeError, self.storage.writev, 'abcd')
+        return
+
+    def test_writev_buffered(self):
+        """
+        Are lines buffered by writeline sent before the buffers?
+        """
+        self.storage.high_water = 10
+        self.storage.reset_buffer()
+        self.storage.writeline('first')
+        self.assertFalse(self.socket.write.called)
+        self.storage.writev(['second\n'])
+        self.assertEqual([call.write('first\n'), call.flush(), call._sock.sendall('second\n')],
+                         [method for method in self.socket.mock_calls
+                          if method[0] in ('write', 'flush', '_sock.sendall')])
+        self.assertEqual([], self.storage.buffered)
+        return
+
     def test_iter(self):
         """
         Does it traverse the socket output?
@@ -1,6 +1,8 @@
 
 # python standard library
 import unittest
+import threading
+from StringIO import StringIO
 
 # third-party
 try:
@@ -10,6 +12,7 @@ except ImportError:
 
 # this package
 from theape.parts.storage.storagecomposite import StorageComposite
+from theape.parts.storage.asyncwriter import FLUSH_SIZE
 from theape import ApeError
 
 class TestStorageComposite(unittest.TestCase):
@@ -68,4 +71,87 @@ class TestStorageComposite(unittest.TestCase):
         self.opened.close.assert_called_with()
         self.assertIsNone(self.composite.open_storages)
         self.composite.close()
-        return
\ No newline at end of file
+        return
+# end TestStorageComposite
+
+class BlockedFile(StringIO):
+    """
+    A file whose writes wait until it's released
+    """
+    def __init__(self):
+        StringIO.__init__(self)
+        self.released = threading.Event()
+        return
+
+    def write(self, text):
+        self.released.wait()
+        StringIO.write(self, text)
+        return
+
+    def close(self):
+        self.contents = self.getvalue()
+        StringIO.close(self)
+        return
+
+
+class BrokenFile(StringIO):
+    def write(self, text):
+        raise IOError("broken pipe")
+
+
+class TestThreadedComposite(unittest.TestCase):
+    def setUp(self):
+        self.composite = StorageComposite(threaded=True, queue_size=2)
+        self.file = BlockedFile()
+        self.file.released.set()
+        self.screen = BlockedFile()
+        return
+
+    def storage(self, opened):
+        storage = MagicMock()
+        storage.open.return_value = opened
+        self.composite.add(storage)
+        return storage
+
+    def test_fan_out(self):
+        """
+        Does a blocked dropping sink leave the other sinks alone?
+        """
+        self.storage(self.file)
+        self.composite.add(self.storage(self.screen), drop=True)
+        self.composite.open('ape.csv')
+        # lines big enough to be written (and block) as soon as they're queued
+        lines = ["{0}\n".format(index) * FLUSH_SIZE for index in range(10)]
+        for line in lines:
+            self.composite.write(line)
+        self.composite.writelines(['a\n', 'b\n'])
+        health = self.composite.health
+        self.assertEqual(2, len(health))
+        self.assertTrue(all(sink.alive for sink in health))
+        self.assertGreater(health[1].dropped, 0)
+        self.assertEqual(0, health[0].dropped)
+
+        self.screen.released.set()
+        self.composite.close()
+        self.assertEqual(''.join(lines) + 'a\nb\n', self.file.contents)
+        self.assertLess(len(self.screen.contents), len(self.file.contents))
+        self.assertEqual([], self.composite.health)
+        return
+
+    def test_dead_sink(self):
+        """
+        Is a sink whose thread died skipped?
+        """
+        self.storage(self.file)
+        self.storage(BrokenFile())
+        self.composite.open('ape.csv')
+        for index in range(20):
+            self.composite.write('line\n')
+        broken = self.composite.open_storages[1]
+        broken.thread.join()
+        self.composite.write('last\n')
+        self.assertFalse(self.composite.health[1].alive)
+        self.composite.close()
+        self.assertEqual('line\n' * 20 + 'last\n', self.file.contents)
+        return
+# end TestThreadedComposite
\ No newline at end of file
@@ -0,0 +1,145 @@
+
+# python standard library
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+
+# third party
+try:
+    from mock import patch
+except ImportError:
+    pass
+
+# this package
+from theape.parts.storage.vectored import writev, readable, to_string, IOV_MAX
+from theape.parts.storage.filestorage import FileStorage, name_indices
+from theape.parts.storage.compression import open_file
+from theape import ApeError
+
+BUFFERS = ['ab', bytearray('cd'), buffer('xxef', 2), memoryview('gh'), '']
+EXPECTED = 'abcdefgh'
+
+class TestWritev(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.name = os.path.join(self.path, 'data.bin')
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def written(self, buffers):
+        descriptor = os.open(self.name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+        try:
+            count = writev(descriptor, buffers)
+        finally:
+            os.close(descriptor)
+        with open(self.name, 'rb') as reader:
+            return count, reader.read()
+
+    def test_buffers(self):
+        """
+        Are all the kinds of buffers written in order?
+        """
+        self.assertEqual((len(EXPECTED), EXPECTED), self.written(BUFFERS))
+        return
+
+    def test_partial(self):
+        """
+        Does it keep writing when a call doesn't take everything (or there are too many buffers)?
+        """
+        buffers = ['a' * 2**16, 'b' * 10, 'c' * 2**17] * 2 + ['d'] * (IOV_MAX + 5)
+        expected = ''.join(buffers)
+        reader, writer = os.pipe()
+        output = []
+        # the pipe only holds 64K so the writes get cut off until it's read
+        thread = threading.Thread(target=lambda: output.append(os.fdopen(reader).read()))
+        thread.start()
+        count = writev(writer, buffers)
+        os.close(writer)
+        thread.join()
+        self.assertEqual(len(expected), count)
+        self.assertEqual(expected, output[0])
+        return
+
+    def test_unavailable(self):
+        """
+        Does it fall back to os.write if the C-library's writev isn't there?
+        """
+        with patch('theape.parts.storage.vectored.c_writev', None):
+            self.assertEqual((len(EXPECTED), EXPECTED), self.written(BUFFERS))
+        return
+
+    def test_to_string(self):
+        """
+        Are the buffers copied to strings (and strings left alone)?
+        """
+        self.assertEqual(['ab', 'cd', 'ef', 'gh', ''], [to_string(data) for data in BUFFERS])
+        self.assertIs(BUFFERS[0], to_string(BUFFERS[0]))
+        return
+
+    def test_readable(self):
+        """
+        Are only the immutable buffers written in place?
+        """
+        self.assertEqual(['ab', 'cd', 'ef', 'gh', ''], [str(readable(data)) for data in BUFFERS])
+        self.assertIs(BUFFERS[0], readable(BUFFERS[0]))
+        self.assertIs(BUFFERS[2], readable(BUFFERS[2]))
+
+        # another thread could resize a bytearray while writev reads it
+        data = bytearray('cd')
+        copy = readable(data)
+        self.assertIs(str, type(copy))
+        data[:] = ''
+        self.assertEqual('cd', copy)
+        return
+# end TestWritev
+
+class TestFileStorageWritev(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        name_indices.clear()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        return
+
+    def test_plain(self):
+        """
+        Are the buffers written after what the storage and file were holding?
+        """
+        opened = FileStorage(path=self.path, high_water=10).open('data.bin')
+        opened.writeline('header')
+        opened.write('text,')
+        self.assertEqual(len(EXPECTED), opened.writev(BUFFERS))
+        self.assertEqual(2, opened.write_bytes(bytearray('ij')))
+        opened.close()
+        with open(opened.name) as reader:
+            self.assertEqual('header\ntext,' + EXPECTED + 'ij', reader.read())
+        return
+
+    def test_wrapped(self):
+        """
+        Do wrapped files (e.g. compressed) get the buffers through their `write`?
+        """
+        opened = FileStorage(path=self.path, compression='gzip').open('data.bin')
+        self.assertEqual(len(EXPECTED), opened.writev(BUFFERS))
+        opened.close()
+        self.assertEqual(EXPECTED, open_file(opened.name).read())
+        return
+
+    def test_closed(self):
+        """
+        Does writing to a closed or unopened storage raise an ApeError?
+        """
+        storage = FileStorage(path=self.path)
+        self.assertRaises(ApeError, storage.writev, BUFFERS)
+        opened = storage.open('data.bin')
+        opened.close()
+        self.assertRaises(ApeError, opened.write_bytes, 'abc')
+        return
+# end TestFileStorageWritev
\ No newline at end of file
@@ -0,0 +1,143 @@
+
+# python standard library
+import ctypes
+import ctypes.util
+import errno
+import os
+
+# the linux limit on buffers per call
+IOV_MAX = 1024
+
+class IOVec(ctypes.Structure):
+    """
+    The C `struct iovec`
+    """
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+def load_writev():
+    """
+    Gets the C-library's writev
+
+    :return: the function or None if it isn't available
+    """
+    name = ctypes.util.find_library('c')
+    if name is None:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+    except OSError:
+        return None
+    function = getattr(libc, 'writev', None)
+    if function is not None:
+        function.argtypes = [ctypes.c_int, ctypes.POINTER(IOVec), ctypes.c_int]
+        function.restype = ctypes.c_ssize_t
+    return function
+
+c_writev = load_writev()
+
+as_read_buffer = ctypes.pythonapi.PyObject_AsReadBuffer
+as_read_buffer.argtypes = [ctypes.py_object, ctypes.POINTER(ctypes.c_void_p),
+                           ctypes.POINTER(ctypes.c_ssize_t)]
+as_read_buffer.restype = ctypes.c_int
+
+def readable(data):
+    """
+    Makes sure the data can be given to `address` and `os.write`
+
+    :param:
+
+     - `data`: str, bytearray, buffer or memoryview
+
+    :return: data (memoryviews and bytearrays are copied to strings)
+    """
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    if isinstance(data, bytearray):
+        # mutable so it could be resized while writev (without the GIL) reads it
+        return str(data)
+    return data
+
+def to_string(data):
+    """
+    Copies the data to a string (for file-like objects that only take strings)
+
+    :param:
+
+     - `data`: str, bytearray, buffer or memoryview
+
+    :return: str (the same object if it was already a string)
+    """
+    if type(data) is str:
+        return data
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    return str(data)
+
+def address(data):
+    """
+    Gets the location of the data's bytes (without copying them)
+
+    :param:
+
+     - `data`: object with the read-buffer interface (str, bytearray, buffer)
+
+    :return: (address, size)
+    :raise: TypeError if the data doesn't have the buffer interface
+    """
+    pointer = ctypes.c_void_p()
+    size = ctypes.c_ssize_t()
+    as_read_buffer(data, ctypes.byref(pointer), ctypes.byref(size))
+    return pointer.value, size.value
+
+def system_writev(descriptor, buffers):
+    """
+    Makes one call to write the buffers
+
+    :param:
+
+     - `descriptor`: file-descriptor to write to
+     - `buffers`: list of (no more than IOV_MAX) readable buffers
+
+    :return: number of bytes written
+    :raise: OSError if the write fails
+    """
+    if c_writev is None:
+        return os.write(descriptor, buffers[0])
+    vector = (IOVec * len(buffers))()
+    for index, data in enumerate(buffers):
+        vector[index].iov_base, vector[index].iov_len = address(data)
+    while True:
+        written = c_writev(descriptor, vector, len(buffers))
+        if written >= 0:
+            return written
+        error = ctypes.get_errno()
+        if error != errno.EINTR:
+            raise OSError(error, os.strerror(error))
+
+def writev(descriptor, buffers):
+    """
+    Writes all the buffers to the file-descriptor without joining them
+
+    :param:
+
+     - `descriptor`: file-descriptor to write to
+     - `buffers`: iterable of str, bytearray, buffer or memoryview
+
+    :return: number of bytes written
+    :raise: OSError if a write fails
+    """
+    buffers = [readable(data) for data in buffers if len(data)]
+    total = 0
+    while buffers:
+        written = system_writev(descriptor, buffers[:IOV_MAX])
+        total += written
+        # drop the buffers that were written and trim the one that was cut off
+        index = 0
+        while index < len(buffers) and written >= len(buffers[index]):
+            written -= len(buffers[index])
+            index += 1
+        buffers = buffers[index:]
+        if written:
+            buffers[0] = buffer(buffers[0], written)
+    return total
\ No newline at end of file
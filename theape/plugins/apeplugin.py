@@ -2,7 +2,14 @@
 # python standard library
 import re
 import os
-from collections import OrderedDict
+import glob
+import itertools
+import hashlib
+import stat
+import tempfile
+import multiprocessing
+import cPickle as pickle
+from collections import OrderedDict, namedtuple
 
 # third party
 from configobj import ConfigObj
@@ -16,7 +23,7 @@ from theape.infrastructure.configurationmap import ConfigurationMap
 from theape.components.component import Composite
 from theape.parts.storage.filestorage import FileStorage
 
-from base_plugin import BasePlugin
+from base_plugin import BasePlugin, SubConfigurationConstants
 from theape.infrastructure.code_graphs import module_diagram, class_diagram
 from theape.infrastructure.errors import ApeError, DontCatchError, ConfigurationError
 from theape import APESECTION, MODULES_SECTION, BLUE_WARNING
@@ -35,6 +42,7 @@ class OperatorConfigurationConstants(object):
     settings_section = 'SETTINGS'
     operations_section = 'OPERATIONS'
     plugins_section = "PLUGINS"
+    sweep_section = 'SWEEP'
 
     # options
     repetitions_option = 'repetitions'
@@ -44,6 +52,7 @@ class OperatorConfigurationConstants(object):
     subfolder_option = 'subfolder'
     modules_option = 'external_modules'
     timestamp_option = 'timestamp'
+    catalog_option = 'catalog'
     plugin_option = 'plugin'
     
     # defaults
@@ -54,6 +63,7 @@ class OperatorConfigurationConstants(object):
     default_subfolder = None
     default_modules = None
     default_timestamp = None
+    default_catalog = None
 
     #extra
     file_storage_name = 'infrastructure'
@@ -67,6 +77,7 @@ end_time = absolute_time(default=None)
 subfolder = string(default=None)
 external_modules = string_list(default=None)
 timestamp = string(default=None)
+catalog = string(default=None)
 
 [OPERATIONS]
 __many__ = force_list
@@ -74,6 +85,10 @@ __many__ = force_list
 [PLUGINS]
  [[__many__]]
  plugin = string
+
+[SWEEP]
+ [[__many__]]
+ __many__ = force_list
 """
 
 class OperatorConfigspec(object):
@@ -105,22 +120,285 @@ class OperatorConfigspec(object):
             self._validator = time_validator
         return self._validator
 
+def compiled_folder():
+    """
+    The per-user folder for compiled configurations
+
+    :return: path to `COMPILED_FOLDER` in $XDG_CACHE_HOME (or ~/.cache)
+    """
+    cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache, COMPILED_FOLDER)
+
+class CompiledConfiguration(BaseClass):
+    """
+    A pickled copy of a validated configuration keyed by its source's digest
+    """
+    def __init__(self, source, configspec=None, folder=None):
+        """
+        CompiledConfiguration constructor
+
+        :param:
+
+         - `source`: name of the configuration file
+         - `configspec`: OperatorConfigspec to re-convert the time options with
+         - `folder`: where to keep the pickles (default is `compiled_folder()`)
+        """
+        super(CompiledConfiguration, self).__init__()
+        self.source = source
+        self._configspec = configspec
+        self.folder = folder if folder is not None else compiled_folder()
+        self._digest = None
+        self._filename = None
+        return
+
+    @property
+    def configspec(self):
+        """
+        OperatorConfigspec (to re-convert the time options)
+        """
+        if self._configspec is None:
+            self._configspec = OperatorConfigspec()
+        return self._configspec
+
+    @property
+    def digest(self):
+        """
+        sha1 hex-digest of the pickle-format, configspec and source file's contents
+        """
+        if self._digest is None:
+            digest = hashlib.sha1(str(COMPILED_FORMAT))
+            digest.update(config_spec)
+            with open(self.source, 'rb') as reader:
+                digest.update(reader.read())
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    @property
+    def filename(self):
+        """
+        name of the pickle-file (in the cache folder)
+        """
+        if self._filename is None:
+            # the path's digest keeps same-named files in different folders apart
+            path_digest = hashlib.sha1(os.path.realpath(self.source)).hexdigest()
+            name = "{0}.{1}{2}".format(os.path.basename(self.source), path_digest,
+                                       CACHE_EXTENSION)
+            self._filename = os.path.join(self.folder, name)
+        return self._filename
+
+    def private(self, name):
+        """
+        Checks that only the user can change the file or folder
+
+        :param:
+
+         - `name`: path to check
+
+        :return: True if the user owns it and no one else can write to it
+        """
+        status = os.stat(name)
+        return (status.st_uid == os.getuid() and
+                not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+    def load(self):
+        """
+        Loads the pickled configuration if it was built from the current source
+
+        :return: validated ConfigObj or None if there isn't a usable copy
+        """
+        if not os.path.isfile(self.filename):
+            return
+        if not (self.private(self.folder) and self.private(self.filename)):
+            self.logger.warning("Not loading '{0}' (other users can change it)".format(self.filename))
+            return
+        try:
+            with open(self.filename, 'rb') as reader:
+                digest, configuration, unconverted = pickle.load(reader)
+        except Exception as error:
+            # a corrupt or out-of-date pickle is just a cache-miss
+            self.logger.debug(error)
+            return
+        if digest != self.digest:
+            self.logger.debug("'{0}' is out of date".format(self.filename))
+            return
+        # the relative times have to be converted as of now, not when they were pickled
+        for (section, option), value in unconverted.iteritems():
+            check = self.configspec.configspec[section][option]
+            configuration[section][option] = self.configspec.validator.check(check, value)
+        self.logger.debug("Loaded compiled configuration '{0}'".format(self.filename))
+        return configuration
+
+    def dump(self, configuration, unconverted=None):
+        """
+        Pickles the configuration along with the digest
+
+        :param:
+
+         - `configuration`: validated ConfigObj built from the source
+         - `unconverted`: dict of (section, option): string for options to convert on loading
+        """
+        if unconverted is None:
+            unconverted = {}
+        try:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder, PRIVATE_FOLDER)
+            if not self.private(self.folder):
+                self.logger.warning("Not saving to '{0}' (other users can change it)".format(self.folder))
+                return
+            # write to a temporary file and rename it so readers never see a partial pickle
+            descriptor, temporary = tempfile.mkstemp(dir=self.folder)
+            with os.fdopen(descriptor, 'wb') as writer:
+                pickle.dump((self.digest, configuration, unconverted), writer,
+                            pickle.HIGHEST_PROTOCOL)
+            os.rename(temporary, self.filename)
+        except Exception as error:
+            self.logger.debug(error)
+            self.logger.warning("Unable to save compiled configuration '{0}'".format(self.filename))
+        return
+# end class CompiledConfiguration
+
+ConfigurationFragment = namedtuple('ConfigurationFragment', 'filename operations plugins')
+
+def load_fragment(filename):
+    """
+    Parses and validates a configuration fragment
+
+    :param:
+
+     - `filename`: name of a file matching the config_glob
+
+    :return: ConfigurationFragment with (name, value) lists for the operations and plugins
+    :raise: ConfigurationError if the fragment can't be parsed
+    """
+    try:
+        configuration = OperatorConfiguration(filename, use_cache=False).configuration
+    except Exception as error:
+        raise ConfigurationError("Unable to load '{0}' ({1}: {2})".format(filename,
+                                                                          error.__class__.__name__,
+                                                                          error))
+    operations = configuration[constants.operations_section]
+    plugins = configuration[constants.plugins_section]
+
+    # the sections are turned into lists so they'll keep their order when pickled
+    return ConfigurationFragment(filename=filename,
+                                 operations=[(name, operations[name])
+                                             for name in operations.scalars],
+                                 plugins=[(name, plugins[name].dict())
+                                          for name in plugins.sections])
+
+class SweepConfiguration(BaseClass):
+    """
+    Expands the SWEEP section into plugins-sections for each point
+    """
+    def __init__(self, sweep_section, plugins_section):
+        """
+        SweepConfiguration constructor
+
+        :param:
+
+         - `sweep_section`: the validated SWEEP section
+         - `plugins_section`: the PLUGINS section to take the swept sections from
+        """
+        super(SweepConfiguration, self).__init__()
+        self.sweep_section = sweep_section
+        self.plugins_section = plugins_section
+        self._axes = None
+        self._swept_sections = None
+        return
+
+    @property
+    def axes(self):
+        """
+        List of (section, option, values) tuples for the swept options
+
+        :raise: ConfigurationError if a swept section isn't in the PLUGINS or has no values
+        """
+        if self._axes is None:
+            axes = []
+            for section in self.sweep_section.sections:
+                if section not in self.plugins_section:
+                    raise ConfigurationError("[SWEEP] section '{0}' not found in [PLUGINS]".format(section))
+                for option in self.sweep_section[section].scalars:
+                    values = self.sweep_section[section][option]
+                    if not values:
+                        raise ConfigurationError("[SWEEP] option '{0}' in section '{1}' has no values".format(option,
+                                                                                                              section))
+                    axes.append((section, option, values))
+            self._axes = axes
+        return self._axes
+
+    @property
+    def swept_sections(self):
+        """
+        Set of plugin-section names that change from point to point
+
+        This includes the sections that update (directly or through a
+        chain of `updates_section`) a swept section.
+        """
+        if self._swept_sections is None:
+            swept = set(section for section, option, values in self.axes)
+            updates_option = SubConfigurationConstants.updates_section_option
+            for name in self.plugins_section.sections:
+                chain = set()
+                section = name
+                while section is not None and section in self.plugins_section and section not in chain:
+                    if section in swept:
+                        swept.update(chain)
+                        break
+                    chain.add(section)
+                    section = self.plugins_section[section].get(updates_option)
+            self._swept_sections = swept
+        return self._swept_sections
+
+    def __len__(self):
+        """
+        The number of points in the sweep
+        """
+        return reduce(lambda count, axis: count * len(axis[2]), self.axes, 1)
+
+    def __iter__(self):
+        """
+        Generates (label, plugins-section) pairs for each point of the sweep
+
+        The plugins-section is a dict that shares the un-swept sections with
+        the PLUGINS section and has copies of the swept sections.
+        """
+        for point in itertools.product(*[values for section, option, values in self.axes]):
+            plugins = dict(self.plugins_section)
+            for section in self.swept_sections:
+                plugins[section] = self.plugins_section[section].dict()
+
+            labels = []
+            for (section, option, values), value in zip(self.axes, point):
+                plugins[section][option] = value
+                labels.append("{0}.{1}={2}".format(section, option, value))
+            yield " ({0})".format(', '.join(labels)), plugins
+        return
+# end class SweepConfiguration
+
 constants = OperatorConfigurationConstants
+# options whose values depend on when they're converted
+RECONVERTED = ((constants.settings_section, constants.total_time_option),
+               (constants.settings_section, constants.end_time_option))
 
 class OperatorConfiguration(BaseClass):
     """
     Extracts arguments for operators from the configuration
     """
-    def __init__(self, source):
+    def __init__(self, source, use_cache=True):
         """
         Operator Configuration constructor
 
         :param:
 
          - `source`: name of configuration file
+         - `use_cache`: if True, re-use a compiled copy of the validated configuration
         """
         super(OperatorConfiguration, self).__init__()
         self.source = source
+        self.use_cache = use_cache
+        self._compiled = None
+        self._validation_outcome = None
         self._configuration = None
         self._configspec = None
         self._countdown_timer = None
@@ -130,6 +408,11 @@ class OperatorConfiguration(BaseClass):
         self._operation_configurations = None
         self._operation_timer = None
         self._operator = None
+        self._fragment_names = None
+        self._section_index = None
+        self._operation_index = None
+        self._sweep = None
+        self._products = None
         return
 
     @property
@@ -142,8 +425,10 @@ class OperatorConfiguration(BaseClass):
                                        error=ApeError,
                                        error_message='Operation Crash',
                                        component_category='Operation',
-                                       time_remains=self.countdown_timer)
-            for operation_configuration in self.operation_configurations:
+                                       time_remains=self.countdown_timer,
+                                       before_call=self.set_repetition)
+            # the operations are built as the fragments are loaded
+            for operation_configuration in self.iter_operation_configurations():
                 self._operator.add(operation_configuration.operation)
         return self._operator
 
@@ -160,37 +445,181 @@ class OperatorConfiguration(BaseClass):
     @property
     def operation_configurations(self):
         """
-        Generator of Operation Configurations
+        List of Operation Configurations (including the config_glob fragments)
         """
         if self._operation_configurations is None:
-            try:
-                self._operation_configurations = []
-                operations = self.configuration[constants.operations_section]
-                if not operations:
-                    self.logger.warning(BLUE_WARNING.format(thing="[OPERATIONS] section not found in configuration"))
-                plugins_section = self.configuration[constants.plugins_section]
+            # iterating sets self._operation_configurations once it's finished
+            for operation_configuration in self.iter_operation_configurations():
+                pass
+        return self._operation_configurations
                 
-                if not plugins_section:
-                    message = "[PLUGINS] section not found in configuration"
+    def iter_operation_configurations(self):
+        """
+        Generator of Operation Configurations
                     
-                    if not operations:
-                        self.logger.warning(BLUE_WARNING.format(thing=message))
-                    else:
-                        self.log_error("ConfigurationError",
-                                       message)
-                        raise ConfigurationError(message)
+        The configuration's own operations come first, then those in each
+        config_glob fragment as it is loaded.
+        """
+        if self._operation_configurations is not None:
+            for operation_configuration in self._operation_configurations:
+                yield operation_configuration
+            return
                         
+        operation_configurations = []
+        try:
+            operations = self.configuration[constants.operations_section]
+            if not operations and not self.fragment_names:
+                self.logger.warning(BLUE_WARNING.format(thing="[OPERATIONS] section not found in configuration"))
+            plugins_section = self.configuration[constants.plugins_section]
+
+            if not plugins_section and not self.fragment_names:
+                message = "[PLUGINS] section not found in configuration"
+
+                if not operations:
+                    self.logger.warning(BLUE_WARNING.format(thing=message))
+                else:
+                    self.log_error("ConfigurationError",
+                                   message)
+                    raise ConfigurationError(message)
+
+            else:
+                if self.sweep is None:
+                    points = [('', plugins_section)]
                 else:
+                    # the un-swept plugins' products are shared by the points
+                    points = self.sweep
+                    self._products = {}
+                for label, point_plugins in points:
                     for operation_name, plugin_subsections in operations.iteritems():
-                        self._operation_configurations.append(OperationConfiguration(plugins_section=plugins_section,
+                        operation_configuration = OperationConfiguration(plugins_section=point_plugins,
+                                                    plugin_subsections=plugin_subsections,
+                                                    operation_name=operation_name + label,
+                                                    quartermaster=self.quartermaster,
+                                                    countdown_timer=self.operation_timer,
+                                                    products=self._products)
+                        operation_configurations.append(operation_configuration)
+                        yield operation_configuration
+
+                for fragment in self.fragments():
+                    self.merge_fragment(fragment)
+                    for operation_name, plugin_subsections in fragment.operations:
+                        operation_configuration = OperationConfiguration(plugins_section=plugins_section,
                                                     plugin_subsections=plugin_subsections,
                                                     operation_name=operation_name,
                                                     quartermaster=self.quartermaster,
-                                                    countdown_timer=self.operation_timer))
-            except KeyError:
-                self._operation_configurations = []
-        return self._operation_configurations
+                                                    countdown_timer=self.operation_timer)
+                        operation_configurations.append(operation_configuration)
+                        yield operation_configuration
+        except KeyError:
+            operation_configurations = []
+        self._operation_configurations = operation_configurations
+        return
+
+    @property
+    def sweep(self):
+        """
+        SweepConfiguration for the SWEEP section (None if there isn't one)
+        """
+        if self._sweep is None:
+            sweep_section = self.configuration.get(constants.sweep_section)
+            if sweep_section:
+                self._sweep = SweepConfiguration(sweep_section=sweep_section,
+                                                 plugins_section=self.configuration[constants.plugins_section])
+                self.logger.info("Sweeping {0} points".format(len(self._sweep)))
+        return self._sweep
+
+    @property
+    def fragment_names(self):
+        """
+        Sorted list of files matching the config_glob (empty if it wasn't set)
+        """
+        if self._fragment_names is None:
+            self._fragment_names = []
+            pattern = self.settings[constants.config_glob_option]
+            if pattern is not None:
+                source = None
+                directory = os.getcwd()
+                if isinstance(self.source, basestring):
+                    source = os.path.realpath(self.source)
+                    directory = os.path.dirname(source)
+                for name in sorted(glob.glob(os.path.join(directory, pattern))):
+                    # the compiled copies (and the configuration itself) would duplicate everything
+                    if (COMPILED_EXTENSION in os.path.basename(name) or
+                        os.path.realpath(name) == source or
+                        not os.path.isfile(name)):
+                        continue
+                    self._fragment_names.append(name)
+                if not self._fragment_names:
+                    self.logger.warning(BLUE_WARNING.format(thing="no files match config_glob '{0}'".format(pattern)))
+        return self._fragment_names
+
+    def fragments(self):
+        """
+        Generator of ConfigurationFragments loaded in a pool of processes
+
+        :yield: ConfigurationFragment (in fragment_names order) as each is loaded
+        """
+        names = self.fragment_names
+        if len(names) < 2:
+            for name in names:
+                yield load_fragment(name)
+            return
+
+        processes = min(len(names), multiprocessing.cpu_count())
+        # small chunks so the first fragments come back quickly
+        chunksize = max(1, min(64, len(names)//(processes * 4)))
+        pool = multiprocessing.Pool(processes)
+        try:
+            for fragment in pool.imap(load_fragment, names, chunksize):
+                yield fragment
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+        return
+
+    def merge_fragment(self, fragment):
+        """
+        Adds the fragment's operations and plugin-sections to the configuration
+
+        :param:
         
+         - `fragment`: ConfigurationFragment to add
+
+        :raise: ConfigurationError if an operation or plugin-section was already defined or an operation uses a plugin-section that isn't defined yet
+        """
+        operations = self.configuration[constants.operations_section]
+        plugins_section = self.configuration[constants.plugins_section]
+
+        # the indices map names to the file that defined them
+        if self._section_index is None:
+            self._section_index = dict.fromkeys(plugins_section.sections, self.source)
+            self._operation_index = dict.fromkeys(operations.scalars, self.source)
+
+        for index, items, section_type in ((self._operation_index, fragment.operations, 'operation'),
+                                           (self._section_index, fragment.plugins, 'plugin-section')):
+            for name, value in items:
+                if name in index:
+                    raise ConfigurationError("{0} '{1}' in '{2}' already defined in '{3}'".format(section_type,
+                                                                                                   name,
+                                                                                                   fragment.filename,
+                                                                                                   index[name]))
+                index[name] = fragment.filename
+
+        # the operations are built as the fragments come in so a later fragment's sections can't be used
+        message = "operation '{0}' in '{1}' uses plugin-section '{2}' which isn't in the configuration, the fragment or an earlier fragment"
+        for name, plugin_subsections in fragment.operations:
+            for section in plugin_subsections:
+                if section not in self._section_index:
+                    raise ConfigurationError(message.format(name, fragment.filename, section))
+
+        for name, plugin_subsections in fragment.operations:
+            operations[name] = plugin_subsections
+        for name, section in fragment.plugins:
+            plugins_section[name] = section
+        return
 
     @property
     def quartermaster(self):
@@ -244,18 +673,53 @@ class OperatorConfiguration(BaseClass):
             self._configspec = OperatorConfigspec()
         return self._configspec
 
+    @property
+    def compiled(self):
+        """
+        CompiledConfiguration for the source (None if not caching or the source isn't a file)
+        """
+        if (self._compiled is None and self.use_cache and
+            isinstance(self.source, basestring) and os.path.isfile(self.source)):
+            self._compiled = CompiledConfiguration(self.source, self.configspec)
+        return self._compiled
+
+    @property
+    def validation_outcome(self):
+        """
+        The outcome of validating the configuration (True if it was loaded pre-validated)
+        """
+        # building the configuration validates it (and converts its values, so it can't
+        # be validated again)
+        configuration = self.configuration
+        if self._validation_outcome is None:
+            self._validation_outcome = configuration.validate(self.configspec.validator)
+        return self._validation_outcome
+
     @property
     def configuration(self):
         """
-        ConfigObj built from `source`
+        ConfigObj built from `source` (or loaded from the compiled copy)
         """
         if self._configuration is None:
+            if self.compiled is not None:
+                self._configuration = self.compiled.load()
 
-            self._configuration = ConfigObj(self.source,
+            if self._configuration is not None:
+                self._validation_outcome = True
+            else:
+                self._configuration = ConfigObj(self.source,
                                                 configspec=self.configspec.configspec,
                                                 file_error=True)
-            self._configuration.validate(self.configspec.validator)
-
+                # the relative times can't be pickled converted (see CompiledConfiguration)
+                unconverted = {}
+                for section, option in RECONVERTED:
+                    value = self._configuration.get(section, {}).get(option)
+                    if value is not None:
+                        unconverted[(section, option)] = value
+                self._validation_outcome = self._configuration.validate(self.configspec.validator)
+
+                if self.compiled is not None and self._validation_outcome is True:
+                    self.compiled.dump(self._configuration, unconverted)
         return self._configuration
 
     def initialize_file_storage(self):
@@ -263,15 +727,21 @@ class OperatorConfiguration(BaseClass):
         This has to be called before the plugins are built so the path will be set
 
         :postcondition: file-storage singleton with sub-folder from default section added as path
+        :postcondition: if a catalog is set, catalog singleton created and given to file-storage
         """
         file_storage = theape.infrastructure.singletons.get_filestorage(name=constants.file_storage_name)
         subfolder = self.settings[constants.subfolder_option]
         timestamp = self.settings[constants.timestamp_option]
+        catalog = self.settings[constants.catalog_option]
         
         if subfolder is not None:
             file_storage.path = subfolder
         if timestamp is not None:
             file_storage.timestamp = timestamp
+        if catalog is not None:
+            filename = os.path.join(file_storage.path, catalog)
+            file_storage.catalog = singletons.get_catalog(name=constants.file_storage_name,
+                                                          filename=filename)
         return
 
     def save_configuration(self, filename):
@@ -292,11 +762,27 @@ class OperatorConfiguration(BaseClass):
         # and didn't provide a sub-folder the compiled file won't
         # get picked up on re-running the code
         filename += COMPILED_EXTENSION
-        name = file_storage.safe_name(filename)
+        # ConfigObj writes plain text even if the FileStorage compresses
+        name = file_storage.safe_name(filename, compressed=False)
         self.configuration.filename = name
         self.configuration.write()
         return
 
+    def set_repetition(self, repetition, index, operation):
+        """
+        Sets the catalog's repetition (if there's a catalog) before an operation is called
+
+        :param:
+
+         - `repetition`: the operator's repetition (counting from 1)
+         - `index`: the operation's index in the operator
+         - `operation`: the operation about to be called
+        """
+        catalog = singletons.get_filestorage(name=constants.file_storage_name).catalog
+        if catalog is not None:
+            catalog.set_context(repetition=repetition)
+        return
+
 # end class OperatorConfiguration
 
 class OperationConfiguration(BaseClass):
@@ -304,7 +790,8 @@ class OperationConfiguration(BaseClass):
     a builder of plugins for operations
     """
     def __init__(self, plugins_section, plugin_subsections,
-                 operation_name, quartermaster, countdown_timer=None):
+                 operation_name, quartermaster, countdown_timer=None,
+                 products=None):
         """
         OperationConfiguration builder
 
@@ -315,6 +802,7 @@ class OperationConfiguration(BaseClass):
          - `plugin_subsections`: list of sub-section-names for the plugins
          - `quartermaster`: QuarterMaster to retrieve plugins
          - `countdown_timer`: CountdownTimer for the operation composite
+         - `products`: dict to share products between operations with the same plugin-section objects
         """
         super(OperationConfiguration, self).__init__()
         self.plugins_section = plugins_section
@@ -322,9 +810,12 @@ class OperationConfiguration(BaseClass):
         self.plugin_subsections = plugin_subsections
         self.quartermaster = quartermaster
         self.countdown_timer = countdown_timer
+        self.products = products
         
         self._plugin_sections_names = None
         self._operation = None
+        # (plugin, section) for each of the operation's components
+        self.plugin_contexts = []
         return
 
     @property
@@ -337,13 +828,21 @@ class OperationConfiguration(BaseClass):
                                         error=DontCatchError,
                                         error_message="{0} Crash".format(self.operation_name),
                                         component_category=self.operation_name,
-                                        time_remains=self.countdown_timer)
+                                        time_remains=self.countdown_timer,
+                                        before_call=self.set_plugin)
             for section, name in self.plugin_sections_names.iteritems():                
                 try:
-                    definition = self.quartermaster.get_plugin(name)
-                    plugin = definition(configuration=self.plugins_section,
-                                        section_header=section).product
+                    plugin = self.shared_product(section)
+                    if plugin is None:
+                        definition = self.quartermaster.get_plugin(name)
+                        plugin = definition(configuration=self.plugins_section,
+                                            section_header=section).product
+                        if self.products is not None and plugin is not None:
+                            self.products[section] = (self.plugins_section[section], plugin)
+                    added = len(self._operation)
                     self._operation.add(plugin)
+                    if len(self._operation) > added:
+                        self.plugin_contexts.append((name, section))
                     if plugin is None:
                         raise ApeError("Unable to build plugin: {0} in section {1}".format(name,
                                                                                            section))
@@ -352,6 +851,39 @@ class OperationConfiguration(BaseClass):
                     raise ConfigurationError("Could not find '{0}' plugin".format(name))
         return self._operation
 
+    def shared_product(self, section):
+        """
+        Gets the product another operation built from the same plugin-section
+
+        :param:
+
+         - `section`: name of the plugin-section
+
+        :return: the shared product or None if there isn't one
+        """
+        if self.products is None or section not in self.products:
+            return None
+        source, product = self.products[section]
+        if source is not self.plugins_section[section]:
+            return None
+        return product
+
+    def set_plugin(self, repetition, index, plugin):
+        """
+        Sets the catalog's plugin and section (if there's a catalog) before a plugin is called
+
+        :param:
+
+         - `repetition`: the operation's repetition
+         - `index`: the plugin's index in the operation
+         - `plugin`: the plugin about to be called
+        """
+        catalog = singletons.get_filestorage(name=constants.file_storage_name).catalog
+        if catalog is not None:
+            name, section = self.plugin_contexts[index]
+            catalog.set_context(plugin=name, section=section)
+        return
+
     @property
     def plugin_sections_names(self):
         """
@@ -370,6 +902,12 @@ class OperationConfiguration(BaseClass):
 in_pweave = __name__ == '__builtin__'
 
 COMPILED_EXTENSION = '.compiled'
+CACHE_EXTENSION = '.pickle'
+# change this when what's pickled changes so old pickles are cache-misses
+COMPILED_FORMAT = 2
+COMPILED_FOLDER = os.path.join('theape', 'compiled')
+# only the user can use the cache folder
+PRIVATE_FOLDER = 0700
 FILE_STORAGE_NAME = 'infrastructure'
 
 CONFIGURATION = '''[OPERATIONS]
@@ -388,7 +926,8 @@ CONFIGURATION = '''[OPERATIONS]
 # these are settings for the overall operation
 
 # if you add a configuration-file-glob (config_glob),
-# all matching files will be added to the configuration
+# the [OPERATIONS] and [PLUGINS] of all matching files will be added
+# to the configuration (the glob is relative to this file's directory)
 # (the default is None)
 #config_glob = settings*.config
 
@@ -418,6 +957,10 @@ CONFIGURATION = '''[OPERATIONS]
 # (default is None)
 # timestamp = <strftime-formatted timestamp>
 
+# if you want an sqlite index of the files written
+# (created in the sub-folder, default is None)
+# catalog = outputs.sqlite
+
 [PLUGINS]
 # for each plugin listed in the [OPERATIONS] there has to be a matching
 # subsection below this section
@@ -433,6 +976,14 @@ CONFIGURATION = '''[OPERATIONS]
 #  [[plugin2]]
 #  plugin = Iperf
 #  <Iperf configuration>
+
+#[SWEEP]
+# to run the operations once for every combination of plugin option values
+# add a sub-section named after the plugin sub-section with a
+# comma-separated list of values for each option to sweep
+#  [[plugin2]]
+#  <option_1> = <value_1>, <value_2>
+#  <option_2> = <value_1>, <value_2>, <value_3>
 '''
 
 output_documentation = __name__ == '__builtin__'
@@ -92,6 +92,47 @@ class BasePlugin(BaseClass):
         return   
 # end class BasePlugin
 
+configspecs = {}
+validators = {}
+
+def get_configspec(source):
+    """
+    Gets the (shared) compiled configspec for the source
+
+    :param:
+
+     - `source`: configspec string or list of lines
+
+    :return: ConfigObj configspec (treat as read-only)
+    """
+    key = source if type(source) is StringType else tuple(source)
+    if key not in configspecs:
+        # avoiding side-effects if there's a splitlines call
+        lines = source.splitlines() if type(source) is StringType else list(source)
+        configspecs[key] = ConfigObj(lines,
+                                     list_values=False,
+                                     _inspec=True)
+    return configspecs[key]
+
+def get_validator(check_methods=None):
+    """
+    Gets the (shared) validator for the check-methods
+
+    :param:
+
+     - `check_methods`: dict of extra check-methods for the Validator
+
+    :return: Validator with the check-methods added
+    """
+    try:
+        key = tuple(sorted(check_methods.iteritems())) if check_methods else None
+        if key not in validators:
+            validators[key] = Validator(check_methods)
+        return validators[key]
+    except TypeError:
+        # un-hashable check-methods can't be shared
+        return Validator(check_methods)
+
 class SubConfigurationConstants(object):
     """
     Holder of SubConfiguration constants
@@ -108,6 +149,105 @@ class SubConfigurationConstants(object):
     extra_message = "Extra {item_type} in section [{section}] - '{name}'"
     check_rep_failure_message = "Errors in section [{0}] in the configuration"
 
+merged_sections = {}
+
+def freeze(section):
+    """
+    Converts a section's contents to something that can be used as a key
+
+    :param:
+
+     - `section`: dict-like section (or a value in one)
+
+    :return: nested tuples of sorted (name, value) pairs
+    :raise: TypeError if a value can't be hashed
+    """
+    if isinstance(section, dict):
+        return tuple(sorted((name, freeze(value)) for name, value in section.iteritems()))
+    if isinstance(section, list):
+        return tuple(freeze(value) for value in section)
+    hash(section)
+    return section
+
+class SectionResolver(BaseClass):
+    """
+    Resolves chained `updates_section` sections
+    """
+    def __init__(self, source, resolved=None,
+                 updates_option=SubConfigurationConstants.updates_section_option):
+        """
+        SectionResolver constructor
+
+        :param:
+
+         - `source`: ConfigObj section (or dict) with the plugin sections
+         - `resolved`: dict to store merged sections in (default is shared by all resolvers)
+         - `updates_option`: name of the option that names the base section
+        """
+        super(SectionResolver, self).__init__()
+        self.source = source
+        self.resolved = resolved if resolved is not None else merged_sections
+        self.updates_option = updates_option
+        return
+
+    def chain(self, section_name):
+        """
+        Follows the `updates_option` from the section to its top-most base
+
+        :param:
+
+         - `section_name`: name of a section in the source
+
+        :return: list of section names (the section first)
+        :raise: ConfigurationError if a section is missing or the chain loops
+        """
+        chain = []
+        name = section_name
+        while name is not None:
+            if name in chain:
+                raise ConfigurationError("updates_section loop: {0}".format(' -> '.join(chain + [name])))
+            if name not in self.source:
+                raise ConfigurationError("Section '{0}' to update not found in configuration".format(name))
+            chain.append(name)
+            name = self.source[name].get(self.updates_option)
+        return chain
+
+    def resolve(self, section_name):
+        """
+        Merges the section over its chain of base sections
+
+        :param:
+
+         - `section_name`: name of a section in the source
+
+        :return: ConfigObj of the merged section (treat as read-only)
+        :raise: ConfigurationError if a section is missing or the chain loops
+        """
+        chain = self.chain(section_name)
+        resolved = self.resolved
+        try:
+            contents = [freeze(self.source[name]) for name in chain]
+            # each section's merge depends on its own contents and all of its bases'
+            keys = [tuple(contents[index:]) for index in range(len(chain))]
+        except TypeError:
+            # un-hashable values can't be shared so the chain is merged for this call only
+            keys, resolved = range(len(chain)), {}
+
+        # walk up the chain until a merged or top-most section is found
+        top = 0
+        while top < len(chain) and keys[top] not in resolved:
+            top += 1
+        base = resolved[keys[top]] if top < len(chain) else None
+        for index in reversed(range(top)):
+            merged = ConfigObj(base) if base is not None else ConfigObj()
+            merged.merge(self.source[chain[index]])
+            self.logger.debug("Merged section '{0}'".format(chain[index]))
+            resolved[keys[index]] = base = merged
+        return base
+# end class SectionResolver
+
+validated_sections = {}
+
 class SubConfiguration(BaseClass):
     """
     Abstract base class for configurations
@@ -229,7 +369,7 @@ class SubConfiguration(BaseClass):
         validator for the configuration
         """
         if self._validator is None:
-            self._validator = Validator(self.check_methods)
+            self._validator = get_validator(self.check_methods)
         return self._validator
 
     @property
@@ -238,14 +378,7 @@ class SubConfiguration(BaseClass):
         A configspec built from configspec_source for validation
         """
         if self._configspec is None:
-            # avoiding side-effects if there's a splitlines call
-            configspec_source = self.configspec_source
-            
-            if type(self.configspec_source) is StringType:
-                configspec_source = configspec_source.splitlines()
-            self._configspec = ConfigObj(configspec_source,
-                                         list_values=False,
-                                         _inspec=True)
+            self._configspec = get_configspec(self.configspec_source)
         return self._configspec
             
     @property
@@ -257,6 +390,10 @@ class SubConfiguration(BaseClass):
         :return:  validated configuration for this section
         """
         if self._configuration is None:
+            key = self.validated_key()
+            if key in validated_sections:
+                self._configuration, self._validation_outcome = validated_sections[key]
+                return self._configuration
             section = ConfigObj(self.source[self.section_name],
                                     configspec=self.configspec,
                                     file_error=True)        
@@ -268,8 +405,32 @@ class SubConfiguration(BaseClass):
             # validation has to come after updating for ``update`` to work
             self._validation_outcome = self._configuration.validate(self.validator,
                                                                     preserve_errors=True)
+            if key is not None:
+                validated_sections[key] = (self._configuration, self._validation_outcome)
         return self._configuration
 
+    def validated_key(self):
+        """
+        Key for the validated section in `validated_sections`
+
+        :return: contents of the section's chain, configspec source and check-methods (None if un-hashable)
+        :raise: ConfigurationError if a base section is missing or the updates loop
+        """
+        section = self.source[self.section_name]
+        chain = [self.section_name]
+        if (self.updatable and
+            section.get(self.constants.updates_section_option) is not None):
+            chain = SectionResolver(self.source,
+                                    updates_option=self.constants.updates_section_option).chain(self.section_name)
+        configspec_source = self.configspec_source
+        try:
+            return (tuple(freeze(self.source[name]) for name in chain),
+                    configspec_source if type(configspec_source) is StringType else tuple(configspec_source),
+                    tuple(sorted(self.check_methods.iteritems())) if self.check_methods else None)
+        except TypeError:
+            # un-hashable values or check-methods can't be shared
+            return None
+
     def update(self, section):
         """
         Uses 'updates_section' to build configuration from other section
@@ -279,11 +440,14 @@ class SubConfiguration(BaseClass):
          - `section`: plugin-section to update
 
         :return: section merged with this section or original if appropriate 
+        :raise: ConfigurationError if the base section is missing or the updates loop
         """
         if (self.constants.updates_section_option in section
             and section[self.constants.updates_section_option] is not None ):       
             other_section = section[self.constants.updates_section_option]
-            base_section = ConfigObj(self.source[other_section],
+            resolver = SectionResolver(self.source,
+                                       updates_option=self.constants.updates_section_option)
+            base_section = ConfigObj(resolver.resolve(other_section),
                                      configspec=self.configspec)
             base_section.merge(section)
             section = base_section
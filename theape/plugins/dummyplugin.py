@@ -128,8 +128,10 @@ class CrashTestDummyConfiguration(BaseConfiguration):
             error = self.configuration['error']
             module = importlib.import_module(error_module)
             err = getattr(module, error)
-            self.configuration['error'] = err
-            self._product = CrashDummy(**self.configuration)
+            # the validated configuration is shared so the arguments are a copy
+            arguments = dict(self.configuration)
+            arguments['error'] = err
+            self._product = CrashDummy(**arguments)
         return self._product
 # end class CrashTestDummyConfiguration
 
@@ -7,6 +7,7 @@ from configobj import ConfigObj
 
 # this package
 from theape import BasePlugin
+from theape.plugins.base_plugin import get_configspec
 from theape.parts.sleep.sleep import TheBigSleep
 from theape.infrastructure.timemap import time_validator
 
@@ -77,11 +78,8 @@ class Sleep(BasePlugin):
         the plugin sub-section
         """
         if self._subsection is None:
-            configspec = ConfigObj(sleep_configspec.splitlines(),
-                                   list_values=False,
-                                   _inspec=True)
             section = ConfigObj(self.configuration[self.section_header],
-                                configspec=configspec)
+                                configspec=get_configspec(sleep_configspec))
             section.validate(time_validator)
             self._subsection = section
         return self._subsection
@@ -8,3 +8,71 @@ Feature: Operator Configuration
   Given a configuration with operations and plugins
   When the user checks the operator configuration
   Then the operator configuration has the operation configurations
+
+ Scenario: User checks the validation outcome before the configuration
+  Given a configuration with a total time and an end time
+  When the user gets the validation outcome first
+  Then the configuration is valid and the times are converted
+
+ Scenario: User re-builds a configuration that was compiled
+  Given a configuration file that has been compiled
+  When the user re-builds the operator configuration
+  Then the operator configuration is loaded from the compiled copy
+
+ Scenario: User re-builds a configuration that changed after compiling
+  Given a configuration file that has been compiled
+  And the configuration file is changed
+  When the user re-builds the operator configuration
+  Then the operator configuration is parsed again
+
+ Scenario: User re-builds a configuration whose compiled copy others can change
+  Given a configuration file that has been compiled
+  And the compiled copy can be changed by other users
+  When the user re-builds the operator configuration
+  Then the operator configuration is parsed again
+
+ Scenario: User re-builds a configuration after the configspec changed
+  Given a configuration file that has been compiled
+  And the configspec is changed
+  When the user re-builds the operator configuration
+  Then the operator configuration is parsed again
+
+ Scenario: User re-builds a compiled configuration with an end time
+  Given a configuration file with an end time that was compiled earlier
+  When the user re-builds the operator configuration
+  Then the end time is converted again
+
+ Scenario: User builds a configuration with a config_glob
+  Given a configuration file with a config_glob matching fragments
+  When the user gets the operation configurations
+  Then the fragment operations follow the configuration's operations
+  And the fragment plugin sections are in the configuration
+
+ Scenario: User builds a configuration with a fragment that repeats a section
+  Given a configuration file with a config_glob matching fragments
+  And a fragment that repeats a plugin section
+  When the user gets the operation configurations with an error
+  Then a ConfigurationError is raised for the repeated section
+
+ Scenario: User builds a configuration with a fragment that uses a later fragment's section
+  Given a configuration file with a config_glob matching fragments
+  And a fragment that uses a plugin section from a later fragment
+  When the user gets the operation configurations with an error
+  Then a ConfigurationError is raised for the undefined section
+
+ Scenario: User builds a configuration with a parameter sweep
+  Given a configuration with a SWEEP section
+  When the user builds the swept operator
+  Then there is an operation for every point of the sweep
+  And the swept plugin sections have the point's values
+  And the un-swept plugins are only built once
+
+ Scenario: User sweeps a section that isn't in the plugins
+  Given a configuration with a SWEEP section for a missing plugin
+  When the user gets the operation configurations with an error
+  Then a ConfigurationError is raised for the missing section
+
+ Scenario: User runs an operator with an output catalog
+  Given a configuration with a catalog and a plugin that writes a file
+  When the user runs the operator
+  Then the catalog has the plugin, section and repetition of each file
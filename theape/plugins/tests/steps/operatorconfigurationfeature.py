@@ -1,17 +1,28 @@
 
 # python standard library
 from contextlib import nested
+from datetime import datetime, time
+import os
+import pickle
+import shutil
+import tempfile
 
 # third-party
 from behave import given, when, then
 from hamcrest import assert_that, is_, equal_to, contains
+from hamcrest import calling, raises, has_entries
 from mock import MagicMock, patch, call
 
 # this package
 from theape.plugins.apeplugin import OperatorConfigurationConstants, OperatorConfiguration
 from theape.plugins.apeplugin import OperationConfiguration
+from theape.plugins.apeplugin import COMPILED_EXTENSION
+from theape.plugins.apeplugin import CompiledConfiguration, compiled_folder
+from theape.plugins.apeplugin import config_spec
+from theape.infrastructure.errors import ConfigurationError
 from theape.parts.countdown.countdown import INFO, CountdownTimer
 from theape.plugins.quartermaster import QuarterMaster
+from theape.infrastructure import singletons
 
 @given("an empty configuration")
 def empty_configuration(context):
@@ -110,4 +121,403 @@ def assert_operation_configurations(context):
     print(context.configuration.operator.components)
     assert_that(context.configuration.operator.components,
                     contains(mock_operation, mock_operation_2))
-    return
\ No newline at end of file
+    return
+
+timed_source = """
+[SETTINGS]
+total_time = 2 hours
+end_time = 11:59 pm
+
+[OPERATIONS]
+op1 = p1
+
+[PLUGINS]
+ [[p1]]
+ plugin = Sleep
+"""
+
+@given("a configuration with a total time and an end time")
+def timed_configuration(context):
+    context.configuration = OperatorConfiguration(timed_source.splitlines())
+    return
+
+@when("the user gets the validation outcome first")
+def validation_outcome_first(context):
+    context.outcome = context.configuration.validation_outcome
+    return
+
+@then("the configuration is valid and the times are converted")
+def assert_valid_times(context):
+    assert_that(context.outcome, is_(True))
+    settings = context.configuration.configuration['SETTINGS']
+    assert_that(settings['total_time'].total_seconds(), is_(equal_to(7200)))
+    assert_that(settings['end_time'].time(), is_(equal_to(time(23, 59))))
+    return
+
+compiled_source = """
+[SETTINGS]
+repetitions = 5
+total_time = 2 hours
+
+[OPERATIONS]
+op1 = p1
+
+[PLUGINS]
+ [[p1]]
+ plugin = Sleep
+"""
+
+def cache_folder(context):
+    """
+    Points the compiled-configuration cache at a temporary folder
+
+    :return: the folder the pickles go in
+    """
+    cache = tempfile.mkdtemp()
+    context.add_cleanup(shutil.rmtree, cache)
+    patcher = patch.dict(os.environ, {'XDG_CACHE_HOME': cache})
+    patcher.start()
+    context.add_cleanup(patcher.stop)
+    return compiled_folder()
+
+@given("a configuration file that has been compiled")
+def compiled_configuration(context):
+    descriptor, context.filename = tempfile.mkstemp(suffix='.ini')
+    with os.fdopen(descriptor, 'w') as writer:
+        writer.write(compiled_source)
+    context.compiled_name = CompiledConfiguration(context.filename,
+                                                  folder=cache_folder(context)).filename
+    context.first = OperatorConfiguration(context.filename).configuration
+    assert_that(os.path.isfile(context.compiled_name), is_(True))
+    context.add_cleanup(os.remove, context.filename)
+    return
+
+@when("the user re-builds the operator configuration")
+def rebuild_configuration(context):
+    context.configobj = MagicMock(name='ConfigObj')
+    context.operator_configuration = OperatorConfiguration(context.filename)
+    # the configspec is always parsed, only the configuration file should be skipped
+    context.operator_configuration.configspec.configspec
+    with patch('theape.plugins.apeplugin.ConfigObj', context.configobj):
+        context.second = context.operator_configuration.configuration
+    return
+
+@then("the operator configuration is loaded from the compiled copy")
+def assert_compiled(context):
+    assert_that(context.configobj.called, is_(False))
+    assert_that(context.operator_configuration.validation_outcome, is_(True))
+    for section in ('OPERATIONS', 'PLUGINS'):
+        assert_that(context.second[section], is_(equal_to(context.first[section])))
+    assert_that(context.second['SETTINGS']['repetitions'], is_(equal_to(5)))
+    assert_that(context.second['SETTINGS']['total_time'].total_seconds(),
+                is_(equal_to(7200)))
+    return
+
+@given("the configuration file is changed")
+def change_configuration(context):
+    with open(context.filename, 'a') as writer:
+        writer.write(" [[p2]]\n plugin = Sleep\n")
+    return
+
+@then("the operator configuration is parsed again")
+def assert_parsed(context):
+    assert_that(context.configobj.called, is_(True))
+    return
+
+@given("the compiled copy can be changed by other users")
+def shared_compiled_copy(context):
+    os.chmod(context.compiled_name, 0666)
+    return
+
+@given("the configspec is changed")
+def change_configspec(context):
+    patcher = patch('theape.plugins.apeplugin.config_spec',
+                    config_spec + "\n# a new option would go here\n")
+    patcher.start()
+    context.add_cleanup(patcher.stop)
+    return
+
+@given("a configuration file with an end time that was compiled earlier")
+def end_time_configuration(context):
+    descriptor, context.filename = tempfile.mkstemp(suffix='.ini')
+    with os.fdopen(descriptor, 'w') as writer:
+        writer.write(compiled_source.replace('total_time = 2 hours',
+                                             'end_time = 11:59 pm'))
+    context.compiled_name = CompiledConfiguration(context.filename,
+                                                  folder=cache_folder(context)).filename
+    context.first = OperatorConfiguration(context.filename).configuration
+
+    # make the pickle look like it was compiled on another day
+    with open(context.compiled_name, 'rb') as reader:
+        digest, configuration, unconverted = pickle.load(reader)
+    configuration['SETTINGS']['end_time'] = datetime(2000, 1, 1, 23, 59)
+    with open(context.compiled_name, 'wb') as writer:
+        pickle.dump((digest, configuration, unconverted), writer)
+    context.add_cleanup(os.remove, context.filename)
+    return
+
+@then("the end time is converted again")
+def assert_end_time(context):
+    assert_that(context.configobj.called, is_(False))
+    assert_that(context.second['SETTINGS']['end_time'],
+                is_(equal_to(context.first['SETTINGS']['end_time'])))
+    return
+
+glob_source = """
+[SETTINGS]
+config_glob = fragments/*.ini
+
+[OPERATIONS]
+main = p0
+
+[PLUGINS]
+ [[p0]]
+ plugin = Sleep
+"""
+
+fragment_source = """
+[OPERATIONS]
+op{0} = p{0}
+
+[PLUGINS]
+ [[p{0}]]
+ plugin = Sleep
+ time = {0} seconds
+"""
+
+@given("a configuration file with a config_glob matching fragments")
+def glob_configuration(context):
+    context.directory = tempfile.mkdtemp()
+    context.add_cleanup(shutil.rmtree, context.directory)
+    context.filename = os.path.join(context.directory, 'ape.ini')
+    with open(context.filename, 'w') as writer:
+        writer.write(glob_source)
+
+    fragments = os.path.join(context.directory, 'fragments')
+    os.mkdir(fragments)
+    # written out of order to make sure they get sorted
+    for index in (3, 1, 2, 10):
+        with open(os.path.join(fragments, 'fragment{0:02d}.ini'.format(index)), 'w') as writer:
+            writer.write(fragment_source.format(index))
+
+    # compiled copies shouldn't get added
+    with open(os.path.join(fragments, 'old' + COMPILED_EXTENSION + '.ini'), 'w') as writer:
+        writer.write(fragment_source.format(1))
+
+    context.configuration = OperatorConfiguration(context.filename, use_cache=False)
+    context.configuration._quartermaster = MagicMock()
+    return
+
+@when("the user gets the operation configurations")
+def get_operation_configurations(context):
+    context.operation_configurations = context.configuration.operation_configurations
+    return
+
+@then("the fragment operations follow the configuration's operations")
+def assert_fragment_operations(context):
+    names = [operation_configuration.operation_name
+             for operation_configuration in context.operation_configurations]
+    assert_that(names, is_(equal_to('main op1 op2 op3 op10'.split())))
+    subsections = [operation_configuration.plugin_subsections
+                   for operation_configuration in context.operation_configurations]
+    assert_that(subsections, is_(equal_to([['p0'], ['p1'], ['p2'], ['p3'], ['p10']])))
+    return
+
+@then("the fragment plugin sections are in the configuration")
+def assert_fragment_plugins(context):
+    plugins = context.configuration.configuration['PLUGINS']
+    assert_that(sorted(plugins.sections),
+                is_(equal_to('p0 p1 p10 p2 p3'.split())))
+    assert_that(plugins['p10'], has_entries({'plugin': 'Sleep',
+                                             'time': '10 seconds'}))
+    for operation_configuration in context.operation_configurations:
+        assert_that(operation_configuration.plugins_section, is_(plugins))
+    assert_that(context.configuration.configuration['OPERATIONS']['op3'],
+                is_(equal_to(['p3'])))
+    return
+
+@given("a fragment that repeats a plugin section")
+def repeated_section(context):
+    with open(os.path.join(context.directory, 'fragments', 'fragment99.ini'), 'w') as writer:
+        writer.write(fragment_source.format(2).replace('op2', 'op99'))
+    return
+
+@when("the user gets the operation configurations with an error")
+def get_operation_configurations_error(context):
+    context.callable = lambda: context.configuration.operation_configurations
+    return
+
+@then("a ConfigurationError is raised for the repeated section")
+def assert_repeated_section(context):
+    assert_that(calling(context.callable),
+                raises(ConfigurationError, "plugin-section 'p2'"))
+    return
+
+@given("a fragment that uses a plugin section from a later fragment")
+def forward_section(context):
+    # fragment03 (with p3) comes after fragment00 in the sorted names
+    with open(os.path.join(context.directory, 'fragments', 'fragment00.ini'), 'w') as writer:
+        writer.write("""
+[OPERATIONS]
+early = p3
+""")
+    return
+
+@then("a ConfigurationError is raised for the undefined section")
+def assert_undefined_section(context):
+    assert_that(calling(context.callable),
+                raises(ConfigurationError, "operation 'early' .* plugin-section 'p3'"))
+    return
+
+sweep_source = """
+[OPERATIONS]
+op = server, client
+
+[PLUGINS]
+ [[server]]
+ plugin = Server
+
+ [[client]]
+ plugin = Client
+ window = 8K
+ parallel = 1
+
+[SWEEP]
+ [[client]]
+ window = 64K, 128K, 256K
+ parallel = 1, 4
+"""
+
+def fake_plugin(configuration, section_header):
+    """
+    builds a plugin whose product is a copy of its section
+    """
+    plugin = MagicMock()
+    plugin.product = dict(configuration[section_header])
+    return plugin
+
+@given("a configuration with a SWEEP section")
+def sweep_configuration(context):
+    context.configuration = OperatorConfiguration(sweep_source.splitlines())
+    context.configuration._quartermaster = MagicMock()
+    context.plugin = MagicMock(side_effect=fake_plugin)
+    context.configuration._quartermaster.get_plugin.return_value = context.plugin
+    return
+
+@when("the user builds the swept operator")
+def build_swept_operator(context):
+    context.operation_configurations = context.configuration.operation_configurations
+    context.operations = [operation_configuration.operation
+                          for operation_configuration in context.operation_configurations]
+    return
+
+@then("there is an operation for every point of the sweep")
+def assert_sweep_operations(context):
+    assert_that(len(context.configuration.sweep), is_(equal_to(6)))
+    names = [operation_configuration.operation_name
+             for operation_configuration in context.operation_configurations]
+    assert_that(names[0], is_(equal_to('op (client.window=64K, client.parallel=1)')))
+    assert_that(names[-1], is_(equal_to('op (client.window=256K, client.parallel=4)')))
+    assert_that(len(set(names)), is_(equal_to(6)))
+    return
+
+@then("the swept plugin sections have the point's values")
+def assert_swept_values(context):
+    clients = [[product for product in operation if product['plugin'] == 'Client'][0]
+               for operation in context.operations]
+    points = [(client['window'], client['parallel']) for client in clients]
+    assert_that(points, is_(equal_to([('64K', '1'), ('64K', '4'),
+                                      ('128K', '1'), ('128K', '4'),
+                                      ('256K', '1'), ('256K', '4')])))
+
+    # the PLUGINS section itself is unchanged
+    plugins = context.configuration.configuration['PLUGINS']
+    assert_that(plugins['client']['window'], is_(equal_to('8K')))
+    return
+
+@then("the un-swept plugins are only built once")
+def assert_built_once(context):
+    servers = [[product for product in operation if product['plugin'] == 'Server'][0]
+               for operation in context.operations]
+    for server in servers:
+        assert_that(server, is_(servers[0]))
+
+    # one server and six clients
+    assert_that(context.plugin.call_count, is_(equal_to(7)))
+    return
+
+@given("a configuration with a SWEEP section for a missing plugin")
+def sweep_missing_plugin(context):
+    source = sweep_source.replace('[SWEEP]\n [[client]]', '[SWEEP]\n [[clint]]')
+    context.configuration = OperatorConfiguration(source.splitlines())
+    context.configuration._quartermaster = MagicMock()
+    context.callable = lambda: context.configuration.operation_configurations
+    return
+
+@then("a ConfigurationError is raised for the missing section")
+def assert_missing_sweep_section(context):
+    assert_that(calling(context.callable),
+                raises(ConfigurationError, "'clint' not found"))
+    return
+
+catalog_source = """
+[SETTINGS]
+repetitions = 2
+subfolder = {0}
+catalog = outputs.sqlite
+
+[OPERATIONS]
+op = writer
+
+[PLUGINS]
+ [[writer]]
+ plugin = Writer
+"""
+
+class FileWriter(object):
+    """
+    A plugin-product that writes a file through the file-storage
+    """
+    def __call__(self):
+        storage = singletons.get_filestorage(name=OperatorConfigurationConstants.file_storage_name)
+        opened = storage.open('output.txt')
+        opened.writeline('sample')
+        opened.close()
+        return
+
+    def check_rep(self):
+        return
+
+    def close(self):
+        return
+
+@given("a configuration with a catalog and a plugin that writes a file")
+def catalog_configuration(context):
+    context.directory = tempfile.mkdtemp()
+    context.configuration = OperatorConfiguration(catalog_source.format(context.directory).splitlines())
+    context.configuration._quartermaster = MagicMock()
+    definition = context.configuration._quartermaster.get_plugin.return_value
+    definition.return_value.product = FileWriter()
+    singletons.refresh()
+    context.configuration.initialize_file_storage()
+
+    def remove_files():
+        singletons.refresh()
+        shutil.rmtree(context.directory)
+    context.add_cleanup(remove_files)
+    return
+
+@when("the user runs the operator")
+def run_operator(context):
+    context.configuration.operator()
+    return
+
+@then("the catalog has the plugin, section and repetition of each file")
+def assert_catalog_context(context):
+    catalog = singletons.get_catalog(name=OperatorConfigurationConstants.file_storage_name)
+    outputs = catalog.outputs()
+    assert_that([(output.plugin, output.section, output.repetition) for output in outputs],
+                is_(equal_to([('Writer', 'writer', 1), ('Writer', 'writer', 2)])))
+    assert_that([output.requested for output in outputs],
+                is_(equal_to(['output.txt', 'output.txt'])))
+    return
@@ -9,6 +9,7 @@ from mock import MagicMock
 
 # this package
 from theape.plugins.base_plugin import SubConfiguration, SubConfigurationConstants
+from theape.plugins.base_plugin import get_configspec, get_validator, SectionResolver
 from theape.infrastructure.baseclass import RED_ERROR
 from theape import ConfigurationError
 
@@ -408,4 +409,168 @@ def assert_options(context):
                 'op2': 42}
     assert_that(context.configuration.configuration,
                 has_entries(expected))
+    return
+
+@given("SubConfiguration implementations for many sections")
+def many_sections(context):
+    source = ConfigObj()
+    for index in range(100):
+        source['fake{0}'.format(index)] = {'plugin': 'Fake',
+                                           'op': 'value{0}'.format(index),
+                                           'op2': str(index)}
+    context.configurations = [FakeConfiguration(source=source,
+                                                section_name=name)
+                              for name in source.sections]
+    return
+
+@when("the SubConfiguration implementations are validated")
+def validate_many_sections(context):
+    context.outcomes = [configuration.validation_outcome
+                        for configuration in context.configurations]
+    return
+
+@then("they share one configspec and validator")
+def assert_shared(context):
+    configspecs = set(id(configuration.configspec)
+                      for configuration in context.configurations)
+    validators = set(id(configuration.validator)
+                     for configuration in context.configurations)
+    assert_that(len(configspecs), is_(equal_to(1)))
+    assert_that(len(validators), is_(equal_to(1)))
+    assert_that(context.configurations[0].configspec,
+                is_(get_configspec(configspec)))
+    assert_that(context.configurations[0].validator,
+                is_(get_validator()))
+    return
+
+@then("each section has its own configuration")
+def assert_own_configuration(context):
+    assert_that(context.outcomes, is_(equal_to([True] * 100)))
+    for index, configuration in enumerate(context.configurations):
+        assert_that(configuration.configuration,
+                    has_entries({'op': 'value{0}'.format(index),
+                                 'op2': index}))
+
+    # validating didn't change the shared configspec
+    assert_that(context.configurations[0].configspec.dict(),
+                is_(equal_to({'plugin': 'option(Fake)',
+                              'op': 'string',
+                              'op2': 'integer'})))
+    return
+
+chained_updates_config = """
+[FAKE]
+op1 = 1
+
+[[sub_section]]
+op2 = 5
+
+[FAKE2]
+updates_section = FAKE
+op1 = 2
+
+[FAKE3]
+updates_section = FAKE2
+
+[[sub_section]]
+op2 = 3
+""".splitlines()
+
+@given("SubConfiguration sections with chained updates")
+def chained_updates(context):
+    context.source = ConfigObj(chained_updates_config)
+    context.configurations = [FakeConfiguration(source=context.source,
+                                                configspec_source=update_sections_configspec,
+                                                section_name=name)
+                              for name in ('FAKE3', 'FAKE2', 'FAKE3')]
+    return
+
+@then("the SubConfiguration implementations have the chained updates")
+def assert_chained_updates(context):
+    fake3, fake2, other_fake3 = context.configurations
+    assert_that(fake3.configuration,
+                has_entries({'op1': 2,
+                             'updates_section': 'FAKE2',
+                             'sub_section': {'op2': 3}}))
+    assert_that(fake2.configuration,
+                has_entries({'op1': 2,
+                             'sub_section': {'op2': 5}}))
+    assert_that(other_fake3.configuration,
+                is_(equal_to(fake3.configuration)))
+    return
+
+@then("the base sections were only merged once")
+def assert_merged_once(context):
+    resolved = {}
+    resolver = SectionResolver(context.source, resolved)
+    merged = resolver.resolve('FAKE3')
+    # one merge for each section in the chain FAKE3 -> FAKE2 -> FAKE
+    assert_that(len(resolved), is_(equal_to(3)))
+
+    # the resolver returns the stored (shared) merged section
+    assert_that(resolver.resolve('FAKE3'), is_(merged))
+    assert_that(len(resolved), is_(equal_to(3)))
+
+    # plain dicts with the same contents (like the sweep points) share it too
+    points = dict((name, context.source[name].dict()) for name in context.source)
+    assert_that(SectionResolver(points, resolved).resolve('FAKE3'),
+                is_(merged))
+
+    # and so do the validated sections
+    fake3, fake2, other_fake3 = context.configurations
+    assert_that(other_fake3.configuration, is_(fake3.configuration))
+
+    # the source wasn't changed by the merges
+    assert_that(context.source['FAKE'].dict(),
+                is_(equal_to({'op1': '1', 'sub_section': {'op2': '5'}})))
+    return
+
+@when("a base section is changed after the configurations were validated")
+def change_base_section(context):
+    context.old = context.configurations[0].configuration
+    context.source['FAKE2']['op1'] = '7'
+    context.configuration = FakeConfiguration(source=context.source,
+                                              configspec_source=update_sections_configspec,
+                                              section_name='FAKE3')
+    return
+
+@then("the new configuration has the change")
+def assert_changed(context):
+    assert_that(context.configuration.configuration,
+                has_entries({'op1': 7,
+                             'sub_section': {'op2': 3}}))
+    assert_that(context.configuration.validation_outcome, is_(True))
+
+    # the configuration validated before the change is left alone
+    assert_that(context.old['op1'], is_(equal_to(2)))
+    return
+
+looped_updates_config = """
+[FAKE]
+updates_section = FAKE3
+op1 = 1
+
+[FAKE2]
+updates_section = FAKE
+
+[FAKE3]
+updates_section = FAKE2
+""".splitlines()
+
+@given("SubConfiguration sections that update each other")
+def looped_updates(context):
+    context.configuration = FakeConfiguration(source=ConfigObj(looped_updates_config),
+                                              configspec_source=update_sections_configspec,
+                                              section_name='FAKE')
+    return
+
+@when("the SubConfiguration configuration is retrieved")
+def get_configuration(context):
+    context.callable = lambda: context.configuration.configuration
+    return
+
+@then("a ConfigurationError is raised for the loop")
+def assert_loop_error(context):
+    assert_that(calling(context.callable),
+                raises(ConfigurationError))
     return
\ No newline at end of file
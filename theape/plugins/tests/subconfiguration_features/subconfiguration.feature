@@ -62,3 +62,25 @@ Feature: Sub Configuration
   When the SubConfiguration checks process_errors
   Then the process_errors returned True
   And the configuration options that were given are in the configuration
+
+ Scenario: Sections for the same plugin share the configspec
+  Given SubConfiguration implementations for many sections
+  When the SubConfiguration implementations are validated
+  Then they share one configspec and validator
+  And each section has its own configuration
+
+ Scenario: Section updates a section that updates another section
+  Given SubConfiguration sections with chained updates
+  When the SubConfiguration implementation validates the configuration
+  Then the SubConfiguration implementations have the chained updates
+  And the base sections were only merged once
+
+ Scenario: Section's base is changed after it was validated
+  Given SubConfiguration sections with chained updates
+  When a base section is changed after the configurations were validated
+  Then the new configuration has the change
+
+ Scenario: Sections update each other
+  Given SubConfiguration sections that update each other
+  When the SubConfiguration configuration is retrieved
+  Then a ConfigurationError is raised for the loop